@@ -0,0 +1,56 @@
+"""Add full-text search vector to jobs
+
+Revision ID: 003_add_job_search_vector
+Revises: 002_create_core_tables
+Create Date: 2024-02-01 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '003_add_job_search_vector'
+down_revision = '002_create_core_tables'
+branch_labels = None
+depends_on = None
+
+
+SEARCH_DOCUMENT = """
+    setweight(to_tsvector('english', coalesce({row}title, '')), 'A') ||
+    setweight(to_tsvector('english',
+        array_to_string(coalesce({row}tags, '{{}}'), ' ') || ' ' ||
+        array_to_string(coalesce({row}keywords, '{{}}'), ' ')), 'B') ||
+    setweight(to_tsvector('english', coalesce({row}description, '')), 'C')
+"""
+
+
+def upgrade() -> None:
+    op.add_column('jobs', sa.Column('search_vector', postgresql.TSVECTOR(), nullable=True))
+
+    # Trigger keeps the document current on every write that touches a searched column
+    op.execute(f"""
+        CREATE OR REPLACE FUNCTION jobs_search_vector_update() RETURNS trigger AS $$
+        BEGIN
+            NEW.search_vector := {SEARCH_DOCUMENT.format(row='NEW.')};
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER jobs_search_vector_trigger
+        BEFORE INSERT OR UPDATE OF title, description, tags, keywords ON jobs
+        FOR EACH ROW EXECUTE FUNCTION jobs_search_vector_update()
+    """)
+
+    # Backfill existing rows
+    op.execute(f"UPDATE jobs SET search_vector = {SEARCH_DOCUMENT.format(row='')}")
+
+    op.create_index('idx_jobs_search_vector', 'jobs', ['search_vector'], postgresql_using='gin')
+
+
+def downgrade() -> None:
+    op.drop_index('idx_jobs_search_vector')
+    op.execute("DROP TRIGGER IF EXISTS jobs_search_vector_trigger ON jobs")
+    op.execute("DROP FUNCTION IF EXISTS jobs_search_vector_update()")
+    op.drop_column('jobs', 'search_vector')
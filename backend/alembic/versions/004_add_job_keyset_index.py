@@ -0,0 +1,28 @@
+"""Add keyset pagination index for job search
+
+Revision ID: 004_add_job_keyset_index
+Revises: 003_add_job_search_vector
+Create Date: 2024-02-05 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '004_add_job_keyset_index'
+down_revision = '003_add_job_search_vector'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Matches ORDER BY published_at DESC NULLS LAST, id DESC within a status
+    op.create_index(
+        'idx_jobs_status_published_id',
+        'jobs',
+        ['status', sa.text('published_at DESC NULLS LAST'), sa.text('id DESC')],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('idx_jobs_status_published_id')
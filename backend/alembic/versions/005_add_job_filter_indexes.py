@@ -0,0 +1,42 @@
+"""Add indexes for job search filters
+
+Revision ID: 005_add_job_filter_indexes
+Revises: 004_add_job_keyset_index
+Create Date: 2024-02-08 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '005_add_job_filter_indexes'
+down_revision = '004_add_job_keyset_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Array overlap (work_type && ...) and containment (tags @> ...)
+    op.create_index('idx_jobs_work_type', 'jobs', ['work_type'], postgresql_using='gin')
+    op.create_index('idx_jobs_tags', 'jobs', ['tags'], postgresql_using='gin')
+
+    # Experience level filter with the default newest-first ordering
+    op.create_index(
+        'idx_jobs_status_level_published',
+        'jobs',
+        ['status', 'experience_level', sa.text('published_at DESC NULLS LAST'), sa.text('id DESC')],
+    )
+
+    # Salary range overlap; expression must match JOB_SALARY_RANGE in app.models.job
+    op.execute("""
+        CREATE INDEX idx_jobs_salary_range ON jobs USING gist (
+            int4range(least(salary_min, salary_max), greatest(salary_min, salary_max), '[]')
+        )
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_jobs_salary_range')
+    op.drop_index('idx_jobs_status_level_published')
+    op.drop_index('idx_jobs_tags')
+    op.drop_index('idx_jobs_work_type')
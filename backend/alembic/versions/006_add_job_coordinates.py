@@ -0,0 +1,98 @@
+"""Add job coordinates and spatial index
+
+Revision ID: 006_add_job_coordinates
+Revises: 005_add_job_filter_indexes
+Create Date: 2024-02-12 00:00:00.000000
+
+"""
+import csv
+import re
+import unicodedata
+from pathlib import Path
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '006_add_job_coordinates'
+down_revision = '005_add_job_filter_indexes'
+branch_labels = None
+depends_on = None
+
+# The lookup below is a frozen copy of app.services.geo as of this revision,
+# so later changes to the application cannot change what this migration does
+GAZETTEER_PATH = Path(__file__).resolve().parents[2] / "app" / "data" / "gazetteer.csv"
+
+_COORDINATES = re.compile(r"^\s*(-?\d+(?:\.\d+)?)\s*,\s*(-?\d+(?:\.\d+)?)\s*$")
+_NOISE_WORDS = {"greater", "area", "metro", "metropolitan", "region", "city", "hybrid", "remote", "or"}
+
+
+def _normalize(text):
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode()
+    text = re.sub(r"[^a-z0-9]+", " ", text.lower())
+    return " ".join(text.split())
+
+
+def _load_places():
+    places = {}
+    with open(GAZETTEER_PATH, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            coordinates = (float(row["latitude"]), float(row["longitude"]))
+            names = [row["name"], *filter(None, (row.get("aliases") or "").split("|"))]
+            for name in names:
+                places.setdefault(_normalize(name), coordinates)
+    return places
+
+
+def _lookup(places, location):
+    """(latitude, longitude) of a free-form location, or None if it is not recognized"""
+    if not location:
+        return None
+
+    match = _COORDINATES.match(location)
+    if match:
+        latitude, longitude = float(match.group(1)), float(match.group(2))
+        if -90 <= latitude <= 90 and -180 <= longitude <= 180:
+            return latitude, longitude
+        return None
+
+    for candidate in [location, *re.split(r"[,;/|()]", location)]:
+        key = _normalize(candidate)
+        if key in places:
+            return places[key]
+
+        key = " ".join(word for word in key.split() if word not in _NOISE_WORDS)
+        if key in places:
+            return places[key]
+
+    return None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS cube")
+    op.execute("CREATE EXTENSION IF NOT EXISTS earthdistance")
+
+    op.add_column('jobs', sa.Column('latitude', sa.Float(), nullable=True))
+    op.add_column('jobs', sa.Column('longitude', sa.Float(), nullable=True))
+
+    # Backfill coordinates from the local gazetteer, one UPDATE per distinct location
+    conn = op.get_bind()
+    places = _load_places()
+    locations = conn.execute(sa.text("SELECT DISTINCT location FROM jobs")).scalars().all()
+    for location in locations:
+        coordinates = _lookup(places, location)
+        if coordinates is None:
+            continue
+        conn.execute(
+            sa.text("UPDATE jobs SET latitude = :lat, longitude = :lon WHERE location = :location"),
+            {"lat": coordinates[0], "lon": coordinates[1], "location": location},
+        )
+
+    # Expression must match JOB_EARTH_POINT in app.models.job
+    op.execute("CREATE INDEX idx_jobs_earth_point ON jobs USING gist (ll_to_earth(latitude, longitude))")
+
+
+def downgrade() -> None:
+    op.drop_index('idx_jobs_earth_point')
+    op.drop_column('jobs', 'longitude')
+    op.drop_column('jobs', 'latitude')
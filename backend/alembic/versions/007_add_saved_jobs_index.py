@@ -0,0 +1,28 @@
+"""Add saved jobs listing index
+
+Revision ID: 007_add_saved_jobs_index
+Revises: 006_add_job_coordinates
+Create Date: 2024-02-14 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '007_add_saved_jobs_index'
+down_revision = '006_add_job_coordinates'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Matches ORDER BY saved_at DESC NULLS LAST, id DESC for one user
+    op.create_index(
+        'idx_saved_jobs_user_saved_id',
+        'saved_jobs',
+        ['user_id', sa.text('saved_at DESC NULLS LAST'), sa.text('id DESC')],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('idx_saved_jobs_user_saved_id')
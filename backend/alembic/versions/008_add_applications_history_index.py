@@ -0,0 +1,29 @@
+"""Add application history index
+
+Revision ID: 008_add_applications_history_index
+Revises: 007_add_saved_jobs_index
+Create Date: 2024-02-15 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '008_add_applications_history_index'
+down_revision = '007_add_saved_jobs_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Matches a user's applications in one status, ordered
+    # applied_at DESC NULLS LAST, id DESC
+    op.create_index(
+        'idx_applications_user_status_applied',
+        'applications',
+        ['user_id', 'status', sa.text('applied_at DESC NULLS LAST'), sa.text('id DESC')],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('idx_applications_user_status_applied')
@@ -0,0 +1,29 @@
+"""Add employer pipeline index on applications
+
+Revision ID: 009_add_applications_pipeline_index
+Revises: 008_add_applications_history_index
+Create Date: 2024-02-16 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '009_add_applications_pipeline_index'
+down_revision = '008_add_applications_history_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Serves per-status counts for a job (index-only) and per-status listings
+    # ordered applied_at DESC NULLS LAST, id DESC
+    op.create_index(
+        'idx_applications_job_status_applied',
+        'applications',
+        ['job_id', 'status', sa.text('applied_at DESC NULLS LAST'), sa.text('id DESC')],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('idx_applications_job_status_applied')
@@ -0,0 +1,59 @@
+"""Add unique (user_id, job_id) constraints to applications and saved jobs
+
+Revision ID: 010_add_user_job_unique_constraints
+Revises: 009_add_applications_pipeline_index
+Create Date: 2024-02-19 00:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '010_add_user_job_unique_constraints'
+down_revision = '009_add_applications_pipeline_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Keep the earliest application when a user applied to the same job twice;
+    # rows without applied_at rank last, and the id breaks ties
+    op.execute(
+        """
+        DELETE FROM applications
+        WHERE id IN (
+            SELECT id
+            FROM (
+                SELECT id, row_number() OVER (
+                    PARTITION BY user_id, job_id
+                    ORDER BY applied_at NULLS LAST, id
+                ) AS position
+                FROM applications
+            ) ranked
+            WHERE position > 1
+        )
+        """
+    )
+    op.create_unique_constraint('uq_applications_user_job', 'applications', ['user_id', 'job_id'])
+
+    # 002 already declares this constraint; databases created from the models
+    # before it was mapped lack it
+    op.execute(
+        """
+        DO $$
+        BEGIN
+            IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'unique_user_job_save') THEN
+                DELETE FROM saved_jobs a
+                USING saved_jobs b
+                WHERE a.user_id = b.user_id
+                  AND a.job_id = b.job_id
+                  AND a.id::text > b.id::text;
+                ALTER TABLE saved_jobs
+                    ADD CONSTRAINT unique_user_job_save UNIQUE (user_id, job_id);
+            END IF;
+        END $$;
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_applications_user_job', 'applications', type_='unique')
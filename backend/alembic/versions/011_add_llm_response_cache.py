@@ -0,0 +1,39 @@
+"""Add LLM response cache table
+
+Revision ID: 011_add_llm_response_cache
+Revises: 010_add_user_job_unique_constraints
+Create Date: 2024-02-20 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '011_add_llm_response_cache'
+down_revision = '010_add_user_job_unique_constraints'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'llm_response_cache',
+        sa.Column('key', sa.String(64), primary_key=True),
+        sa.Column('model', sa.String(100), nullable=False),
+        sa.Column('response', sa.Text, nullable=False),
+        sa.Column('prompt_tokens', sa.Integer, nullable=True),
+        sa.Column('completion_tokens', sa.Integer, nullable=True),
+        sa.Column('hit_count', sa.Integer, nullable=False, server_default='0'),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.text('CURRENT_TIMESTAMP')),
+        sa.Column('last_accessed_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.text('CURRENT_TIMESTAMP')),
+        sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False)
+    )
+    # Expiry sweeps and least-recently-used eviction
+    op.create_index('idx_llm_response_cache_expires', 'llm_response_cache', ['expires_at'])
+    op.create_index('idx_llm_response_cache_accessed', 'llm_response_cache', ['last_accessed_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('idx_llm_response_cache_accessed')
+    op.drop_index('idx_llm_response_cache_expires')
+    op.drop_table('llm_response_cache')
@@ -0,0 +1,37 @@
+"""Add precomputed job match scores table
+
+Revision ID: 012_add_job_match_scores
+Revises: 011_add_llm_response_cache
+Create Date: 2024-02-21 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '012_add_job_match_scores'
+down_revision = '011_add_llm_response_cache'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'job_match_scores',
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('job_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('jobs.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('rank', sa.Integer, nullable=False),
+        sa.Column('score', sa.Float, nullable=False),
+        sa.Column('components', sa.JSON, nullable=False),
+        sa.Column('reasons', postgresql.ARRAY(sa.String), nullable=False, server_default='{}'),
+        sa.Column('concerns', postgresql.ARRAY(sa.String), nullable=False, server_default='{}'),
+        sa.Column('computed_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.text('CURRENT_TIMESTAMP'))
+    )
+    # Reads fetch one user's matches in rank order
+    op.create_index('idx_job_match_scores_user_rank', 'job_match_scores', ['user_id', 'rank'])
+
+
+def downgrade() -> None:
+    op.drop_index('idx_job_match_scores_user_rank')
+    op.drop_table('job_match_scores')
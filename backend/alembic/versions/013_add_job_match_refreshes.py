@@ -0,0 +1,35 @@
+"""Add job match refresh markers
+
+Revision ID: 013_add_job_match_refreshes
+Revises: 012_add_job_match_scores
+Create Date: 2024-02-22 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '013_add_job_match_refreshes'
+down_revision = '012_add_job_match_scores'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'job_match_refreshes',
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('computed_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.text('CURRENT_TIMESTAMP'))
+    )
+    # Users whose matches were already computed keep them as the baseline
+    op.execute(
+        """
+        INSERT INTO job_match_refreshes (user_id, computed_at)
+        SELECT user_id, min(computed_at) FROM job_match_scores GROUP BY user_id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('job_match_refreshes')
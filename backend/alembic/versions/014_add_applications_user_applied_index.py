@@ -0,0 +1,29 @@
+"""Add unfiltered application history index
+
+Revision ID: 014_add_applications_user_applied_index
+Revises: 013_add_job_match_refreshes
+Create Date: 2024-02-23 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '014_add_applications_user_applied_index'
+down_revision = '013_add_job_match_refreshes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Matches a user's applications in any status, ordered
+    # applied_at DESC NULLS LAST, id DESC NULLS LAST exactly as the ORM emits it
+    op.create_index(
+        'idx_applications_user_applied',
+        'applications',
+        ['user_id', sa.text('applied_at DESC NULLS LAST'), sa.text('id DESC NULLS LAST')],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('idx_applications_user_applied')
@@ -4,7 +4,7 @@ API v1 router configuration
 
 from fastapi import APIRouter
 
-from app.api.v1.endpoints import auth, users, jobs, companies, applications, ai, notifications, blog, enhanced_news
+from app.api.v1.endpoints import auth, users, jobs, companies, applications, ai, notifications, blog, enhanced_news, autocomplete
 
 api_router = APIRouter()
 
@@ -13,6 +13,7 @@ api_router.include_router(auth.router, prefix="/auth", tags=["authentication"])
 api_router.include_router(users.router, prefix="/users", tags=["users"])
 api_router.include_router(jobs.router, prefix="/jobs", tags=["jobs"])
 api_router.include_router(companies.router, prefix="/companies", tags=["companies"])
+api_router.include_router(autocomplete.router, prefix="/autocomplete", tags=["autocomplete"])
 api_router.include_router(applications.router, prefix="/applications", tags=["applications"])
 api_router.include_router(ai.router, prefix="/ai", tags=["ai"])
 api_router.include_router(notifications.router, prefix="/notifications", tags=["notifications"])
@@ -2,11 +2,12 @@
 AI-powered endpoints for job matching and recommendations
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List, Optional
+from sqlalchemy import exists, select
+from typing import AsyncIterator, List, Optional
 import structlog
-from openai import AsyncOpenAI
 import json
 from datetime import datetime
 
@@ -14,146 +15,209 @@ from app.core.database import get_async_db
 from app.core.security import get_current_user_id
 from app.core.config import settings
 from app.core.exceptions import AIError, NotFoundError
-from app.schemas.job import JobMatchRequest, JobMatchResponse, JobMatch
+from app.schemas.job import (
+    JobMatchRequest, JobMatchResponse, JobMatch, JobWithCompany, MatchMode, SimilarJob, SimilarJobsResponse,
+    StoredJobMatchesResponse
+)
 from app.schemas.user import UserWithProfile
-from app.models.user import User as UserModel, UserProfile, UserSkill, Skill
-from app.models.job import Job, Company, Application
+from app.models.user import User as UserModel
+from app.models.job import Job, Company, Application, JobStatus
+from app.models.ai import JobMatchRefresh, JobMatchScore
 from app.models.notification import JobAlert
+from app.services.loaders import Loaders, get_loaders
+from app.services.job_ranking import CandidateProfile, job_ranker, load_candidate_profile
+from app.services.job_index import job_vector_index
+from app.services.llm import llm_service
+from app.services.llm_gateway import Priority
+from app.services.match_scores import match_score_worker
+from app.services.prompt_builder import compact_json, count_message_tokens, fit_json_array, truncate
 
 logger = structlog.get_logger()
 router = APIRouter()
 
-# Initialize OpenAI client
-if settings.OPENAI_API_KEY:
-    openai_client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+# Tokens reserved for the LLM's answer in match prompts
+MATCH_COMPLETION_TOKENS = 2000
 
 
 @router.post("/match-jobs", response_model=JobMatchResponse)
 async def match_jobs(
     match_request: JobMatchRequest,
     current_user_id: str = Depends(get_current_user_id),
-    db: AsyncSession = Depends(get_async_db)
+    db: AsyncSession = Depends(get_async_db),
+    loaders: Loaders = Depends(get_loaders)
 ):
-    """AI-powered job matching based on user profile and preferences"""
+    """
+    Job matching based on user profile and preferences.
+    
+    Every active job is scored locally on skill overlap, location/remote fit,
+    salary and experience level. In `llm` mode only the best candidates are
+    sent to the LLM for final scoring; `fast` mode returns the local ranking
+    without calling the LLM.
+    """
     try:
-        if not settings.OPENAI_API_KEY:
+        use_llm = match_request.mode == MatchMode.LLM
+        if use_llm and not llm_service.configured:
             raise AIError("AI service is not configured")
         
-        # Get user with profile and skills
-        user_result = await db.execute(
-            UserModel.__table__.select().where(UserModel.id == current_user_id)
-        )
-        user_row = user_result.fetchone()
+        start_time = datetime.utcnow()
         
-        if not user_row:
+        user_result = await db.execute(select(UserModel.id).where(UserModel.id == current_user_id))
+        if user_result.first() is None:
             raise NotFoundError("User not found")
         
-        user = UserModel(**dict(user_row))
-        
-        # Get user profile
-        profile_result = await db.execute(
-            UserProfile.__table__.select().where(UserProfile.user_id == current_user_id)
-        )
-        profile_row = profile_result.fetchone()
+        profile = await load_candidate_profile(db, current_user_id)
         
-        # Get user skills
-        skills_result = await db.execute(
-            UserSkill.__table__.select().where(UserSkill.user_id == current_user_id)
+        # Get applied job IDs
+        applied_job_ids = []
+        if not match_request.include_applied:
+            applied_result = await db.execute(
+                select(Application.job_id).where(Application.user_id == current_user_id)
+            )
+            applied_job_ids = applied_result.scalars().all()
+        
+        # Pre-rank every active job locally
+        features = await job_ranker.features(db)
+        candidates = match_request.candidates or settings.MATCH_LLM_CANDIDATES
+        ranked = job_ranker.rank(
+            features,
+            profile,
+            limit=max(candidates, match_request.limit) if use_llm else match_request.limit,
+            exclude=applied_job_ids
         )
-        skills_rows = skills_result.fetchall()
-        
-        # Get available jobs
-        jobs_query = Job.__table__.select().where(
-            Job.status == "ACTIVE",
-            Job.application_deadline > datetime.utcnow()
-        ).limit(100)
         
-        jobs_result = await db.execute(jobs_query)
-        jobs_rows = jobs_result.fetchall()
-        
-        if not jobs_rows:
+        if not ranked:
             return JobMatchResponse(
                 matches=[],
-                total_jobs_analyzed=0,
+                total_jobs_analyzed=features.size,
                 total_matches=0,
-                processing_time=0.0
+                processing_time=(datetime.utcnow() - start_time).total_seconds()
             )
         
-        # Get applied job IDs
-        applied_result = await db.execute(
-            Application.__table__.select().where(Application.user_id == current_user_id)
-        )
-        applied_rows = applied_result.fetchall()
-        applied_job_ids = [row.job_id for row in applied_rows]
-        
-        # Filter out applied jobs if requested
-        available_jobs = []
-        for job_row in jobs_rows:
-            job = Job(**dict(job_row))
-            if not match_request.include_applied and job.id in applied_job_ids:
-                continue
-            available_jobs.append(job)
+        ranked_by_id = {str(candidate.job_id): candidate for candidate in ranked}
         
-        if not available_jobs:
-            return JobMatchResponse(
-                matches=[],
-                total_jobs_analyzed=len(jobs_rows),
-                total_matches=0,
-                processing_time=0.0
-            )
+        ai_matches = None
+        if use_llm:
+            shortlist = ranked[:candidates]
+            jobs = await loaders.job.load_many(candidate.job_id for candidate in shortlist)
+            ai_matches = await _llm_match(profile, [job for job in jobs if job is not None], match_request)
         
-        # Prepare user data for AI
-        user_data = {
-            "profile": {
-                "bio": profile_row.bio if profile_row else None,
-                "location": profile_row.location if profile_row else None,
-                "current_role": profile_row.current_role if profile_row else None,
-                "experience_years": profile_row.experience_years if profile_row else 0,
-                "education": profile_row.education if profile_row else None,
-                "desired_salary_min": profile_row.desired_salary_min if profile_row else None,
-                "desired_salary_max": profile_row.desired_salary_max if profile_row else None,
-                "preferred_work_types": profile_row.preferred_work_types if profile_row else [],
-                "preferred_locations": profile_row.preferred_locations if profile_row else [],
-                "remote_work": profile_row.remote_work if profile_row else False,
-            },
-            "skills": [
-                {
-                    "name": skill.name,
-                    "level": skill.level,
-                    "years_experience": skill.years_experience
-                }
-                for skill in skills_rows
+        if ai_matches is not None:
+            scored = [
+                (ranked_by_id[ai_match["job_id"]], ai_match)
+                for ai_match in ai_matches
+                if ai_match.get("job_id") in ranked_by_id
             ]
-        }
+            scored.sort(key=lambda item: item[1].get("match_score", 0.0), reverse=True)
+        else:
+            # Fast mode, or the LLM answer was unusable: keep the local ranking
+            scored = [
+                (
+                    candidate,
+                    {
+                        "match_score": candidate.score,
+                        "match_reasons": candidate.reasons,
+                        "strengths": [],
+                        "concerns": candidate.concerns
+                    }
+                )
+                for candidate in ranked
+                if candidate.score >= match_request.min_match_score
+            ]
+        scored = scored[:match_request.limit]
         
-        # Prepare job data for AI
-        job_data = []
-        for job in available_jobs[:50]:  # Limit to 50 jobs for AI processing
-            job_data.append({
-                "id": str(job.id),
-                "title": job.title,
-                "description": job.description,
-                "requirements": job.requirements,
-                "responsibilities": job.responsibilities,
-                "location": job.location,
-                "work_type": job.work_type,
-                "experience_level": job.experience_level,
-                "salary_min": job.salary_min,
-                "salary_max": job.salary_max,
-                "is_remote": job.is_remote,
-                "tags": job.tags,
-                "company_id": str(job.company_id)
-            })
-        
-        # Create AI prompt
-        prompt = f"""
+        # Get jobs and companies for all matches in one batch each
+        jobs = await loaders.job.load_many(candidate.job_id for candidate, _ in scored)
+        found = [(candidate, match_data, job) for (candidate, match_data), job in zip(scored, jobs) if job is not None]
+        companies = await loaders.company.load_many(job.company_id for _, _, job in found)
+        
+        # Create job matches
+        matches = []
+        for (candidate, match_data, job), company in zip(found, companies):
+            if company is None:
+                continue
+            
+            matches.append(JobMatch(
+                job=JobWithCompany.from_models(job, company),
+                match_score=min(max(float(match_data.get("match_score", 0.0)), 0.0), 1.0),
+                match_reasons=match_data.get("match_reasons", []),
+                strengths=match_data.get("strengths", []),
+                concerns=match_data.get("concerns", []),
+                pre_rank_score=candidate.score,
+                score_components=candidate.components
+            ))
+        
+        processing_time = (datetime.utcnow() - start_time).total_seconds()
+        
+        logger.info(
+            "Job matching completed",
+            user_id=current_user_id,
+            mode=match_request.mode.value,
+            total_jobs=features.size,
+            matches_found=len(matches),
+            processing_time=processing_time
+        )
+        
+        return JobMatchResponse(
+            matches=matches,
+            total_jobs_analyzed=features.size,
+            total_matches=len(matches),
+            processing_time=processing_time
+        )
+        
+    except AIError:
+        raise
+    except NotFoundError:
+        raise
+    except Exception as e:
+        logger.error("Job matching failed", error=str(e), user_id=current_user_id)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Job matching failed"
+        )
+
+
+async def _llm_match(
+    profile: CandidateProfile,
+    jobs: List[Job],
+    match_request: JobMatchRequest
+) -> Optional[List[dict]]:
+    """Ask the LLM to score pre-ranked jobs; None if its answer cannot be parsed"""
+    user_data = {
+        "skills": profile.skills,
+        "location": profile.location,
+        "preferred_locations": profile.preferred_locations,
+        "remote_work": profile.remote_work,
+        "experience_years": profile.experience_years,
+        "desired_salary_min": profile.desired_salary_min,
+        "desired_salary_max": profile.desired_salary_max,
+        "preferred_work_types": profile.preferred_work_types,
+    }
+    job_data = [
+        {
+            "id": str(job.id),
+            "title": job.title,
+            "description": truncate(job.description, settings.PROMPT_FIELD_TOKENS),
+            "requirements": truncate("; ".join(job.requirements or []), settings.PROMPT_FIELD_TOKENS),
+            "location": job.location,
+            "work_type": job.work_type,
+            "experience_level": job.experience_level,
+            "salary_min": job.salary_min,
+            "salary_max": job.salary_max,
+            "is_remote": job.is_remote,
+            "tags": job.tags
+        }
+        for job in jobs
+    ]
+    
+    # Create AI prompt
+    prompt = """
         You are an expert AI job matcher. Analyze the following user profile and available jobs to provide intelligent job recommendations.
         
         User Profile:
-        {json.dumps(user_data, indent=2)}
+        {user}
         
         Available Jobs:
-        {json.dumps(job_data, indent=2)}
+        {jobs}
         
         For each job, provide:
         1. Match score (0.0 to 1.0)
@@ -161,7 +225,7 @@ async def match_jobs(
         3. Strengths (user's advantages for this role)
         4. Concerns (potential challenges or gaps)
         
-        Only include jobs with match scores >= {match_request.min_match_score}.
+        Only include jobs with match scores >= {min_match_score}.
         Return results in JSON format with this structure:
         {{
             "matches": [
@@ -175,100 +239,221 @@ async def match_jobs(
             ]
         }}
         """
+    messages = [
+        {"role": "system", "content": "You are an expert AI job matcher. Provide accurate and helpful job matching results in JSON format."},
+        {"role": "user", "content": prompt.format(
+            user=compact_json(user_data), jobs="", min_match_score=match_request.min_match_score
+        )}
+    ]
+    
+    # Jobs arrive best first; send as many as the context window leaves room for
+    jobs_budget = settings.LLM_CONTEXT_TOKENS - MATCH_COMPLETION_TOKENS - count_message_tokens(messages)
+    jobs_json, jobs_sent = fit_json_array(job_data, jobs_budget)
+    if jobs_sent < len(job_data):
+        logger.info("Match prompt trimmed to token budget", jobs_sent=jobs_sent, candidates=len(job_data))
+    messages[1]["content"] = prompt.format(
+        user=compact_json(user_data), jobs=jobs_json, min_match_score=match_request.min_match_score
+    )
+    
+    # Call OpenAI API
+    completion = await llm_service.complete(
+        messages,
+        temperature=0.3,
+        max_tokens=MATCH_COMPLETION_TOKENS,
+        endpoint="match_jobs",
+        # Scores many jobs in one go; interactive generation goes first
+        priority=Priority.BATCH
+    )
+    
+    # Parse AI response
+    ai_response = completion.content
+    try:
+        return json.loads(ai_response).get("matches", [])
+    except (json.JSONDecodeError, TypeError, AttributeError):
+        logger.error("Failed to parse AI response", response=ai_response)
+        return None
+
+
+@router.get("/matches", response_model=StoredJobMatchesResponse)
+async def get_job_matches(
+    limit: int = Query(20, ge=1, le=50),
+    refresh: bool = False,
+    current_user_id: str = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Precomputed job matches, best first.
+    
+    Matches are kept up to date in the background as the profile changes and
+    jobs are published. `refresh=true` recomputes them before reading; they
+    are also computed on first use, but not again when that found nothing.
+    Jobs that closed or were applied to since are left out.
+    """
+    try:
+        if refresh:
+            await match_score_worker.refresh_user(db, current_user_id)
+        
+        query = (
+            select(JobMatchScore, Job, Company)
+            .join(Job, Job.id == JobMatchScore.job_id)
+            .join(Company, Company.id == Job.company_id)
+            .where(
+                JobMatchScore.user_id == current_user_id,
+                Job.status == JobStatus.ACTIVE,
+                ~exists().where(
+                    Application.user_id == JobMatchScore.user_id,
+                    Application.job_id == JobMatchScore.job_id
+                )
+            )
+            .order_by(JobMatchScore.rank)
+            .limit(limit)
+        )
+        rows = (await db.execute(query)).all()
+        
+        # Present once matches were computed, even if none were found
+        marker = select(JobMatchRefresh.computed_at).where(JobMatchRefresh.user_id == current_user_id)
+        computed_at = None
+        if not rows:
+            computed_at = await db.scalar(marker)
+            if computed_at is None:
+                await match_score_worker.refresh_user(db, current_user_id)
+                rows = (await db.execute(query)).all()
+                computed_at = await db.scalar(marker)
+        
+        matches = [
+            JobMatch(
+                job=JobWithCompany.from_models(job, company),
+                match_score=match.score,
+                match_reasons=match.reasons,
+                strengths=[],
+                concerns=match.concerns,
+                pre_rank_score=match.score,
+                score_components=match.components
+            )
+            for match, job, company in rows
+        ]
         
-        # Call OpenAI API
-        start_time = datetime.utcnow()
-        
-        response = await openai_client.chat.completions.create(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": "You are an expert AI job matcher. Provide accurate and helpful job matching results in JSON format."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.3,
-            max_tokens=2000
+        return StoredJobMatchesResponse(
+            matches=matches,
+            total_matches=len(matches),
+            computed_at=min((match.computed_at for match, _, _ in rows), default=computed_at)
         )
         
-        processing_time = (datetime.utcnow() - start_time).total_seconds()
+    except Exception as e:
+        logger.error("Get job matches failed", error=str(e), user_id=current_user_id)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to get job matches"
+        )
+
+
+@router.get("/similar-jobs", response_model=SimilarJobsResponse)
+async def similar_jobs(
+    limit: int = Query(10, ge=1, le=50),
+    include_applied: bool = False,
+    current_user_id: str = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_db),
+    loaders: Loaders = Depends(get_loaders)
+):
+    """
+    Jobs most similar to the user's skills, current role and bio.
+    
+    Served from the local job vector index; no LLM call is made.
+    """
+    try:
+        profile = await load_candidate_profile(db, current_user_id)
         
-        # Parse AI response
-        ai_response = response.choices[0].message.content
-        try:
-            ai_data = json.loads(ai_response)
-            ai_matches = ai_data.get("matches", [])
-        except json.JSONDecodeError:
-            logger.error("Failed to parse AI response", response=ai_response)
-            ai_matches = []
+        applied_job_ids = []
+        if not include_applied:
+            applied_result = await db.execute(
+                select(Application.job_id).where(Application.user_id == current_user_id)
+            )
+            applied_job_ids = applied_result.scalars().all()
         
-        # Create job matches
-        matches = []
-        for ai_match in ai_matches[:match_request.limit]:
-            job_id = ai_match.get("job_id")
-            job = next((j for j in available_jobs if str(j.id) == job_id), None)
-            
-            if job:
-                # Get company information
-                company_result = await db.execute(
-                    Company.__table__.select().where(Company.id == job.company_id)
-                )
-                company_row = company_result.fetchone()
-                company = Company(**dict(company_row)) if company_row else None
-                
-                match = JobMatch(
-                    job=job,
-                    match_score=ai_match.get("match_score", 0.0),
-                    match_reasons=ai_match.get("match_reasons", []),
-                    strengths=ai_match.get("strengths", []),
-                    concerns=ai_match.get("concerns", [])
-                )
-                matches.append(match)
+        similar = job_vector_index.similar(profile, limit, exclude=applied_job_ids)
         
-        logger.info(
-            "Job matching completed",
-            user_id=current_user_id,
-            total_jobs=len(available_jobs),
-            matches_found=len(matches),
-            processing_time=processing_time
-        )
+        jobs = await loaders.job.load_many(match.job_id for match in similar)
+        found = [(match, job) for match, job in zip(similar, jobs) if job is not None]
+        companies = await loaders.company.load_many(job.company_id for _, job in found)
         
-        return JobMatchResponse(
-            matches=matches,
-            total_jobs_analyzed=len(available_jobs),
-            total_matches=len(matches),
-            processing_time=processing_time
+        return SimilarJobsResponse(
+            jobs=[
+                SimilarJob(job=JobWithCompany.from_models(job, company), similarity=match.similarity)
+                for (match, job), company in zip(found, companies)
+                if company is not None
+            ],
+            total_jobs_indexed=len(job_vector_index.index)
         )
         
-    except AIError:
-        raise
-    except NotFoundError:
-        raise
     except Exception as e:
-        logger.error("Job matching failed", error=str(e), user_id=current_user_id)
+        logger.error("Similar jobs failed", error=str(e), user_id=current_user_id)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Job matching failed"
+            detail="Failed to find similar jobs"
         )
 
 
+def _sse(event: str, data: dict) -> str:
+    """One server-sent event; data is JSON so newlines in the text stay inside it"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _event_stream_response(
+    request: Request,
+    chunks: AsyncIterator[str],
+    failure_detail: str,
+    **log_fields
+) -> StreamingResponse:
+    """
+    Forward completion chunks as `token` events, then `done` (or `error`).
+    
+    The chunk iterator is closed as soon as the client disconnects, which
+    cancels the upstream completion.
+    """
+    async def events() -> AsyncIterator[str]:
+        try:
+            async for chunk in chunks:
+                if await request.is_disconnected():
+                    logger.info("AI stream client disconnected", **log_fields)
+                    return
+                yield _sse("token", {"content": chunk})
+            yield _sse("done", {})
+        except Exception as e:
+            logger.error(failure_detail, error=str(e), **log_fields)
+            yield _sse("error", {"detail": failure_detail})
+        finally:
+            await chunks.aclose()
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.post("/generate-job-description")
 async def generate_job_description(
     job_title: str,
     company_name: str,
     requirements: List[str],
+    bypass_cache: bool = False,
     current_user_id: str = Depends(get_current_user_id),
     db: AsyncSession = Depends(get_async_db)
 ):
     """Generate AI-powered job description"""
     try:
-        if not settings.OPENAI_API_KEY:
+        if not llm_service.configured:
             raise AIError("AI service is not configured")
         
+        # Keep user-supplied text within the prompt budget
+        key_requirements = truncate(', '.join(requirements), settings.PROMPT_INPUT_TOKENS)
+        
         prompt = f"""
         Generate a professional job description for the following position:
         
         Job Title: {job_title}
         Company: {company_name}
-        Key Requirements: {', '.join(requirements)}
+        Key Requirements: {key_requirements}
         
         Please provide:
         1. A compelling job summary
@@ -280,24 +465,27 @@ async def generate_job_description(
         Format the response as a structured job description suitable for a job board.
         """
         
-        response = await openai_client.chat.completions.create(
-            model="gpt-4",
-            messages=[
+        completion = await llm_service.complete(
+            [
                 {"role": "system", "content": "You are an expert HR professional and job description writer."},
                 {"role": "user", "content": prompt}
             ],
             temperature=0.7,
-            max_tokens=1000
+            max_tokens=1000,
+            use_cache=not bypass_cache,
+            endpoint="generate_job_description",
+            priority=Priority.INTERACTIVE
         )
         
-        generated_description = response.choices[0].message.content
+        generated_description = completion.content
         
         logger.info("Job description generated", user_id=current_user_id, job_title=job_title)
         
         return {
             "job_description": generated_description,
             "job_title": job_title,
-            "company_name": company_name
+            "company_name": company_name,
+            "cached": completion.cached
         }
         
     except AIError:
@@ -314,22 +502,34 @@ async def generate_job_description(
 async def optimize_resume(
     resume_text: str,
     job_description: str,
+    request: Request,
+    bypass_cache: bool = False,
+    stream: bool = False,
     current_user_id: str = Depends(get_current_user_id),
     db: AsyncSession = Depends(get_async_db)
 ):
-    """Optimize resume for a specific job"""
+    """
+    Optimize resume for a specific job.
+    
+    With `stream=true` the suggestions are sent as server-sent events while
+    they are generated.
+    """
     try:
-        if not settings.OPENAI_API_KEY:
+        if not llm_service.configured:
             raise AIError("AI service is not configured")
         
+        # Keep user-supplied text within the prompt budget
+        resume = truncate(resume_text, settings.PROMPT_INPUT_TOKENS)
+        description = truncate(job_description, settings.PROMPT_INPUT_TOKENS)
+        
         prompt = f"""
         Analyze the following resume and job description to provide optimization suggestions:
         
         Resume:
-        {resume_text}
+        {resume}
         
         Job Description:
-        {job_description}
+        {description}
         
         Please provide:
         1. Key strengths that match the job requirements
@@ -341,24 +541,38 @@ async def optimize_resume(
         Provide actionable, specific recommendations.
         """
         
-        response = await openai_client.chat.completions.create(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": "You are an expert resume writer and career coach."},
-                {"role": "user", "content": prompt}
-            ],
+        messages = [
+            {"role": "system", "content": "You are an expert resume writer and career coach."},
+            {"role": "user", "content": prompt}
+        ]
+        
+        if stream:
+            chunks = llm_service.stream(
+                messages, temperature=0.5, max_tokens=1500, use_cache=not bypass_cache, endpoint="optimize_resume",
+                priority=Priority.INTERACTIVE
+            )
+            return _event_stream_response(
+                request, chunks, "Resume optimization failed", user_id=current_user_id
+            )
+        
+        completion = await llm_service.complete(
+            messages,
             temperature=0.5,
-            max_tokens=1500
+            max_tokens=1500,
+            use_cache=not bypass_cache,
+            endpoint="optimize_resume",
+            priority=Priority.INTERACTIVE
         )
         
-        optimization_suggestions = response.choices[0].message.content
+        optimization_suggestions = completion.content
         
         logger.info("Resume optimization completed", user_id=current_user_id)
         
         return {
             "optimization_suggestions": optimization_suggestions,
             "resume_text": resume_text,
-            "job_description": job_description
+            "job_description": job_description,
+            "cached": completion.cached
         }
         
     except AIError:
@@ -377,23 +591,35 @@ async def generate_cover_letter(
     company_name: str,
     user_profile: str,
     job_description: str,
+    request: Request,
+    bypass_cache: bool = False,
+    stream: bool = False,
     current_user_id: str = Depends(get_current_user_id),
     db: AsyncSession = Depends(get_async_db)
 ):
-    """Generate AI-powered cover letter"""
+    """
+    Generate AI-powered cover letter.
+    
+    With `stream=true` the letter is sent as server-sent events while it is
+    generated.
+    """
     try:
-        if not settings.OPENAI_API_KEY:
+        if not llm_service.configured:
             raise AIError("AI service is not configured")
         
+        # Keep user-supplied text within the prompt budget
+        description = truncate(job_description, settings.PROMPT_INPUT_TOKENS)
+        profile = truncate(user_profile, settings.PROMPT_INPUT_TOKENS)
+        
         prompt = f"""
         Generate a professional cover letter for the following application:
         
         Job Title: {job_title}
         Company: {company_name}
-        Job Description: {job_description}
+        Job Description: {description}
         
         Applicant Profile:
-        {user_profile}
+        {profile}
         
         Please create a compelling cover letter that:
         1. Demonstrates enthusiasm for the role
@@ -405,24 +631,38 @@ async def generate_cover_letter(
         Make it personalized and specific to this role and company.
         """
         
-        response = await openai_client.chat.completions.create(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": "You are an expert cover letter writer and career coach."},
-                {"role": "user", "content": prompt}
-            ],
+        messages = [
+            {"role": "system", "content": "You are an expert cover letter writer and career coach."},
+            {"role": "user", "content": prompt}
+        ]
+        
+        if stream:
+            chunks = llm_service.stream(
+                messages, temperature=0.7, max_tokens=800, use_cache=not bypass_cache, endpoint="generate_cover_letter",
+                priority=Priority.INTERACTIVE
+            )
+            return _event_stream_response(
+                request, chunks, "Cover letter generation failed", user_id=current_user_id, job_title=job_title
+            )
+        
+        completion = await llm_service.complete(
+            messages,
             temperature=0.7,
-            max_tokens=800
+            max_tokens=800,
+            use_cache=not bypass_cache,
+            endpoint="generate_cover_letter",
+            priority=Priority.INTERACTIVE
         )
         
-        cover_letter = response.choices[0].message.content
+        cover_letter = completion.content
         
         logger.info("Cover letter generated", user_id=current_user_id, job_title=job_title)
         
         return {
             "cover_letter": cover_letter,
             "job_title": job_title,
-            "company_name": company_name
+            "company_name": company_name,
+            "cached": completion.cached
         }
         
     except AIError:
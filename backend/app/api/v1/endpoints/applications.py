@@ -2,49 +2,99 @@
 Application management endpoints
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from sqlalchemy import select, func, update, insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError
+from typing import Optional
+from datetime import datetime
+from uuid import UUID, uuid4
 import structlog
 
-from app.core.database import get_async_db
+from app.core.database import get_async_db, is_foreign_key_violation
 from app.core.security import get_current_user_id, require_employer
-from app.schemas.job import Application, ApplicationCreate, ApplicationUpdate, ApplicationWithJob
-from app.models.job import Application as ApplicationModel, Job as JobModel
-from app.core.exceptions import NotFoundError, ConflictError
+from app.schemas.job import (
+    Application, ApplicationCreate, ApplicationUpdate, ApplicationWithJob, ApplicationListResponse,
+    Applicant, PipelineApplication, ApplicantPipelineResponse,
+    BulkStatusUpdate, BulkStatusUpdateResponse
+)
+from app.models.job import (
+    Application as ApplicationModel, Job as JobModel, CompanyUser as CompanyUserModel, ApplicationStatus
+)
+from app.models.user import User as UserModel
+from app.models.notification import Notification as NotificationModel, NotificationType
+from app.core.exceptions import NotFoundError, ConflictError, ValidationError, AuthorizationError
+from app.core.pagination import decode_cursor, encode_cursor, keyset_after
+from app.services.counters import job_application_counter, application_count_delta
 
 logger = structlog.get_logger()
 router = APIRouter()
 
 
-@router.get("/", response_model=List[ApplicationWithJob])
+# Newest first; applied_at is nullable in the model, id breaks ties
+APPLICATION_SORT_KEY = [ApplicationModel.applied_at, ApplicationModel.id]
+APPLICATION_SORT_NULLABLE = [True, False]
+
+
+def _application_cursor_values(cursor: str) -> list:
+    applied_at, application_id = decode_cursor(cursor, len(APPLICATION_SORT_KEY))
+    try:
+        return [
+            datetime.fromisoformat(applied_at) if applied_at else None,
+            UUID(application_id),
+        ]
+    except (TypeError, ValueError):
+        raise ValidationError("Invalid cursor")
+
+
+@router.get("/", response_model=ApplicationListResponse)
 async def get_user_applications(
+    status_filter: Optional[ApplicationStatus] = Query(None, alias="status"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous response's next_cursor"),
+    page_size: int = Query(20, ge=1, le=100),
     current_user_id: str = Depends(get_current_user_id),
     db: AsyncSession = Depends(get_async_db)
 ):
-    """Get user's applications"""
+    """
+    Get user's applications, newest first, one page at a time.
+    
+    Each page is a single query joining applications to their jobs.
+    """
     try:
-        result = await db.execute(
-            ApplicationModel.__table__.select().where(ApplicationModel.user_id == current_user_id)
+        applications_query = (
+            select(ApplicationModel, JobModel)
+            .join(JobModel, JobModel.id == ApplicationModel.job_id)
+            .where(ApplicationModel.user_id == current_user_id)
+            .order_by(*[column.desc().nulls_last() for column in APPLICATION_SORT_KEY])
         )
-        applications_rows = result.fetchall()
-        
-        applications = []
-        for app_row in applications_rows:
-            application = ApplicationModel(**dict(app_row))
-            
-            # Get job
-            job_result = await db.execute(
-                JobModel.__table__.select().where(JobModel.id == application.job_id)
+        if status_filter is not None:
+            applications_query = applications_query.where(ApplicationModel.status == status_filter)
+        if cursor:
+            applications_query = applications_query.where(
+                keyset_after(APPLICATION_SORT_KEY, _application_cursor_values(cursor), APPLICATION_SORT_NULLABLE)
             )
-            job_row = job_result.fetchone()
-            job = JobModel(**dict(job_row)) if job_row else None
-            
-            if job:
-                applications.append(ApplicationWithJob(application=application, job=job))
         
-        return applications
+        # Fetch one extra row to know whether another page follows
+        result = await db.execute(applications_query.limit(page_size + 1))
+        rows = result.all()
+        has_next = len(rows) > page_size
+        rows = rows[:page_size]
+        
+        next_page_cursor = None
+        if has_next:
+            last_application = rows[-1][0]
+            next_page_cursor = encode_cursor([last_application.applied_at, last_application.id])
+        
+        return ApplicationListResponse(
+            applications=[ApplicationWithJob.from_models(application, job) for application, job in rows],
+            page_size=page_size,
+            has_next=has_next,
+            next_cursor=next_page_cursor
+        )
         
+    except ValidationError:
+        raise
     except Exception as e:
         logger.error("Get user applications failed", error=str(e), user_id=current_user_id)
         raise HTTPException(
@@ -53,39 +103,252 @@ async def get_user_applications(
         )
 
 
-@router.post("/", response_model=Application, status_code=status.HTTP_201_CREATED)
-async def create_application(
-    application_data: ApplicationCreate,
-    current_user_id: str = Depends(get_current_user_id),
+async def _get_employer_job(db: AsyncSession, job_id: str, user_id: str) -> JobModel:
+    """Load a job, checking that the user is an active member of its company"""
+    try:
+        job_uuid = UUID(job_id)
+    except ValueError:
+        raise NotFoundError("Job not found")
+    
+    result = await db.execute(select(JobModel).where(JobModel.id == job_uuid))
+    job = result.scalar_one_or_none()
+    if not job:
+        raise NotFoundError("Job not found")
+    
+    membership = await db.execute(
+        select(CompanyUserModel.id).where(
+            CompanyUserModel.company_id == job.company_id,
+            CompanyUserModel.user_id == user_id,
+            CompanyUserModel.is_active == True
+        )
+    )
+    if membership.first() is None:
+        raise AuthorizationError("Not a member of this job's company")
+    
+    return job
+
+
+@router.get("/job/{job_id}", response_model=ApplicantPipelineResponse)
+async def get_job_pipeline(
+    job_id: str,
+    status_filter: Optional[ApplicationStatus] = Query(None, alias="status"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous response's next_cursor"),
+    page_size: int = Query(50, ge=1, le=200),
+    include_counts: bool = Query(True, alias="counts", description="Include per-status application counts"),
+    current_user_id: str = Depends(require_employer),
     db: AsyncSession = Depends(get_async_db)
 ):
-    """Apply for a job"""
+    """
+    Applicant pipeline for one job, for members of the job's company.
+    
+    Lists applications newest first with keyset pagination, typically one
+    status (kanban column) at a time, and returns the number of applications
+    in every status from a single grouped query.
+    """
     try:
-        # Check if job exists
-        job_result = await db.execute(
-            JobModel.__table__.select().where(JobModel.id == application_data.job_id)
+        job = await _get_employer_job(db, job_id, current_user_id)
+        
+        applications_query = (
+            select(
+                ApplicationModel,
+                UserModel.id.label("applicant_id"),
+                UserModel.full_name,
+                UserModel.email,
+                UserModel.avatar_url
+            )
+            .join(UserModel, UserModel.id == ApplicationModel.user_id)
+            .where(ApplicationModel.job_id == job.id)
+            .order_by(*[column.desc().nulls_last() for column in APPLICATION_SORT_KEY])
         )
-        if not job_result.fetchone():
-            raise NotFoundError("Job not found")
-        
-        # Check if already applied
-        existing_result = await db.execute(
-            ApplicationModel.__table__.select().where(
-                ApplicationModel.user_id == current_user_id,
-                ApplicationModel.job_id == application_data.job_id
+        if status_filter is not None:
+            applications_query = applications_query.where(ApplicationModel.status == status_filter)
+        if cursor:
+            applications_query = applications_query.where(
+                keyset_after(APPLICATION_SORT_KEY, _application_cursor_values(cursor), APPLICATION_SORT_NULLABLE)
+            )
+        
+        # Fetch one extra row to know whether another page follows
+        result = await db.execute(applications_query.limit(page_size + 1))
+        rows = result.all()
+        has_next = len(rows) > page_size
+        rows = rows[:page_size]
+        
+        applications = [
+            PipelineApplication(
+                **Application.model_validate(row[0]).model_dump(),
+                applicant=Applicant(
+                    id=row.applicant_id,
+                    full_name=row.full_name,
+                    email=row.email,
+                    avatar_url=row.avatar_url
+                )
             )
+            for row in rows
+        ]
+        
+        status_counts = total = None
+        if include_counts:
+            # One index-only pass over (job_id, status)
+            counts_result = await db.execute(
+                select(ApplicationModel.status, func.count())
+                .where(ApplicationModel.job_id == job.id)
+                .group_by(ApplicationModel.status)
+            )
+            status_counts = {application_status.value: 0 for application_status in ApplicationStatus}
+            for application_status, count in counts_result.all():
+                status_counts[application_status.value] = count
+            total = sum(status_counts.values())
+        
+        next_page_cursor = None
+        if has_next:
+            last_application = rows[-1][0]
+            next_page_cursor = encode_cursor([last_application.applied_at, last_application.id])
+        
+        return ApplicantPipelineResponse(
+            job_id=job.id,
+            applications=applications,
+            page_size=page_size,
+            has_next=has_next,
+            next_cursor=next_page_cursor,
+            status_counts=status_counts,
+            total=total
         )
-        if existing_result.fetchone():
-            raise ConflictError("Already applied for this job")
         
+    except (NotFoundError, AuthorizationError, ValidationError):
+        raise
+    except Exception as e:
+        logger.error("Get job pipeline failed", error=str(e), job_id=job_id, user_id=current_user_id)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to get job pipeline"
+        )
+
+
+@router.post("/job/{job_id}/status", response_model=BulkStatusUpdateResponse)
+async def bulk_update_status(
+    job_id: str,
+    bulk_data: BulkStatusUpdate,
+    current_user_id: str = Depends(require_employer),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Move many of a job's applications to one status.
+    
+    All rows change in a single UPDATE ... RETURNING, and each moved
+    applicant gets a notification from one multi-row INSERT, in the same
+    transaction. Withdrawn applications and those already in the target
+    status are left alone.
+    """
+    try:
+        job = await _get_employer_job(db, job_id, current_user_id)
+        requested_ids = list(dict.fromkeys(bulk_data.application_ids))
+        
+        result = await db.execute(
+            update(ApplicationModel)
+            .where(
+                ApplicationModel.job_id == job.id,
+                ApplicationModel.id.in_(requested_ids),
+                ApplicationModel.status != bulk_data.status,
+                ApplicationModel.status != ApplicationStatus.WITHDRAWN
+            )
+            .values(
+                status=bulk_data.status,
+                status_updated_at=func.now(),
+                status_updated_by=current_user_id
+            )
+            .returning(ApplicationModel.id, ApplicationModel.user_id)
+            .execution_options(synchronize_session=False)
+        )
+        moved = result.all()
+        
+        if moved:
+            status_label = bulk_data.status.value.replace("_", " ").lower()
+            message = bulk_data.message or f"Your application for {job.title} is now {status_label}."
+            await db.execute(
+                insert(NotificationModel).values([
+                    {
+                        "id": uuid4(),
+                        "user_id": applicant_id,
+                        "type": NotificationType.APPLICATION_STATUS_UPDATE,
+                        "title": f"Application update: {job.title}",
+                        "message": message,
+                        "related_job_id": job.id,
+                        "related_application_id": application_id,
+                        "related_company_id": job.company_id,
+                    }
+                    for application_id, applicant_id in moved
+                ])
+            )
+        
+        await db.commit()
+        
+        # Withdrawn applications were excluded above, so every moved row was counted
+        if bulk_data.status == ApplicationStatus.WITHDRAWN and moved:
+            job_application_counter.increment(job.id, -len(moved))
+        
+        updated_ids = [application_id for application_id, _ in moved]
+        updated_set = set(updated_ids)
+        logger.info(
+            "Application statuses updated",
+            job_id=job_id,
+            status=bulk_data.status.value,
+            updated=len(updated_ids),
+            user_id=current_user_id
+        )
+        return BulkStatusUpdateResponse(
+            status=bulk_data.status,
+            updated=updated_ids,
+            skipped=[application_id for application_id in requested_ids if application_id not in updated_set],
+            notifications_created=len(moved)
+        )
+        
+    except (NotFoundError, AuthorizationError):
+        raise
+    except Exception as e:
+        logger.error("Bulk status update failed", error=str(e), job_id=job_id, user_id=current_user_id)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to update application statuses"
+        )
+
+
+@router.post("/", response_model=Application, status_code=status.HTTP_201_CREATED)
+async def create_application(
+    application_data: ApplicationCreate,
+    current_user_id: str = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Apply for a job.
+    
+    A single INSERT ... ON CONFLICT DO NOTHING RETURNING: the unique
+    (user_id, job_id) constraint rejects repeat applications and the
+    foreign key rejects unknown jobs, without separate lookups.
+    """
+    try:
         # Create application
         application_dict = application_data.dict()
         application_dict["user_id"] = current_user_id
         
-        new_application = ApplicationModel(**application_dict)
-        db.add(new_application)
+        try:
+            result = await db.execute(
+                pg_insert(ApplicationModel)
+                .values(**application_dict)
+                .on_conflict_do_nothing(constraint="uq_applications_user_job")
+                .returning(ApplicationModel)
+            )
+        except IntegrityError as e:
+            await db.rollback()
+            if is_foreign_key_violation(e):
+                raise NotFoundError("Job not found")
+            raise
+        
+        new_application = result.scalar_one_or_none()
+        if new_application is None:
+            await db.rollback()
+            raise ConflictError("Already applied for this job")
         await db.commit()
-        await db.refresh(new_application)
+        job_application_counter.increment(new_application.job_id)
         
         logger.info("Application created", application_id=str(new_application.id), user_id=current_user_id)
         return new_application
@@ -111,17 +374,17 @@ async def update_application(
     try:
         # Get existing application
         result = await db.execute(
-            ApplicationModel.__table__.select().where(
+            select(ApplicationModel).where(
                 ApplicationModel.id == application_id,
                 ApplicationModel.user_id == current_user_id
             )
         )
-        application_row = result.fetchone()
+        application = result.scalar_one_or_none()
         
-        if not application_row:
+        if not application:
             raise NotFoundError("Application not found")
         
-        application = ApplicationModel(**dict(application_row))
+        previous_status = application.status
         
         # Update application with new data
         update_data = application_data.dict(exclude_unset=True)
@@ -131,6 +394,11 @@ async def update_application(
         await db.commit()
         await db.refresh(application)
         
+        # Withdrawing (or un-withdrawing) changes the job's application count
+        delta = application_count_delta(previous_status, application.status)
+        if delta:
+            job_application_counter.increment(application.job_id, delta)
+        
         logger.info("Application updated", application_id=application_id, user_id=current_user_id)
         return application
         
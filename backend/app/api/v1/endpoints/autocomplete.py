@@ -0,0 +1,38 @@
+"""
+Autocomplete endpoints
+"""
+
+from fastapi import APIRouter, HTTPException, status, Query
+from typing import List, Optional
+import structlog
+
+from app.schemas.job import AutocompleteResponse, AutocompleteSuggestion
+from app.services.autocomplete import SuggestionKind, autocomplete_service
+
+logger = structlog.get_logger()
+router = APIRouter()
+
+
+@router.get("/", response_model=AutocompleteResponse)
+async def autocomplete(
+    q: str = Query(..., min_length=1, max_length=100, description="Prefix typed so far"),
+    limit: int = Query(10, ge=1, le=25),
+    kinds: Optional[List[SuggestionKind]] = Query(None, description="Restrict to titles, skills or companies"),
+):
+    """Suggest job titles, skills and companies for a search prefix"""
+    try:
+        suggestions = autocomplete_service.suggest(q, limit=limit, kinds=kinds)
+        return AutocompleteResponse(
+            query=q,
+            suggestions=[
+                AutocompleteSuggestion(text=s.text, kind=s.kind.value, weight=round(s.weight, 3))
+                for s in suggestions
+            ],
+        )
+
+    except Exception as e:
+        logger.error("Autocomplete failed", error=str(e), query=q)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to get suggestions"
+        )
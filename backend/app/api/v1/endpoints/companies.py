@@ -4,14 +4,17 @@ Company management endpoints
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
 from typing import List
 import structlog
 
 from app.core.database import get_async_db
 from app.core.security import get_current_user_id, require_employer
 from app.schemas.job import Company, CompanyCreate, CompanyUpdate
-from app.models.job import Company as CompanyModel
+from app.models.job import Company as CompanyModel, Job as JobModel
 from app.core.exceptions import NotFoundError
+from app.services.autocomplete import autocomplete_service
+from app.services.cache import cache_service, search_cache, job_detail_key
 
 logger = structlog.get_logger()
 router = APIRouter()
@@ -83,6 +86,7 @@ async def create_company(
         db.add(new_company)
         await db.commit()
         await db.refresh(new_company)
+        autocomplete_service.company_saved(new_company.name)
         
         logger.info("Company created", company_id=str(new_company.id), user_id=current_user_id)
         return new_company
@@ -106,14 +110,14 @@ async def update_company(
     try:
         # Get existing company
         result = await db.execute(
-            CompanyModel.__table__.select().where(CompanyModel.id == company_id)
+            select(CompanyModel).where(CompanyModel.id == company_id)
         )
-        company_row = result.fetchone()
+        company = result.scalar_one_or_none()
         
-        if not company_row:
+        if not company:
             raise NotFoundError("Company not found")
         
-        company = CompanyModel(**dict(company_row))
+        previous_name = company.name
         
         # Update company with new data
         update_data = company_data.dict(exclude_unset=True)
@@ -122,6 +126,15 @@ async def update_company(
         
         await db.commit()
         await db.refresh(company)
+        # Cached search pages and job details embed the company
+        await search_cache.invalidate_company(company.id)
+        job_ids = await db.execute(select(JobModel.id).where(JobModel.company_id == company.id))
+        for job_id in job_ids.scalars():
+            await cache_service.delete(job_detail_key(job_id))
+        if company.is_active:
+            autocomplete_service.company_saved(company.name, previous_name)
+        else:
+            autocomplete_service.company_deactivated(previous_name)
         
         logger.info("Company updated", company_id=company_id, user_id=current_user_id)
         return company
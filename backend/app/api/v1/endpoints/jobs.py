@@ -2,21 +2,42 @@
 Job management endpoints
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Header, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List, Optional
+from sqlalchemy import select, case
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError
+from typing import List, Optional, Tuple
+from uuid import UUID
 import structlog
+import hashlib
 from datetime import datetime
 
-from app.core.database import get_async_db
+from app.core.database import get_async_db, is_foreign_key_violation
 from app.core.security import get_current_user_id, require_employer
 from app.schemas.job import (
     Job, JobCreate, JobUpdate, JobWithCompany,
     JobSearchFilters, JobSearchResponse,
-    SavedJob, SavedJobCreate, SavedJobUpdate, SavedJobWithJob
+    SavedJob, SavedJobCreate, SavedJobUpdate, SavedJobWithJob,
+    SavedJobSort, SavedJobView, SavedJobCard, SavedJobListResponse, JobCard
 )
-from app.models.job import Job as JobModel, SavedJob as SavedJobModel, Company as CompanyModel
-from app.core.exceptions import NotFoundError, AuthorizationError
+from app.models.job import Job as JobModel, SavedJob as SavedJobModel, Company as CompanyModel, JobStatus
+from app.core.exceptions import NotFoundError, AuthorizationError, ValidationError
+from app.services.job_search import (
+    build_job_conditions, job_ordering, search_rank, cursor_condition, next_cursor,
+    filter_signature, job_snapshot, job_could_match
+)
+from app.services.job_counts import CountMode, job_count_service
+from app.services.job_facets import get_facets
+from app.services.loaders import Loaders, get_loaders
+from app.core.pagination import decode_cursor, encode_cursor, keyset_after
+from app.services.geo import gazetteer
+from app.services.autocomplete import autocomplete_service
+from app.services.job_index import job_vector_index
+from app.services.match_scores import match_score_worker
+from app.services.cache import cache_service, search_cache, job_detail_key
+from app.core.config import settings
+from app.services.counters import job_view_counter
 
 logger = structlog.get_logger()
 router = APIRouter()
@@ -28,79 +49,137 @@ async def search_jobs(
     location: Optional[str] = Query(None),
     work_type: Optional[List[str]] = Query(None),
     experience_level: Optional[str] = Query(None),
-    salary_min: Optional[int] = Query(None),
-    salary_max: Optional[int] = Query(None),
+    salary_min: Optional[int] = Query(None, ge=0),
+    salary_max: Optional[int] = Query(None, ge=0),
     company_id: Optional[str] = Query(None),
     is_remote: Optional[bool] = Query(None),
     is_featured: Optional[bool] = Query(None),
-    page: int = Query(1, ge=1),
+    tags: Optional[List[str]] = Query(None),
+    near: Optional[str] = Query(None, description="City name or \"lat,lon\" to search around"),
+    radius_km: float = Query(50, gt=0, le=1000, description="Search radius around `near`"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous response's next_cursor"),
+    page: Optional[int] = Query(None, ge=1, description="Page number; opts into offset pagination with exact totals"),
     page_size: int = Query(20, ge=1, le=100),
-    db: AsyncSession = Depends(get_async_db)
+    count: Optional[CountMode] = Query(None, description="How to compute total: exact, estimated or cached"),
+    include_facets: bool = Query(False, alias="facets", description="Include facet counts for the filtered set"),
+    db: AsyncSession = Depends(get_async_db),
+    loaders: Loaders = Depends(get_loaders)
 ):
-    """Search and filter jobs"""
+    """
+    Search and filter jobs, ranked by relevance when a search query is given.
+    
+    Results are keyset-paginated by default: pass the returned `next_cursor`
+    back as `cursor` to fetch the following page. Passing `page` switches to
+    offset pagination and includes totals (exact unless `count` says otherwise).
+    `total_exact` tells whether the returned total is exact or estimated.
+    With `facets=true` the response also carries per-facet counts.
+    
+    Result pages are cached per filter signature and dropped when a job that
+    could belong to the filtered set is created, updated or deleted.
+    """
     try:
-        # Build query
-        jobs_query = JobModel.__table__.select().where(JobModel.status == "ACTIVE")
-        
-        # Apply filters
-        if query:
-            jobs_query = jobs_query.where(
-                JobModel.title.ilike(f"%{query}%") |
-                JobModel.description.ilike(f"%{query}%")
-            )
-        
-        if location:
-            jobs_query = jobs_query.where(JobModel.location.ilike(f"%{location}%"))
-        
-        if is_remote is not None:
-            jobs_query = jobs_query.where(JobModel.is_remote == is_remote)
-        
-        if is_featured is not None:
-            jobs_query = jobs_query.where(JobModel.is_featured == is_featured)
-        
-        if company_id:
-            jobs_query = jobs_query.where(JobModel.company_id == company_id)
-        
-        # Get total count
-        count_result = await db.execute(
-            f"SELECT COUNT(*) FROM ({jobs_query}) as count_query"
+        filters = dict(
+            query=query,
+            location=location,
+            company_id=company_id,
+            is_remote=is_remote,
+            is_featured=is_featured,
+            work_type=work_type,
+            experience_level=experience_level,
+            salary_min=salary_min,
+            salary_max=salary_max,
+            tags=tags,
+            near=near,
+            radius_km=radius_km if near else None,
         )
-        total = count_result.scalar()
+        conditions = build_job_conditions(**filters)
         
-        # Apply pagination
-        offset = (page - 1) * page_size
-        jobs_query = jobs_query.offset(offset).limit(page_size)
+        if page is not None and count is None:
+            count = CountMode.EXACT
         
-        # Execute query
-        jobs_result = await db.execute(jobs_query)
-        jobs_rows = jobs_result.fetchall()
+        signature = filter_signature(**filters)
+        cache_key = search_cache.page_key(
+            signature,
+            cursor=cursor,
+            page=page,
+            page_size=page_size,
+            count=count.value if count else None,
+            facets=include_facets
+        )
+        cached = await search_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        generation = search_cache.generation
         
-        # Get companies for jobs
-        jobs = []
-        for job_row in jobs_rows:
-            job = JobModel(**dict(job_row))
-            
-            # Get company
-            company_result = await db.execute(
-                CompanyModel.__table__.select().where(CompanyModel.id == job.company_id)
+        jobs_query = select(JobModel).where(*conditions).order_by(*job_ordering(query))
+        if query:
+            jobs_query = jobs_query.add_columns(search_rank(query).label("rank"))
+        
+        total = total_exact = None
+        if count is not None:
+            total, total_exact = await job_count_service.count(db, conditions, signature, count)
+        
+        facets = await get_facets(db, conditions, signature, filters, generation) if include_facets else None
+        
+        if page is not None:
+            jobs_query = jobs_query.offset((page - 1) * page_size)
+        elif cursor:
+            jobs_query = jobs_query.where(cursor_condition(cursor, query))
+        
+        # Fetch one extra row to know whether another page follows
+        jobs_result = await db.execute(jobs_query.limit(page_size + 1))
+        result_rows = jobs_result.all()
+        has_next = len(result_rows) > page_size
+        result_rows = result_rows[:page_size]
+        jobs_rows = [row[0] for row in result_rows]
+        
+        # Get companies for all jobs in one batch
+        companies = await loaders.company.load_many(job.company_id for job in jobs_rows)
+        jobs = [
+            JobWithCompany.from_models(job, company)
+            for job, company in zip(jobs_rows, companies)
+            if company is not None
+        ]
+        
+        if page is not None:
+            total_pages = (total + page_size - 1) // page_size
+            response = JobSearchResponse(
+                jobs=jobs,
+                page_size=page_size,
+                has_next=has_next,
+                has_prev=page > 1,
+                total=total,
+                total_exact=total_exact,
+                page=page,
+                total_pages=total_pages,
+                facets=facets
             )
-            company_row = company_result.fetchone()
-            company = CompanyModel(**dict(company_row)) if company_row else None
+        else:
+            next_page_cursor = None
+            if has_next:
+                last_row = result_rows[-1]
+                next_page_cursor = next_cursor(last_row[0], last_row.rank if query else None)
             
-            jobs.append(JobWithCompany(job=job, company=company))
-        
-        total_pages = (total + page_size - 1) // page_size
+            response = JobSearchResponse(
+                jobs=jobs,
+                page_size=page_size,
+                has_next=has_next,
+                has_prev=cursor is not None,
+                next_cursor=next_page_cursor,
+                total=total,
+                total_exact=total_exact,
+                facets=facets
+            )
         
-        return JobSearchResponse(
-            jobs=jobs,
-            total=total,
-            page=page,
-            page_size=page_size,
-            total_pages=total_pages,
-            has_next=page < total_pages,
-            has_prev=page > 1
+        await search_cache.set(
+            signature, filters, cache_key, response,
+            company_ids={str(job.company_id) for job in jobs_rows},
+            generation=generation
         )
+        return response
         
+    except ValidationError:
+        raise
     except Exception as e:
         logger.error("Job search failed", error=str(e))
         raise HTTPException(
@@ -109,36 +188,86 @@ async def search_jobs(
         )
 
 
+def _job_etag(job: JobModel, company: CompanyModel) -> str:
+    """
+    Weak validator built from the job's and company's last modification.
+    View counts are left out on purpose, so a viewed job keeps its ETag.
+    """
+    versions = [
+        str(job.id),
+        str(job.updated_at or job.created_at),
+        str(company.updated_at or company.created_at),
+    ]
+    return f'W/"{hashlib.sha1("|".join(versions).encode()).hexdigest()}"'
+
+
+def _etag_matches(etag: str, if_none_match: Optional[str]) -> bool:
+    """Weak comparison against an If-None-Match header"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+
 @router.get("/{job_id}", response_model=JobWithCompany)
 async def get_job(
     job_id: str,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
     db: AsyncSession = Depends(get_async_db)
 ):
-    """Get job by ID"""
+    """
+    Get job by ID.
+    
+    Responses carry an ETag; sending it back in If-None-Match returns
+    304 Not Modified while the job and its company are unchanged. Job and
+    company payloads are served from a short-lived cache when possible.
+    """
     try:
-        # Get job
-        job_result = await db.execute(
-            JobModel.__table__.select().where(JobModel.id == job_id)
-        )
-        job_row = job_result.fetchone()
-        
-        if not job_row:
+        try:
+            job_uuid = UUID(job_id)
+        except ValueError:
             raise NotFoundError("Job not found")
         
-        job = JobModel(**dict(job_row))
+        cache_key = job_detail_key(job_uuid)
+        cached = await cache_service.get(cache_key)
         
-        # Get company
-        company_result = await db.execute(
-            CompanyModel.__table__.select().where(CompanyModel.id == job.company_id)
-        )
-        company_row = company_result.fetchone()
-        company = CompanyModel(**dict(company_row)) if company_row else None
+        if cached is None:
+            # Get job
+            job_result = await db.execute(
+                select(JobModel).where(JobModel.id == job_uuid)
+            )
+            job = job_result.scalar_one_or_none()
+            
+            if not job:
+                raise NotFoundError("Job not found")
+            
+            # Get company
+            company_result = await db.execute(
+                select(CompanyModel).where(CompanyModel.id == job.company_id)
+            )
+            company = company_result.scalar_one_or_none()
+            if not company:
+                raise NotFoundError("Job not found")
+            
+            cached = {"etag": _job_etag(job, company), "body": JobWithCompany.from_models(job, company)}
+            await cache_service.set(cache_key, cached, ttl=settings.JOB_DETAIL_CACHE_TTL)
         
-        # Increment view count
-        job.view_count += 1
-        await db.commit()
+        # Count the view in memory, whether or not a body is sent; the buffer
+        # writes it in a later batch
+        job_view_counter.increment(job_uuid)
         
-        return JobWithCompany(job=job, company=company)
+        headers = {"ETag": cached["etag"], "Cache-Control": "no-cache"}
+        if _etag_matches(cached["etag"], if_none_match):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        
+        response.headers.update(headers)
+        body = cached["body"]
+        return body.model_copy(
+            update={"view_count": body.view_count + job_view_counter.pending(job_uuid)}
+        )
         
     except NotFoundError:
         raise
@@ -150,6 +279,21 @@ async def get_job(
         )
 
 
+def _coordinates(location: Optional[str]) -> dict:
+    """Latitude/longitude columns for a job location, cleared when unresolvable"""
+    place = gazetteer.lookup(location)
+    if place is None:
+        return {"latitude": None, "longitude": None}
+    return {"latitude": place.latitude, "longitude": place.longitude}
+
+
+async def _invalidate_search(*snapshots: dict) -> None:
+    """Drop cached search pages that any of the given job states could appear in"""
+    await search_cache.invalidate(
+        lambda filters: any(job_could_match(snapshot, filters) for snapshot in snapshots)
+    )
+
+
 @router.post("/", response_model=Job, status_code=status.HTTP_201_CREATED)
 async def create_job(
     job_data: JobCreate,
@@ -161,11 +305,16 @@ async def create_job(
         # Create job
         job_dict = job_data.dict()
         job_dict["slug"] = f"{job_data.title.lower().replace(' ', '-')}-{int(datetime.utcnow().timestamp())}"
+        job_dict.update(_coordinates(job_data.location))
         
         new_job = JobModel(**job_dict)
         db.add(new_job)
         await db.commit()
         await db.refresh(new_job)
+        await _invalidate_search(job_snapshot(new_job))
+        job_vector_index.job_saved(new_job)
+        if new_job.status == JobStatus.ACTIVE:
+            match_score_worker.job_published()
         
         logger.info("Job created", job_id=str(new_job.id), user_id=current_user_id)
         return new_job
@@ -189,22 +338,39 @@ async def update_job(
     try:
         # Get existing job
         job_result = await db.execute(
-            JobModel.__table__.select().where(JobModel.id == job_id)
+            select(JobModel).where(JobModel.id == job_id)
         )
-        job_row = job_result.fetchone()
+        job = job_result.scalar_one_or_none()
         
-        if not job_row:
+        if not job:
             raise NotFoundError("Job not found")
         
-        job = JobModel(**dict(job_row))
+        was_listed = job.status == JobStatus.ACTIVE
+        previous_title = job.title
+        before = job_snapshot(job)
         
         # Update job with new data
         update_data = job_data.dict(exclude_unset=True)
+        if "location" in update_data:
+            update_data.update(_coordinates(update_data["location"]))
         for field, value in update_data.items():
             setattr(job, field, value)
         
         await db.commit()
         await db.refresh(job)
+        await _invalidate_search(before, job_snapshot(job))
+        await cache_service.delete(job_detail_key(job.id))
+        job_vector_index.job_saved(job)
+        
+        # Keep title suggestions in step with what search can return
+        is_listed = job.status == JobStatus.ACTIVE
+        if was_listed != is_listed or (is_listed and previous_title != job.title):
+            if was_listed:
+                autocomplete_service.job_unlisted(previous_title, job.view_count)
+            if is_listed:
+                autocomplete_service.job_listed(job.title, job.view_count)
+        if is_listed and not was_listed:
+            match_score_worker.job_published()
         
         logger.info("Job updated", job_id=job_id, user_id=current_user_id)
         return job
@@ -241,6 +407,12 @@ async def delete_job(
             JobModel.__table__.delete().where(JobModel.id == job_id)
         )
         await db.commit()
+        await _invalidate_search(job_snapshot(job_row))
+        await cache_service.delete(job_detail_key(job_row.id))
+        job_vector_index.job_removed(job_row.id)
+        
+        if job_row.status == JobStatus.ACTIVE:
+            autocomplete_service.job_unlisted(job_row.title, job_row.view_count)
         
         logger.info("Job deleted", job_id=job_id, user_id=current_user_id)
         return {"message": "Job deleted successfully"}
@@ -255,34 +427,116 @@ async def delete_job(
         )
 
 
-@router.get("/saved/", response_model=List[SavedJobWithJob])
+# Columns of a job card, read straight from the joined jobs and companies rows
+JOB_CARD_COLUMNS = [
+    JobModel.id, JobModel.title, JobModel.slug, JobModel.company_id,
+    CompanyModel.name.label("company_name"), CompanyModel.logo_url.label("company_logo_url"),
+    JobModel.location, JobModel.is_remote, JobModel.work_type, JobModel.experience_level,
+    JobModel.salary_min, JobModel.salary_max, JobModel.salary_currency, JobModel.salary_period,
+    JobModel.status, JobModel.published_at,
+]
+
+SAVED_JOB_PRIORITY_RANK = case(
+    {"HIGH": 3, "MEDIUM": 2, "LOW": 1}, value=SavedJobModel.priority, else_=0
+)
+
+
+def _saved_jobs_sort_key(sort: SavedJobSort) -> Tuple[list, list]:
+    """Columns of the saved jobs sort key, and whether each may be NULL"""
+    columns = [SavedJobModel.saved_at, SavedJobModel.id]
+    nullable = [True, False]
+    if sort == SavedJobSort.PRIORITY:
+        columns.insert(0, SAVED_JOB_PRIORITY_RANK)
+        nullable.insert(0, False)
+    return columns, nullable
+
+
+def _saved_jobs_cursor_values(cursor: str, sort: SavedJobSort) -> list:
+    columns, _ = _saved_jobs_sort_key(sort)
+    values = decode_cursor(cursor, len(columns))
+    try:
+        *rank, saved_at, saved_job_id = values
+        return [int(r) for r in rank] + [
+            datetime.fromisoformat(saved_at) if saved_at else None,
+            UUID(saved_job_id),
+        ]
+    except (TypeError, ValueError):
+        raise ValidationError("Invalid cursor")
+
+
+@router.get("/saved/", response_model=SavedJobListResponse)
 async def get_saved_jobs(
+    sort: SavedJobSort = Query(SavedJobSort.SAVED_AT),
+    view: SavedJobView = Query(SavedJobView.FULL, description="`card` returns only the fields of a job card"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous response's next_cursor"),
+    page_size: int = Query(20, ge=1, le=100),
     current_user_id: str = Depends(get_current_user_id),
     db: AsyncSession = Depends(get_async_db)
 ):
-    """Get user's saved jobs"""
+    """
+    Get user's saved jobs, one page at a time.
+    
+    Saved rows and their jobs come from a single joined query per page.
+    """
     try:
-        result = await db.execute(
-            SavedJobModel.__table__.select().where(SavedJobModel.user_id == current_user_id)
-        )
-        saved_jobs_rows = result.fetchall()
+        columns, nullable = _saved_jobs_sort_key(sort)
         
-        saved_jobs = []
-        for saved_job_row in saved_jobs_rows:
-            saved_job = SavedJobModel(**dict(saved_job_row))
-            
-            # Get job
-            job_result = await db.execute(
-                JobModel.__table__.select().where(JobModel.id == saved_job.job_id)
+        if view == SavedJobView.CARD:
+            saved_query = (
+                select(SavedJobModel, *JOB_CARD_COLUMNS)
+                .join(JobModel, JobModel.id == SavedJobModel.job_id)
+                .join(CompanyModel, CompanyModel.id == JobModel.company_id)
             )
-            job_row = job_result.fetchone()
-            job = JobModel(**dict(job_row)) if job_row else None
-            
-            if job:
-                saved_jobs.append(SavedJobWithJob(saved_job=saved_job, job=job))
+        else:
+            saved_query = select(SavedJobModel, JobModel).join(JobModel, JobModel.id == SavedJobModel.job_id)
+        
+        if sort == SavedJobSort.PRIORITY:
+            saved_query = saved_query.add_columns(SAVED_JOB_PRIORITY_RANK.label("priority_rank"))
         
-        return saved_jobs
+        saved_query = (
+            saved_query
+            .where(SavedJobModel.user_id == current_user_id)
+            .order_by(*[column.desc().nulls_last() for column in columns])
+        )
+        if cursor:
+            saved_query = saved_query.where(
+                keyset_after(columns, _saved_jobs_cursor_values(cursor, sort), nullable)
+            )
         
+        # Fetch one extra row to know whether another page follows
+        result = await db.execute(saved_query.limit(page_size + 1))
+        rows = result.all()
+        has_next = len(rows) > page_size
+        rows = rows[:page_size]
+        
+        if view == SavedJobView.CARD:
+            saved_jobs = [
+                SavedJobCard(
+                    **SavedJob.model_validate(row[0]).model_dump(),
+                    job=JobCard(**{column.key: row._mapping[column.key] for column in JOB_CARD_COLUMNS})
+                )
+                for row in rows
+            ]
+        else:
+            saved_jobs = [SavedJobWithJob.from_models(row[0], row[1]) for row in rows]
+        
+        next_page_cursor = None
+        if has_next:
+            last = rows[-1]
+            values = [last[0].saved_at, last[0].id]
+            if sort == SavedJobSort.PRIORITY:
+                values.insert(0, last.priority_rank)
+            next_page_cursor = encode_cursor(values)
+        
+        return SavedJobListResponse(
+            saved_jobs=saved_jobs,
+            page_size=page_size,
+            has_next=has_next,
+            next_cursor=next_page_cursor
+        )
+        
+    except ValidationError:
+        raise
     except Exception as e:
         logger.error("Get saved jobs failed", error=str(e), user_id=current_user_id)
         raise HTTPException(
@@ -297,36 +551,33 @@ async def save_job(
     current_user_id: str = Depends(get_current_user_id),
     db: AsyncSession = Depends(get_async_db)
 ):
-    """Save a job"""
+    """Save a job in a single INSERT ... ON CONFLICT DO NOTHING RETURNING"""
     try:
-        # Check if job exists
-        job_result = await db.execute(
-            JobModel.__table__.select().where(JobModel.id == saved_job_data.job_id)
-        )
-        if not job_result.fetchone():
-            raise NotFoundError("Job not found")
+        # Save job
+        saved_job_dict = saved_job_data.dict()
+        saved_job_dict["user_id"] = current_user_id
         
-        # Check if already saved
-        existing_result = await db.execute(
-            SavedJobModel.__table__.select().where(
-                SavedJobModel.user_id == current_user_id,
-                SavedJobModel.job_id == saved_job_data.job_id
+        try:
+            result = await db.execute(
+                pg_insert(SavedJobModel)
+                .values(**saved_job_dict)
+                .on_conflict_do_nothing(constraint="unique_user_job_save")
+                .returning(SavedJobModel)
             )
-        )
-        if existing_result.fetchone():
+        except IntegrityError as e:
+            await db.rollback()
+            if is_foreign_key_violation(e):
+                raise NotFoundError("Job not found")
+            raise
+        
+        new_saved_job = result.scalar_one_or_none()
+        if new_saved_job is None:
+            await db.rollback()
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Job already saved"
             )
-        
-        # Save job
-        saved_job_dict = saved_job_data.dict()
-        saved_job_dict["user_id"] = current_user_id
-        
-        new_saved_job = SavedJobModel(**saved_job_dict)
-        db.add(new_saved_job)
         await db.commit()
-        await db.refresh(new_saved_job)
         
         logger.info("Job saved", job_id=str(saved_job_data.job_id), user_id=current_user_id)
         return new_saved_job
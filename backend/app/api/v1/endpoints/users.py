@@ -17,6 +17,7 @@ from app.schemas.user import (
 )
 from app.models.user import User as UserModel, UserProfile as UserProfileModel, UserSkill as UserSkillModel, UserPreferences as UserPreferencesModel
 from app.core.exceptions import NotFoundError
+from app.services.match_scores import match_score_worker
 
 logger = structlog.get_logger()
 router = APIRouter()
@@ -76,6 +77,7 @@ async def create_user_profile(
         db.add(new_profile)
         await db.commit()
         await db.refresh(new_profile)
+        match_score_worker.user_changed(current_user_id)
         
         logger.info("User profile created", user_id=current_user_id)
         return new_profile
@@ -116,6 +118,7 @@ async def update_user_profile(
         
         await db.commit()
         await db.refresh(profile)
+        match_score_worker.user_changed(current_user_id)
         
         logger.info("User profile updated", user_id=current_user_id)
         return profile
@@ -182,6 +185,7 @@ async def add_user_skill(
         db.add(new_skill)
         await db.commit()
         await db.refresh(new_skill)
+        match_score_worker.user_changed(current_user_id)
         
         logger.info("User skill added", user_id=current_user_id, skill_id=str(skill_data.skill_id))
         return new_skill
@@ -226,6 +230,7 @@ async def update_user_skill(
         
         await db.commit()
         await db.refresh(skill)
+        match_score_worker.user_changed(current_user_id)
         
         logger.info("User skill updated", user_id=current_user_id, skill_id=skill_id)
         return skill
@@ -268,6 +273,7 @@ async def remove_user_skill(
             )
         )
         await db.commit()
+        match_score_worker.user_changed(current_user_id)
         
         logger.info("User skill removed", user_id=current_user_id, skill_id=skill_id)
         return {"message": "Skill removed successfully"}
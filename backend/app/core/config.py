@@ -3,7 +3,7 @@ Configuration settings for JobFlix FastAPI backend
 """
 
 from pydantic_settings import BaseSettings
-from typing import List, Optional
+from typing import Dict, List, Optional
 import os
 from pathlib import Path
 
@@ -32,6 +32,23 @@ class Settings(BaseSettings):
     
     # OpenAI
     OPENAI_API_KEY: Optional[str] = None
+    LLM_CACHE_TTL: int = 7 * 24 * 3600  # seconds a cached LLM response is served
+    LLM_CACHE_MAX_ENTRIES: int = 50000  # cached LLM responses kept; least recently used evicted first
+    LLM_CACHE_EVICT_INTERVAL: int = 600  # seconds between LLM cache eviction sweeps
+    LLM_CONTEXT_TOKENS: int = 8192  # context window of the completion model
+    PROMPT_FIELD_TOKENS: int = 120  # long job fields are truncated to this many tokens in match prompts
+    PROMPT_INPUT_TOKENS: int = 2500  # user-supplied text is truncated to this many tokens per field
+    LLM_PROVIDER: str = "openai"  # "openai", or "fake" for offline load tests
+    LLM_MAX_CONCURRENCY: int = 8  # concurrent upstream calls per model
+    LLM_MODEL_CONCURRENCY: Dict[str, int] = {}  # per-model overrides of LLM_MAX_CONCURRENCY
+    LLM_REQUEST_TIMEOUT: float = 60.0  # seconds an LLM request may take, queueing and retries included
+    LLM_MAX_RETRIES: int = 3  # retries of rate-limited, timed out or 5xx upstream calls
+    LLM_RETRY_BASE_DELAY: float = 0.5  # seconds; doubled per retry, with full jitter
+    LLM_RETRY_MAX_DELAY: float = 8.0  # cap on a single retry delay, in seconds
+    LLM_CIRCUIT_FAILURE_THRESHOLD: int = 5  # consecutive failures that open a model's circuit
+    LLM_CIRCUIT_RESET_TIMEOUT: float = 30.0  # seconds an open circuit waits before a probe request
+    LLM_FAKE_LATENCY: float = 0.2  # mean seconds per fake provider response
+    LLM_FAKE_ERROR_RATE: float = 0.0  # share of fake provider calls that fail transiently
     
     # News APIs
     NEWS_API_KEY: Optional[str] = None
@@ -57,6 +74,36 @@ class Settings(BaseSettings):
     DEFAULT_PAGE_SIZE: int = 20
     MAX_PAGE_SIZE: int = 100
     
+    # Job search
+    SEARCH_COUNT_CACHE_TTL: int = 3600  # seconds a cached total is kept
+    SEARCH_COUNT_REFRESH_INTERVAL: int = 60  # seconds before a cached total is recounted
+    SEARCH_COUNT_CACHE_MAX_SIGNATURES: int = 5000  # distinct filter sets with a cached total
+    SEARCH_COUNT_MAX_REFRESHES: int = 4  # background recounts running at once
+    SEARCH_FACETS_CACHE_TTL: int = 300  # seconds facet counts are cached per filter signature
+    SEARCH_RESULTS_CACHE_TTL: int = 300  # seconds a search result page is cached
+    SEARCH_RESULTS_CACHE_MAX_SIGNATURES: int = 5000  # distinct filter sets with cached pages
+    JOB_DETAIL_CACHE_TTL: int = 300  # seconds a job detail payload is cached
+    
+    # Write-behind counters
+    VIEW_COUNT_FLUSH_INTERVAL: int = 10  # seconds between batched view_count writes
+    APPLICATION_COUNT_FLUSH_INTERVAL: int = 10  # seconds between batched application_count writes
+    APPLICATION_COUNT_RECONCILE_INTERVAL: int = 3600  # seconds between application_count repairs
+    
+    # Job matching
+    MATCH_FEATURES_TTL: int = 300  # seconds the job feature snapshot used for pre-ranking is reused
+    MATCH_LLM_CANDIDATES: int = 20  # pre-ranked jobs sent to the LLM by default
+    JOB_INDEX_DIMENSIONS: int = 1024  # width of the hashed job text vectors
+    JOB_INDEX_MEMMAP_MB: int = 256  # vector matrices larger than this are memory-mapped
+    JOB_INDEX_DIR: Optional[str] = None  # directory for memory-mapped vectors; system temp dir if unset
+    JOB_INDEX_REBUILD_INTERVAL: int = 3600  # seconds between full rebuilds of the job vector index
+    JOB_INDEX_EXPIRE_INTERVAL: int = 300  # seconds between sweeps for jobs past their deadline
+    MATCH_SCORES_TOP_N: int = 50  # precomputed matches stored per user
+    MATCH_SCORES_INTERVAL: int = 30  # seconds between background match recomputation batches
+    MATCH_SCORES_BATCH_SIZE: int = 200  # users recomputed per batch
+    
+    # Autocomplete
+    AUTOCOMPLETE_REBUILD_INTERVAL: int = 600  # seconds between full rebuilds of the prefix index
+
     # Rate Limiting
     RATE_LIMIT_REQUESTS: int = 100
     RATE_LIMIT_WINDOW: int = 60  # seconds
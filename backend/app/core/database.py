@@ -5,6 +5,7 @@ Database configuration and session management
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase, sessionmaker
 from sqlalchemy import create_engine
+from sqlalchemy.exc import IntegrityError
 from typing import AsyncGenerator
 import structlog
 
@@ -79,3 +80,18 @@ def get_sync_db():
         raise
     finally:
         db.close()
+
+
+# PostgreSQL SQLSTATE for foreign_key_violation
+FOREIGN_KEY_VIOLATION = "23503"
+
+
+def is_foreign_key_violation(error: IntegrityError) -> bool:
+    """Whether an IntegrityError was raised by a foreign key constraint"""
+    orig = error.orig
+    sqlstate = (
+        getattr(orig, "sqlstate", None)
+        or getattr(orig, "pgcode", None)
+        or getattr(orig.__cause__, "sqlstate", None)
+    )
+    return sqlstate == FOREIGN_KEY_VIOLATION
@@ -0,0 +1,72 @@
+"""
+Keyset (cursor) pagination helpers
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence
+
+from sqlalchemy import and_, false, or_
+
+from app.core.exceptions import ValidationError
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Encode the sort key of the last row of a page as an opaque cursor"""
+    def _default(value: Any) -> str:
+        if isinstance(value, datetime):
+            return value.isoformat()
+        return str(value)
+
+    payload = json.dumps(list(values), default=_default, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, length: int) -> List[Any]:
+    """Decode a cursor produced by encode_cursor, checking its arity"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise ValidationError("Invalid cursor")
+
+    if not isinstance(values, list) or len(values) != length:
+        raise ValidationError("Invalid cursor")
+    return values
+
+
+def keyset_after(
+    columns: Sequence[Any],
+    values: Sequence[Any],
+    nullable: Optional[Sequence[bool]] = None,
+) -> Any:
+    """
+    Condition selecting rows strictly after `values` for an ORDER BY of
+    `columns`, all DESC NULLS LAST.
+
+    Expands to the usual lexicographic chain
+    (c1 < v1) OR (c1 = v1 AND c2 < v2) OR ..., with NULL handling for the
+    columns flagged in `nullable`.
+    """
+    nullable = list(nullable or [False] * len(columns))
+    clauses = []
+    for i, (column, value) in enumerate(zip(columns, values)):
+        prefix = [
+            _equal(columns[j], values[j]) for j in range(i)
+        ]
+        clauses.append(and_(*prefix, _after(column, value, nullable[i])))
+    return or_(*clauses)
+
+
+def _equal(column: Any, value: Any) -> Any:
+    return column.is_(None) if value is None else column == value
+
+
+def _after(column: Any, value: Any, nullable: bool) -> Any:
+    if value is None:
+        # NULLs sort last, so nothing comes strictly after a NULL
+        return false()
+    if nullable:
+        return or_(column < value, column.is_(None))
+    return column < value
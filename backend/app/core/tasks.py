@@ -0,0 +1,47 @@
+"""
+Background task helpers
+"""
+
+import asyncio
+from typing import Awaitable, Callable, Optional
+
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+
+class PeriodicTask:
+    """Runs an async callable every `interval` seconds until stopped"""
+
+    def __init__(self, name: str, interval: float, func: Callable[[], Awaitable[None]]):
+        self.name = name
+        self.interval = interval
+        self._func = func
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name=self.name)
+            logger.info("Periodic task started", task=self.name, interval=self.interval)
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        logger.info("Periodic task stopped", task=self.name)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self._func()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Periodic task failed", task=self.name, error=str(e))
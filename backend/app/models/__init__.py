@@ -4,3 +4,4 @@ from .user import *
 from .job import *
 from .notification import *
 from .blog import *
+from .ai import *
@@ -0,0 +1,58 @@
+"""
+AI service models
+"""
+
+from sqlalchemy import Column, String, DateTime, Text, Integer, Float, JSON, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import UUID, ARRAY
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+
+class LLMResponseCache(Base):
+    """Completed LLM responses keyed by a hash of the full request"""
+    __tablename__ = "llm_response_cache"
+
+    key = Column(String(64), primary_key=True)  # sha256 of model, messages and sampling parameters
+    model = Column(String(100), nullable=False)
+    response = Column(Text, nullable=False)
+    prompt_tokens = Column(Integer, nullable=True)
+    completion_tokens = Column(Integer, nullable=True)
+    hit_count = Column(Integer, default=0, nullable=False)
+
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    last_accessed_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (
+        Index('idx_llm_response_cache_expires', 'expires_at'),
+        Index('idx_llm_response_cache_accessed', 'last_accessed_at'),
+    )
+
+
+class JobMatchScore(Base):
+    """Precomputed top job matches of a user, refreshed in the background"""
+    __tablename__ = "job_match_scores"
+
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    job_id = Column(UUID(as_uuid=True), ForeignKey("jobs.id", ondelete="CASCADE"), primary_key=True)
+    rank = Column(Integer, nullable=False)  # 1 is the best match
+    score = Column(Float, nullable=False)
+    components = Column(JSON, nullable=False, default=dict)
+    reasons = Column(ARRAY(String), default=[], nullable=False)
+    concerns = Column(ARRAY(String), default=[], nullable=False)
+    computed_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        # A user's matches in rank order
+        Index('idx_job_match_scores_user_rank', 'user_id', 'rank'),
+    )
+
+
+class JobMatchRefresh(Base):
+    """When a user's stored job matches were last computed, including when none were found"""
+    __tablename__ = "job_match_refreshes"
+
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    computed_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
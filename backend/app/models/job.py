@@ -2,9 +2,9 @@
 Job and company models
 """
 
-from sqlalchemy import Column, String, DateTime, Boolean, Text, Integer, Enum, ForeignKey, Table
-from sqlalchemy.dialects.postgresql import UUID, ARRAY
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, String, DateTime, Boolean, Text, Integer, Float, Enum, ForeignKey, Table, Index, UniqueConstraint, DDL, event, literal_column
+from sqlalchemy.dialects.postgresql import UUID, ARRAY, TSVECTOR
+from sqlalchemy.orm import relationship, deferred
 from sqlalchemy.sql import func
 import uuid
 import enum
@@ -143,6 +143,8 @@ class Job(Base):
     # Company and location
     company_id = Column(UUID(as_uuid=True), ForeignKey("companies.id"), nullable=False)
     location = Column(String(255), nullable=False)
+    latitude = Column(Float, nullable=True)  # resolved from location via the gazetteer
+    longitude = Column(Float, nullable=True)
     is_remote = Column(Boolean, default=False, nullable=False)
     remote_percentage = Column(Integer, default=0, nullable=False)  # 0-100
     
@@ -173,6 +175,10 @@ class Job(Base):
     tags = Column(ARRAY(String), default=[], nullable=False)
     keywords = Column(ARRAY(String), default=[], nullable=False)
     
+    # Full-text search document, maintained by the jobs_search_vector_update trigger.
+    # Deferred so regular job loads don't ship the vector over the wire.
+    search_vector = deferred(Column(TSVECTOR, nullable=True))
+    
     # Metrics
     view_count = Column(Integer, default=0, nullable=False)
     application_count = Column(Integer, default=0, nullable=False)
@@ -188,6 +194,80 @@ class Job(Base):
     saved_jobs = relationship("SavedJob", back_populates="job", cascade="all, delete-orphan")
     required_skills = relationship("Skill", secondary=job_requirements, back_populates="job_requirements")
 
+    # Indexes for performance
+    __table_args__ = (
+        Index('idx_jobs_search_vector', 'search_vector', postgresql_using='gin'),
+        Index('idx_jobs_work_type', 'work_type', postgresql_using='gin'),
+        Index('idx_jobs_tags', 'tags', postgresql_using='gin'),
+    )
+
+
+# Backs keyset pagination of active jobs ordered newest first
+Index(
+    'idx_jobs_status_published_id',
+    Job.status,
+    Job.published_at.desc().nulls_last(),
+    Job.id.desc(),
+)
+
+# Same ordering, narrowed by experience level
+Index(
+    'idx_jobs_status_level_published',
+    Job.status,
+    Job.experience_level,
+    Job.published_at.desc().nulls_last(),
+    Job.id.desc(),
+)
+
+# Advertised salary as an inclusive range; a missing bound falls back to the other one.
+# Queries must use this exact expression for the GiST index to apply.
+JOB_SALARY_RANGE = func.int4range(
+    func.least(Job.salary_min, Job.salary_max),
+    func.greatest(Job.salary_min, Job.salary_max),
+    literal_column("'[]'"),
+)
+
+Index('idx_jobs_salary_range', JOB_SALARY_RANGE, postgresql_using='gist')
+
+# Position on the earth's surface (cube/earthdistance) for radius searches
+JOB_EARTH_POINT = func.ll_to_earth(Job.latitude, Job.longitude)
+
+Index('idx_jobs_earth_point', JOB_EARTH_POINT, postgresql_using='gist')
+
+# One statement per DDL; asyncpg rejects several in a prepared statement
+for extension in ("cube", "earthdistance"):
+    event.listen(
+        Job.__table__,
+        "before_create",
+        DDL(f"CREATE EXTENSION IF NOT EXISTS {extension}").execute_if(dialect="postgresql"),
+    )
+
+
+# Keep search_vector in sync when the table is created outside of Alembic
+# (e.g. Base.metadata.create_all on startup). Mirrors migration 003.
+JOBS_SEARCH_VECTOR_FUNCTION = DDL("""
+CREATE OR REPLACE FUNCTION jobs_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('english', coalesce(NEW.title, '')), 'A') ||
+        setweight(to_tsvector('english',
+            array_to_string(coalesce(NEW.tags, '{}'), ' ') || ' ' ||
+            array_to_string(coalesce(NEW.keywords, '{}'), ' ')), 'B') ||
+        setweight(to_tsvector('english', coalesce(NEW.description, '')), 'C');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql
+""")
+
+JOBS_SEARCH_VECTOR_TRIGGER = DDL("""
+CREATE TRIGGER jobs_search_vector_trigger
+BEFORE INSERT OR UPDATE OF title, description, tags, keywords ON jobs
+FOR EACH ROW EXECUTE FUNCTION jobs_search_vector_update()
+""")
+
+event.listen(Job.__table__, "after_create", JOBS_SEARCH_VECTOR_FUNCTION.execute_if(dialect="postgresql"))
+event.listen(Job.__table__, "after_create", JOBS_SEARCH_VECTOR_TRIGGER.execute_if(dialect="postgresql"))
+
 
 class Application(Base):
     """Job application model"""
@@ -231,6 +311,37 @@ class Application(Base):
     user = relationship("User", back_populates="applications")
     job = relationship("Job", back_populates="applications")
 
+    __table_args__ = (
+        UniqueConstraint('user_id', 'job_id', name='uq_applications_user_job'),
+    )
+
+
+# Backs a user's full application history, newest first
+Index(
+    'idx_applications_user_applied',
+    Application.user_id,
+    Application.applied_at.desc().nulls_last(),
+    Application.id.desc().nulls_last(),
+)
+
+# Backs a user's application history narrowed to one status, newest first
+Index(
+    'idx_applications_user_status_applied',
+    Application.user_id,
+    Application.status,
+    Application.applied_at.desc().nulls_last(),
+    Application.id.desc(),
+)
+
+# Backs an employer's pipeline for one job: per-status listings and counts
+Index(
+    'idx_applications_job_status_applied',
+    Application.job_id,
+    Application.status,
+    Application.applied_at.desc().nulls_last(),
+    Application.id.desc(),
+)
+
 
 class SavedJob(Base):
     """Saved job model"""
@@ -253,3 +364,16 @@ class SavedJob(Base):
     # Relationships
     user = relationship("User", back_populates="saved_jobs")
     job = relationship("Job", back_populates="saved_jobs")
+
+    __table_args__ = (
+        UniqueConstraint('user_id', 'job_id', name='unique_user_job_save'),
+    )
+
+
+# Backs a user's saved jobs listing, newest first
+Index(
+    'idx_saved_jobs_user_saved_id',
+    SavedJob.user_id,
+    SavedJob.saved_at.desc().nulls_last(),
+    SavedJob.id.desc(),
+)
@@ -3,7 +3,7 @@ Job-related Pydantic schemas
 """
 
 from pydantic import BaseModel, Field, validator
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Union
 from datetime import datetime
 from uuid import UUID
 import enum
@@ -209,6 +209,11 @@ class JobWithCompany(Job):
     """Job with company information schema"""
     company: Company
 
+    @classmethod
+    def from_models(cls, job: Any, company: Any) -> "JobWithCompany":
+        """Combine a job row with its separately loaded company row"""
+        return cls(**Job.model_validate(job).model_dump(), company=Company.model_validate(company))
+
 
 class ApplicationBase(BaseModel):
     """Base application schema"""
@@ -238,6 +243,22 @@ class ApplicationUpdate(BaseModel):
     notes: Optional[str] = None
 
 
+class BulkStatusUpdate(BaseModel):
+    """Bulk application status transition schema"""
+    application_ids: List[UUID] = Field(..., min_length=1, max_length=500)
+    status: ApplicationStatus
+    message: Optional[str] = Field(None, max_length=1000)
+
+
+class BulkStatusUpdateResponse(BaseModel):
+    """Bulk application status transition result schema"""
+    status: ApplicationStatus
+    updated: List[UUID]
+    # Requested ids that were not moved: unknown, on another job, withdrawn or already in the status
+    skipped: List[UUID]
+    notifications_created: int
+
+
 class Application(ApplicationBase):
     """Application response schema"""
     id: UUID
@@ -266,6 +287,44 @@ class ApplicationWithJob(Application):
     """Application with job information schema"""
     job: Job
 
+    @classmethod
+    def from_models(cls, application: Any, job: Any) -> "ApplicationWithJob":
+        """Combine an application row with its separately loaded job row"""
+        return cls(**Application.model_validate(application).model_dump(), job=Job.model_validate(job))
+
+
+class ApplicationListResponse(BaseModel):
+    """Applications page schema"""
+    applications: List[ApplicationWithJob]
+    page_size: int
+    has_next: bool
+    next_cursor: Optional[str] = None
+
+
+class Applicant(BaseModel):
+    """Applicant fields shown in an employer's pipeline"""
+    id: UUID
+    full_name: Optional[str] = None
+    email: str
+    avatar_url: Optional[str] = None
+
+
+class PipelineApplication(Application):
+    """Application with its applicant schema"""
+    applicant: Applicant
+
+
+class ApplicantPipelineResponse(BaseModel):
+    """Employer applicant pipeline page schema"""
+    job_id: UUID
+    applications: List[PipelineApplication]
+    page_size: int
+    has_next: bool
+    next_cursor: Optional[str] = None
+    # application status -> number of applications, when counts are requested
+    status_counts: Optional[Dict[str, int]] = None
+    total: Optional[int] = None
+
 
 class SavedJobBase(BaseModel):
     """Base saved job schema"""
@@ -303,6 +362,59 @@ class SavedJobWithJob(SavedJob):
     """Saved job with job information schema"""
     job: Job
 
+    @classmethod
+    def from_models(cls, saved_job: Any, job: Any) -> "SavedJobWithJob":
+        """Combine a saved job row with its separately loaded job row"""
+        return cls(**SavedJob.model_validate(saved_job).model_dump(), job=Job.model_validate(job))
+
+
+class SavedJobSort(str, enum.Enum):
+    """Saved jobs ordering"""
+    SAVED_AT = "saved_at"  # most recently saved first
+    PRIORITY = "priority"  # HIGH, MEDIUM, LOW, then most recently saved
+
+
+class SavedJobView(str, enum.Enum):
+    """How much of each saved job to return"""
+    FULL = "full"
+    CARD = "card"
+
+
+class JobCard(BaseModel):
+    """Job fields needed to render a job card"""
+    id: UUID
+    title: str
+    slug: str
+    company_id: UUID
+    company_name: str
+    company_logo_url: Optional[str] = None
+    location: str
+    is_remote: bool
+    work_type: List[str]
+    experience_level: str
+    salary_min: Optional[int] = None
+    salary_max: Optional[int] = None
+    salary_currency: str
+    salary_period: str
+    status: JobStatus
+    published_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class SavedJobCard(SavedJob):
+    """Saved job with job card schema"""
+    job: JobCard
+
+
+class SavedJobListResponse(BaseModel):
+    """Saved jobs page schema"""
+    saved_jobs: List[Union[SavedJobWithJob, SavedJobCard]]
+    page_size: int
+    has_next: bool
+    next_cursor: Optional[str] = None
+
 
 class JobSearchFilters(BaseModel):
     """Job search filters schema"""
@@ -326,12 +438,36 @@ class JobSearchFilters(BaseModel):
 class JobSearchResponse(BaseModel):
     """Job search response schema"""
     jobs: List[JobWithCompany]
-    total: int
-    page: int
     page_size: int
-    total_pages: int
     has_next: bool
     has_prev: bool
+    next_cursor: Optional[str] = None
+    # Populated for offset pagination, or when a count mode is requested
+    total: Optional[int] = None
+    total_exact: Optional[bool] = None
+    page: Optional[int] = None
+    total_pages: Optional[int] = None
+    # facet name -> value -> number of matching jobs, when facets are requested
+    facets: Optional[Dict[str, Dict[str, int]]] = None
+
+
+class AutocompleteSuggestion(BaseModel):
+    """Autocomplete suggestion schema"""
+    text: str
+    kind: str
+    weight: float
+
+
+class AutocompleteResponse(BaseModel):
+    """Autocomplete response schema"""
+    query: str
+    suggestions: List[AutocompleteSuggestion]
+
+
+class MatchMode(str, enum.Enum):
+    """How job matches are scored"""
+    LLM = "llm"    # local pre-ranking, then the LLM re-scores the top candidates
+    FAST = "fast"  # local pre-ranking only; no LLM call
 
 
 class JobMatchRequest(BaseModel):
@@ -340,6 +476,9 @@ class JobMatchRequest(BaseModel):
     limit: int = Field(10, ge=1, le=50)
     include_applied: bool = False
     min_match_score: float = Field(0.6, ge=0.0, le=1.0)
+    mode: MatchMode = MatchMode.LLM
+    # Pre-ranked jobs sent to the LLM; defaults to MATCH_LLM_CANDIDATES
+    candidates: Optional[int] = Field(None, ge=1, le=50)
 
 
 class JobMatch(BaseModel):
@@ -349,6 +488,9 @@ class JobMatch(BaseModel):
     match_reasons: List[str] = []
     strengths: List[str] = []
     concerns: List[str] = []
+    # Local pre-ranking score and its components (skills, location, salary, experience)
+    pre_rank_score: Optional[float] = None
+    score_components: Dict[str, float] = {}
 
 
 class JobMatchResponse(BaseModel):
@@ -357,3 +499,22 @@ class JobMatchResponse(BaseModel):
     total_jobs_analyzed: int
     total_matches: int
     processing_time: float
+
+
+class StoredJobMatchesResponse(BaseModel):
+    """Precomputed job matches schema"""
+    matches: List[JobMatch]
+    total_matches: int
+    computed_at: Optional[datetime] = None
+
+
+class SimilarJob(BaseModel):
+    """Job found by profile similarity search"""
+    job: JobWithCompany
+    similarity: float = Field(..., ge=-1.0, le=1.0)
+
+
+class SimilarJobsResponse(BaseModel):
+    """Profile similarity search response schema"""
+    jobs: List[SimilarJob]
+    total_jobs_indexed: int
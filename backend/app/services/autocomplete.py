@@ -0,0 +1,421 @@
+"""
+In-process autocomplete for job titles, skills and companies
+"""
+
+import asyncio
+import enum
+import heapq
+import math
+from bisect import bisect_left
+from collections import OrderedDict
+from functools import partial
+from typing import Callable, Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+import structlog
+from sqlalchemy import func, select
+
+from app.core.database import AsyncSessionLocal
+from app.models.job import Company, Job, JobStatus, job_requirements
+from app.models.user import Skill, user_skills
+
+logger = structlog.get_logger(__name__)
+
+# Separates the searchable part of a key from the entry it belongs to
+_SEP = "\x00"
+# Ranked results kept per cached prefix
+_TOP_RESULTS = 50
+# Cached prefixes, least recently used evicted first
+_CACHE_SIZE = 20_000
+# Prefixes up to this length are ranked up front on every rebuild
+_WARM_PREFIX = 3
+
+Entry = Tuple["SuggestionKind", str]
+
+
+class SuggestionKind(str, enum.Enum):
+    """Kind of autocomplete suggestion"""
+    TITLE = "title"
+    SKILL = "skill"
+    COMPANY = "company"
+
+
+class Suggestion(NamedTuple):
+    text: str
+    kind: SuggestionKind
+    weight: float
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def _word_suffixes(text: str) -> List[str]:
+    """'senior python developer' -> itself, 'python developer', 'developer'"""
+    words = _normalize(text).split()
+    return [" ".join(words[i:]) for i in range(len(words))]
+
+
+def _prefixes(text: str) -> Set[str]:
+    """Every prefix that matches `text` in the index"""
+    return {suffix[:length] for suffix in _word_suffixes(text) for length in range(1, len(suffix) + 1)}
+
+
+class _Ranking:
+    """
+    Heaviest matches of one prefix, kept in sync with writes.
+
+    `ranked` is always the true top-N for the prefix. When `complete` is set it
+    holds every match; otherwise lighter matches exist that were left out, and
+    none of them outweighs the last ranked entry.
+    """
+
+    __slots__ = ("ranked", "complete")
+
+    def __init__(self, ranked: List[Suggestion], complete: bool):
+        self.ranked = ranked
+        self.complete = complete
+
+    def covers(self, limit: int) -> bool:
+        return self.complete or len(self.ranked) >= limit
+
+    def update(self, kind: SuggestionKind, text: str, weight: Optional[float]) -> bool:
+        """
+        Apply a new weight for an entry; None means it was removed.
+
+        Returns False when the ranking can no longer be trusted: a ranked entry
+        of an incomplete ranking fell below the lightest one kept, so a match
+        that was left out may now outrank it.
+        """
+        position = next(
+            (i for i, s in enumerate(self.ranked) if s.kind == kind and s.text == text), None
+        )
+        if position is not None:
+            previous = self.ranked.pop(position).weight
+            if weight is None:
+                return True
+            if weight < previous and not self.complete and not (self.ranked and weight >= self.ranked[-1].weight):
+                return False
+        elif weight is None or not (self.complete or (self.ranked and weight > self.ranked[-1].weight)):
+            return True
+
+        self.ranked.append(Suggestion(text=text, kind=kind, weight=weight))
+        self.ranked.sort(key=lambda s: -s.weight)
+        if len(self.ranked) > _TOP_RESULTS:
+            del self.ranked[_TOP_RESULTS:]
+            self.complete = False
+        return True
+
+
+class PrefixIndex:
+    """
+    Weighted prefix index over sorted arrays.
+
+    Every entry is indexed under each of its word suffixes, so "dev" matches
+    "Senior Python Developer". A lookup bisects into the sorted key list and
+    ranks the matching range; rankings are cached per prefix and patched in
+    place on writes, so popular prefixes never pay for the scan again.
+    """
+
+    def __init__(self):
+        self._keys: List[str] = []
+        self._entries: List[Entry] = []
+        self._weights: Dict[Entry, float] = {}
+        self._rankings: "OrderedDict[str, Dict[Optional[FrozenSet[SuggestionKind]], _Ranking]]" = OrderedDict()
+
+    @classmethod
+    def from_entries(cls, entries: Iterable[Tuple[SuggestionKind, str, float]]) -> "PrefixIndex":
+        """Bulk-build an index, sorting once instead of inserting one key at a time"""
+        index = cls()
+        for kind, text, weight in entries:
+            text = (text or "").strip()
+            if text:
+                index._weights[(kind, text)] = weight
+
+        keyed = sorted(
+            (cls._key(suffix, kind, text), (kind, text))
+            for kind, text in index._weights
+            for suffix in _word_suffixes(text)
+        )
+        index._keys = [key for key, _ in keyed]
+        index._entries = [entry for _, entry in keyed]
+        index.warm()
+        return index
+
+    def __len__(self) -> int:
+        return len(self._weights)
+
+    def weight(self, kind: SuggestionKind, text: str) -> float:
+        return self._weights.get((kind, text.strip()), 0)
+
+    def upsert(self, kind: SuggestionKind, text: str, weight: float) -> None:
+        """Add an entry or replace its weight"""
+        text = text.strip()
+        if not text:
+            return
+
+        entry = (kind, text)
+        if entry not in self._weights:
+            for suffix in _word_suffixes(text):
+                key = self._key(suffix, kind, text)
+                i = bisect_left(self._keys, key)
+                self._keys.insert(i, key)
+                self._entries.insert(i, entry)
+        self._weights[entry] = weight
+        self._update_rankings(kind, text, weight)
+
+    def adjust(self, kind: SuggestionKind, text: str, delta: float) -> None:
+        """Change an entry's weight, removing it once it drops to zero"""
+        text = (text or "").strip()
+        weight = self._weights.get((kind, text), 0) + delta
+        if weight > 0:
+            self.upsert(kind, text, weight)
+        else:
+            self.remove(kind, text)
+
+    def remove(self, kind: SuggestionKind, text: str) -> None:
+        text = (text or "").strip()
+        if self._weights.pop((kind, text), None) is None:
+            return
+
+        for suffix in _word_suffixes(text):
+            key = self._key(suffix, kind, text)
+            i = bisect_left(self._keys, key)
+            if i < len(self._keys) and self._keys[i] == key:
+                del self._keys[i]
+                del self._entries[i]
+        self._update_rankings(kind, text, None)
+
+    def search(
+        self,
+        prefix: str,
+        limit: int = 10,
+        kinds: Optional[Iterable[SuggestionKind]] = None,
+    ) -> List[Suggestion]:
+        """Heaviest entries having a word that starts with `prefix`"""
+        prefix = _normalize(prefix)
+        if not prefix:
+            return []
+        kinds = frozenset(kinds) if kinds else None
+
+        rankings = self._rankings.get(prefix)
+        if rankings is not None:
+            self._rankings.move_to_end(prefix)
+            ranking = rankings.get(kinds)
+            if ranking is not None and ranking.covers(limit):
+                return ranking.ranked[:limit]
+
+        ranking = self._rank(prefix, max(limit, _TOP_RESULTS), kinds)
+        return ranking.ranked[:limit]
+
+    def warm(self, max_length: int = _WARM_PREFIX) -> None:
+        """Rank every prefix up to `max_length` characters ahead of the first lookup"""
+        prefixes = {key[:length] for key in self._keys for length in range(1, max_length + 1)}
+        for prefix in sorted(prefixes):
+            if _SEP not in prefix and prefix.strip() == prefix:
+                self._rank(prefix, _TOP_RESULTS, None)
+
+    def _rank(self, prefix: str, limit: int, kinds: Optional[FrozenSet[SuggestionKind]]) -> _Ranking:
+        """Scan the keys starting with `prefix` and cache the heaviest matches"""
+        lo = bisect_left(self._keys, prefix)
+        hi = bisect_left(self._keys, prefix + "\uffff", lo)
+
+        matches = {
+            entry: self._weights[entry]
+            for entry in self._entries[lo:hi]
+            if kinds is None or entry[0] in kinds
+        }
+        best = heapq.nlargest(limit, matches.items(), key=lambda item: item[1])
+        ranking = _Ranking(
+            [Suggestion(text=text, kind=kind, weight=weight) for (kind, text), weight in best],
+            complete=len(matches) <= limit,
+        )
+
+        self._rankings.setdefault(prefix, {})[kinds] = ranking
+        self._rankings.move_to_end(prefix)
+        while len(self._rankings) > _CACHE_SIZE:
+            self._rankings.popitem(last=False)
+        return ranking
+
+    def _update_rankings(self, kind: SuggestionKind, text: str, weight: Optional[float]) -> None:
+        for prefix in _prefixes(text):
+            rankings = self._rankings.get(prefix)
+            if rankings is None:
+                continue
+            stale = [
+                kinds
+                for kinds, ranking in rankings.items()
+                if (kinds is None or kind in kinds) and not ranking.update(kind, text, weight)
+            ]
+            # Ranked again from the keys on the next lookup
+            for kinds in stale:
+                del rankings[kinds]
+            if not rankings:
+                del self._rankings[prefix]
+
+    @staticmethod
+    def _key(suffix: str, kind: SuggestionKind, text: str) -> str:
+        return f"{suffix}{_SEP}{kind.value}{_SEP}{text}"
+
+
+class _TitleStats:
+    """Active postings sharing a title up to case, counted the way the rebuild counts them"""
+
+    __slots__ = ("spellings", "views")
+
+    def __init__(self):
+        self.spellings: Dict[str, int] = {}
+        self.views = 0
+
+    @property
+    def text(self) -> str:
+        return min(self.spellings)
+
+    @property
+    def weight(self) -> float:
+        # Number of active postings, plus a boost for views
+        return sum(self.spellings.values()) + math.log1p(self.views)
+
+
+def _title_stats(rows: Iterable[Tuple[str, int, int]]) -> Dict[str, _TitleStats]:
+    """Fold (title, postings, views) rows into stats keyed by the lowercased title"""
+    titles: Dict[str, _TitleStats] = {}
+    for title, postings, views in rows:
+        stats = titles.setdefault(title.lower(), _TitleStats())
+        stats.spellings[title] = stats.spellings.get(title, 0) + postings
+        stats.views += views
+    return titles
+
+
+class AutocompleteService:
+    """
+    Keeps a PrefixIndex of titles, skills and companies in sync with the database.
+
+    Title weights are kept as the counts behind them, so listing and
+    unlisting a job applies exactly the change a rebuild would see. Writes
+    that land while a rebuild is reading are applied to the live index and
+    replayed onto the new one once it is swapped in.
+    """
+
+    def __init__(self):
+        self.index = PrefixIndex()
+        self._titles: Dict[str, _TitleStats] = {}
+        self._replay: Optional[List[Callable[[], None]]] = None
+
+    def suggest(
+        self,
+        prefix: str,
+        limit: int = 10,
+        kinds: Optional[Iterable[SuggestionKind]] = None,
+    ) -> List[Suggestion]:
+        return self.index.search(prefix, limit, kinds)
+
+    async def rebuild(self) -> None:
+        """Rebuild the index from the database and swap it in"""
+        entries: List[Tuple[SuggestionKind, str, float]] = []
+
+        try:
+            async with AsyncSessionLocal() as db:
+                rows = await db.execute(
+                    select(Job.title, func.count(), func.coalesce(func.sum(Job.view_count), 0))
+                    .where(Job.status == JobStatus.ACTIVE)
+                    .group_by(Job.title)
+                )
+                titles = _title_stats(rows.all())
+                # Jobs listed or unlisted from here on are missing from `titles`
+                self._replay = []
+                for stats in titles.values():
+                    entries.append((SuggestionKind.TITLE, stats.text, stats.weight))
+
+                # Companies weighted by number of active postings
+                active_jobs = (
+                    select(func.count())
+                    .where(Job.company_id == Company.id, Job.status == JobStatus.ACTIVE)
+                    .scalar_subquery()
+                )
+                companies = await db.execute(
+                    select(Company.name, active_jobs).where(Company.is_active == True)
+                )
+                for name, postings in companies.all():
+                    entries.append((SuggestionKind.COMPANY, name, 1 + postings))
+
+                # Skills weighted by how many users list them and jobs require them
+                users_with_skill = (
+                    select(func.count()).where(user_skills.c.skill_id == Skill.id).scalar_subquery()
+                )
+                jobs_requiring_skill = (
+                    select(func.count()).where(job_requirements.c.skill_id == Skill.id).scalar_subquery()
+                )
+                skills = await db.execute(
+                    select(Skill.name, users_with_skill + jobs_requiring_skill).where(Skill.is_active == True)
+                )
+                for name, usage in skills.all():
+                    entries.append((SuggestionKind.SKILL, name, 1 + usage))
+
+            # Sorting and warming is CPU bound; keep it off the event loop
+            index = await asyncio.to_thread(PrefixIndex.from_entries, entries)
+            self.index, self._titles = index, titles
+            for write in self._replay:
+                write()
+        finally:
+            self._replay = None
+        logger.info("Autocomplete index rebuilt", entries=len(index))
+
+    # Incremental updates from write paths
+
+    def job_listed(self, title: str, views: int = 0) -> None:
+        """A job became visible in search"""
+        self._apply(partial(self._count_title, title, 1, views))
+
+    def job_unlisted(self, title: str, views: int = 0) -> None:
+        """A job stopped being visible in search"""
+        self._apply(partial(self._count_title, title, -1, -views))
+
+    def company_saved(self, name: str, previous_name: Optional[str] = None) -> None:
+        """A company was created or renamed"""
+        self._apply(partial(self._save_company, name, previous_name))
+
+    def company_deactivated(self, name: str) -> None:
+        """A company was hidden from the platform"""
+        self._apply(partial(self._remove_company, name))
+
+    def _apply(self, write: Callable[[], None]) -> None:
+        write()
+        if self._replay is not None:
+            self._replay.append(write)
+
+    def _count_title(self, title: str, postings: int, views: int) -> None:
+        if not title:
+            return
+
+        key = title.lower()
+        stats = self._titles.setdefault(key, _TitleStats())
+        previous = stats.text if stats.spellings else None
+
+        count = stats.spellings.get(title, 0) + postings
+        if count > 0:
+            stats.spellings[title] = count
+        else:
+            stats.spellings.pop(title, None)
+        # View counts grow between rebuilds without passing through here
+        stats.views = max(stats.views + views, 0)
+
+        if previous is not None and (not stats.spellings or stats.text != previous):
+            self.index.remove(SuggestionKind.TITLE, previous)
+        if stats.spellings:
+            self.index.upsert(SuggestionKind.TITLE, stats.text, stats.weight)
+        else:
+            del self._titles[key]
+
+    def _save_company(self, name: str, previous_name: Optional[str]) -> None:
+        weight = self.index.weight(SuggestionKind.COMPANY, name) or 1
+        if previous_name and previous_name != name:
+            weight = max(weight, self.index.weight(SuggestionKind.COMPANY, previous_name))
+            self.index.remove(SuggestionKind.COMPANY, previous_name)
+        self.index.upsert(SuggestionKind.COMPANY, name, weight)
+
+    def _remove_company(self, name: str) -> None:
+        self.index.remove(SuggestionKind.COMPANY, name)
+
+
+# Global autocomplete instance
+autocomplete_service = AutocompleteService()
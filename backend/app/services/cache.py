@@ -4,10 +4,12 @@ Caching service for blog API
 
 import json
 import structlog
-from typing import Any, Optional, Dict
+from typing import Any, Callable, Optional, Dict, Set
 from datetime import datetime, timedelta
 import asyncio
 
+from app.core.config import settings
+
 logger = structlog.get_logger(__name__)
 
 
@@ -46,6 +48,16 @@ class CacheService:
         
         logger.debug("Cache set", key=key, ttl=ttl)
     
+    async def replace(self, key: str, value: Any) -> bool:
+        """Swap the value of a live entry, keeping its expiry; False if there is none"""
+        entry = self._cache.get(key)
+        if entry is None or datetime.utcnow() > entry['expires_at']:
+            return False
+        
+        entry['value'] = value
+        logger.debug("Cache replaced", key=key)
+        return True
+    
     async def delete(self, key: str) -> None:
         """Delete key from cache"""
         if key in self._cache:
@@ -80,6 +92,113 @@ class CacheService:
 cache_service = CacheService()
 
 
+def job_detail_key(job_id: Any) -> str:
+    """Cache key of a job's detail payload"""
+    return f"job_detail:{job_id}"
+
+
+class _CachedSearch:
+    """Bookkeeping for one filter signature"""
+    
+    def __init__(self, filters: Dict[str, Any]):
+        self.filters = filters
+        self.keys: Set[str] = set()
+        self.company_ids: Set[str] = set()
+
+
+class SearchResultCache:
+    """
+    Whole job search result pages, keyed by filter signature and pagination.
+    
+    Remembers the filters behind every cached signature so a write can drop
+    only the signatures whose result set the written job could belong to.
+    A generation counter keeps a search that raced with a write from caching
+    a page read before the write committed.
+    """
+    
+    def __init__(self, cache: CacheService):
+        self._cache = cache
+        self._searches: Dict[str, _CachedSearch] = {}
+        self._generation = 0
+    
+    @property
+    def generation(self) -> int:
+        return self._generation
+    
+    @staticmethod
+    def page_key(signature: str, **pagination: Any) -> str:
+        return cache_service._generate_key(f"job_search:{signature}", **pagination)
+    
+    @staticmethod
+    def facets_key(signature: str) -> str:
+        return f"job_facets:{signature}"
+    
+    async def get(self, key: str) -> Optional[Any]:
+        return await self._cache.get(key)
+    
+    async def set(
+        self,
+        signature: str,
+        filters: Dict[str, Any],
+        key: str,
+        value: Any,
+        company_ids: Set[str],
+        generation: int,
+        ttl: Optional[int] = None,
+    ) -> None:
+        """Cache a page unless an invalidation happened since `generation` was read"""
+        if generation != self._generation:
+            return
+        
+        search = self._searches.pop(signature, None) or _CachedSearch(filters)
+        search.keys.add(key)
+        search.company_ids.update(company_ids)
+        # Re-inserting keeps the dict ordered from least to most recently cached
+        self._searches[signature] = search
+        await self._cache.set(key, value, ttl=ttl or settings.SEARCH_RESULTS_CACHE_TTL)
+        
+        while len(self._searches) > settings.SEARCH_RESULTS_CACHE_MAX_SIGNATURES:
+            oldest = next(iter(self._searches))
+            await self._drop(oldest)
+    
+    async def invalidate(self, matches: Callable[[Dict[str, Any]], bool]) -> int:
+        """Drop every signature whose filters `matches`; returns how many were dropped"""
+        self._generation += 1
+        stale = [signature for signature, search in self._searches.items() if matches(search.filters)]
+        for signature in stale:
+            await self._drop(signature)
+        
+        if stale:
+            logger.debug("Search results invalidated", signatures=len(stale))
+        return len(stale)
+    
+    async def invalidate_company(self, company_id: Any) -> int:
+        """Drop signatures with a cached page showing the given company"""
+        company_id = str(company_id)
+        return await self.invalidate_signatures(
+            signature for signature, search in self._searches.items()
+            if company_id in search.company_ids
+        )
+    
+    async def invalidate_signatures(self, signatures: Any) -> int:
+        self._generation += 1
+        signatures = list(signatures)
+        for signature in signatures:
+            await self._drop(signature)
+        return len(signatures)
+    
+    async def _drop(self, signature: str) -> None:
+        search = self._searches.pop(signature, None)
+        if search is None:
+            return
+        for key in search.keys:
+            await self._cache.delete(key)
+
+
+# Global search result cache
+search_cache = SearchResultCache(cache_service)
+
+
 # Cache decorators
 def cache_result(ttl: int = 900, key_prefix: str = ""):
     """Decorator to cache function results"""
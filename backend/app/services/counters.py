@@ -0,0 +1,264 @@
+"""
+Write-behind counters for hot columns
+"""
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+from uuid import UUID
+
+import structlog
+from sqlalchemy import Integer, column, func, select, update, values
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.metrics import metrics
+from app.models.job import Application, ApplicationStatus, Job
+from app.services.cache import cache_service, job_detail_key
+
+logger = structlog.get_logger(__name__)
+
+# Rows per UPDATE statement when flushing
+FLUSH_BATCH_SIZE = 1000
+
+
+def _keyed_values(rows: List[tuple], name: str) -> Any:
+    """(id, value) rows as a VALUES list to join against"""
+    return values(
+        column("id", PG_UUID(as_uuid=True)),
+        column("value", Integer),
+        name=name,
+    ).data(rows)
+
+
+class CounterBuffer:
+    """
+    Aggregates increments of an integer column in memory and writes them in
+    batches, one `UPDATE ... FROM (VALUES ...)` per chunk of rows.
+
+    Increments are lost if the process dies between flushes, which is an
+    accepted trade-off for counters such as page views. Flushing keeps the
+    row's `updated_at` untouched when the model has one, since a counter
+    bump is not an edit. `on_flush` receives the new column value of every
+    row a flush wrote, for caches that hold a copy of the column.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        model: Any,
+        column_name: str,
+        interval: float,
+        on_flush: Optional[Callable[[Dict[UUID, int]], Awaitable[None]]] = None,
+    ):
+        self.name = name
+        self.interval = interval
+        self._on_flush = on_flush
+        self._table = model.__table__
+        self._column = self._table.c[column_name]
+        self._pending: Dict[UUID, int] = {}
+        self._oldest_pending: Optional[float] = None
+        # Held by every flush, and by work that must not overlap one
+        self._flush_lock = asyncio.Lock()
+
+        self._labels = {"counter": name}
+        metrics.gauge(
+            "counter_buffer_flush_interval_seconds", "Configured seconds between counter buffer flushes"
+        ).set_function(lambda: self.interval, **self._labels)
+        metrics.gauge(
+            "counter_buffer_flush_lag_seconds", "Age of the oldest buffered increment not yet written"
+        ).set_function(self.lag, **self._labels)
+        metrics.gauge(
+            "counter_buffer_pending_rows", "Rows with buffered increments"
+        ).set_function(lambda: len(self._pending), **self._labels)
+        self._flushed = metrics.counter("counter_buffer_flushed_rows_total", "Rows written by counter buffers")
+        self._failures = metrics.counter("counter_buffer_flush_failures_total", "Failed counter buffer flushes")
+        self._duration = metrics.gauge("counter_buffer_last_flush_seconds", "Duration of the last counter buffer flush")
+
+    def increment(self, key: Any, amount: int = 1) -> None:
+        """Buffer an increment (or decrement) for the row with primary key `key`"""
+        key = key if isinstance(key, UUID) else UUID(str(key))
+        self._pending[key] = self._pending.get(key, 0) + amount
+        if self._oldest_pending is None:
+            self._oldest_pending = time.monotonic()
+
+    def pending(self, key: Any) -> int:
+        """Buffered delta not yet written for a row"""
+        key = key if isinstance(key, UUID) else UUID(str(key))
+        return self._pending.get(key, 0)
+
+    def pending_deltas(self) -> Dict[UUID, int]:
+        """Copy of every buffered delta not yet written"""
+        return dict(self._pending)
+
+    def lag(self) -> float:
+        """Seconds the oldest unwritten increment has been waiting"""
+        if self._oldest_pending is None:
+            return 0.0
+        return time.monotonic() - self._oldest_pending
+
+    async def flush(self) -> int:
+        """Write buffered increments; returns the number of rows updated"""
+        async with self._flush_lock:
+            return await self._flush()
+
+    @asynccontextmanager
+    async def flushed(self) -> AsyncIterator[None]:
+        """Flush, then hold back further flushes until the block exits"""
+        async with self._flush_lock:
+            await self._flush()
+            yield
+
+    async def _flush(self) -> int:
+        pending, self._pending = self._pending, {}
+        oldest, self._oldest_pending = self._oldest_pending, None
+        rows = [(key, delta) for key, delta in pending.items() if delta]
+        if not rows:
+            return 0
+
+        started = time.monotonic()
+        written: Dict[UUID, int] = {}
+        try:
+            async with AsyncSessionLocal() as db:
+                for i in range(0, len(rows), FLUSH_BATCH_SIZE):
+                    result = await db.execute(self._statement(rows[i:i + FLUSH_BATCH_SIZE]))
+                    written.update((key, value) for key, value in result.all())
+                await db.commit()
+        except BaseException as e:
+            # Put the increments back so the next flush retries them; this
+            # includes a cancelled flush, e.g. the periodic task stopped on
+            # shutdown just before the final flush
+            for key, delta in rows:
+                self._pending[key] = self._pending.get(key, 0) + delta
+            if oldest is not None:
+                self._oldest_pending = min(oldest, self._oldest_pending or oldest)
+            if not isinstance(e, Exception):
+                raise
+            self._failures.inc(**self._labels)
+            logger.error("Counter flush failed", counter=self.name, rows=len(rows), error=str(e))
+            return 0
+
+        self._flushed.inc(len(rows), **self._labels)
+        self._duration.set(time.monotonic() - started, **self._labels)
+        logger.debug("Counter flushed", counter=self.name, rows=len(rows))
+
+        if self._on_flush is not None:
+            try:
+                await self._on_flush(written)
+            except Exception as e:
+                logger.warning("Counter flush hook failed", counter=self.name, error=str(e))
+        return len(rows)
+
+    def _statement(self, rows: List[tuple]) -> Any:
+        deltas = _keyed_values(rows, "deltas")
+
+        changes = {self._column: self._column + deltas.c.value}
+        if "updated_at" in self._table.c:
+            changes[self._table.c.updated_at] = self._table.c.updated_at
+
+        return (
+            update(self._table)
+            .where(self._table.c.id == deltas.c.id)
+            .values(changes)
+            .returning(self._table.c.id, self._column)
+        )
+
+
+async def _patch_job_details(view_counts: Dict[UUID, int]) -> None:
+    """
+    Cached job details carry the view count as of caching and add the
+    buffered views on top; once those are written the sum would go
+    backwards, so the cached count is moved up to the written one.
+    """
+    for job_id, view_count in view_counts.items():
+        key = job_detail_key(job_id)
+        cached = await cache_service.get(key)
+        if cached is None or cached["body"].view_count >= view_count:
+            continue
+        body = cached["body"].model_copy(update={"view_count": view_count})
+        await cache_service.replace(key, {**cached, "body": body})
+
+
+# Page views of job postings
+job_view_counter = CounterBuffer(
+    "job_views", Job, "view_count", settings.VIEW_COUNT_FLUSH_INTERVAL, on_flush=_patch_job_details
+)
+
+# Applications per job that have not been withdrawn
+job_application_counter = CounterBuffer(
+    "job_applications", Job, "application_count", settings.APPLICATION_COUNT_FLUSH_INTERVAL
+)
+
+_reconciled = metrics.counter(
+    "job_application_count_repaired_total", "Jobs whose application_count was corrected by reconciliation"
+)
+
+
+def application_count_delta(previous: ApplicationStatus, current: ApplicationStatus) -> int:
+    """Change to a job's application_count when an application moves between statuses"""
+    was_counted = previous != ApplicationStatus.WITHDRAWN
+    is_counted = current != ApplicationStatus.WITHDRAWN
+    return int(is_counted) - int(was_counted)
+
+
+async def reconcile_application_counts() -> int:
+    """
+    Recompute application_count from the applications table for every job
+    whose stored value drifted; returns the number of jobs repaired.
+
+    Buffered increments are flushed first, and no flush runs until the
+    repair commits. Increments buffered meanwhile belong to applications
+    the recount may already see but will still be flushed, so the recount
+    leaves them out. A job whose buffered delta changes while the UPDATE
+    runs is ambiguous: its repair is undone and left to the next run.
+    """
+    actual = func.coalesce(
+        select(func.count())
+        .where(Application.job_id == Job.id, Application.status != ApplicationStatus.WITHDRAWN)
+        .scalar_subquery(),
+        0,
+    )
+    # A self-join in UPDATE ... FROM sees each row as it was before the update
+    previous = Job.__table__.alias("previous")
+
+    async with job_application_counter.flushed():
+        pending = job_application_counter.pending_deltas()
+        buffered_rows = [(key, delta) for key, delta in pending.items() if delta]
+        if buffered_rows:
+            buffered = _keyed_values(buffered_rows, "buffered")
+            actual = actual - func.coalesce(
+                select(buffered.c.value).where(buffered.c.id == Job.id).scalar_subquery(), 0
+            )
+
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                update(Job)
+                .where(previous.c.id == Job.id, Job.application_count != actual)
+                .values(application_count=actual, updated_at=Job.updated_at)
+                .returning(Job.id, previous.c.application_count)
+                .execution_options(synchronize_session=False)
+            )
+            previous_counts = dict(result.all())
+
+            moved = [
+                (job_id, count)
+                for job_id, count in previous_counts.items()
+                if job_application_counter.pending(job_id) != pending.get(job_id, 0)
+            ]
+            if moved:
+                restored = _keyed_values(moved, "restored")
+                await db.execute(
+                    update(Job)
+                    .where(Job.id == restored.c.id)
+                    .values(application_count=restored.c.value, updated_at=Job.updated_at)
+                    .execution_options(synchronize_session=False)
+                )
+            await db.commit()
+
+    repaired = len(previous_counts) - len(moved)
+    if repaired:
+        _reconciled.inc(repaired)
+        logger.info("Application counts reconciled", repaired=repaired, deferred=len(moved))
+    return repaired
@@ -0,0 +1,95 @@
+"""
+Offline location normalization backed by a local gazetteer
+"""
+
+import csv
+import re
+import unicodedata
+from pathlib import Path
+from typing import Dict, NamedTuple, Optional
+
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+GAZETTEER_PATH = Path(__file__).resolve().parent.parent / "data" / "gazetteer.csv"
+
+_COORDINATES = re.compile(r"^\s*(-?\d+(?:\.\d+)?)\s*,\s*(-?\d+(?:\.\d+)?)\s*$")
+_NOISE_WORDS = {"greater", "area", "metro", "metropolitan", "region", "city", "hybrid", "remote", "or"}
+
+
+class Place(NamedTuple):
+    """A resolved location"""
+    name: str
+    country: Optional[str]
+    latitude: float
+    longitude: float
+
+
+def _normalize(text: str) -> str:
+    """Lowercase, strip accents and collapse punctuation/whitespace"""
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode()
+    text = re.sub(r"[^a-z0-9]+", " ", text.lower())
+    return " ".join(text.split())
+
+
+class Gazetteer:
+    """City lookup table loaded lazily from a CSV file; never touches the network"""
+
+    def __init__(self, path: Path = GAZETTEER_PATH):
+        self._path = path
+        self._places: Optional[Dict[str, Place]] = None
+
+    def _load(self) -> Dict[str, Place]:
+        places: Dict[str, Place] = {}
+        with open(self._path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                place = Place(
+                    name=row["name"],
+                    country=row["country"] or None,
+                    latitude=float(row["latitude"]),
+                    longitude=float(row["longitude"]),
+                )
+                names = [row["name"], *filter(None, (row.get("aliases") or "").split("|"))]
+                for name in names:
+                    places.setdefault(_normalize(name), place)
+
+        logger.info("Gazetteer loaded", entries=len(places), path=str(self._path))
+        return places
+
+    @property
+    def places(self) -> Dict[str, Place]:
+        if self._places is None:
+            self._places = self._load()
+        return self._places
+
+    def lookup(self, location: Optional[str]) -> Optional[Place]:
+        """
+        Resolve free-form text such as "Berlin, Germany", "Greater London Area"
+        or "52.52, 13.40" to a place, or None if it is not recognized.
+        """
+        if not location:
+            return None
+
+        match = _COORDINATES.match(location)
+        if match:
+            latitude, longitude = float(match.group(1)), float(match.group(2))
+            if -90 <= latitude <= 90 and -180 <= longitude <= 180:
+                return Place(name=location.strip(), country=None, latitude=latitude, longitude=longitude)
+            return None
+
+        candidates = [location, *re.split(r"[,;/|()]", location)]
+        for candidate in candidates:
+            key = _normalize(candidate)
+            if key in self.places:
+                return self.places[key]
+
+            key = " ".join(word for word in key.split() if word not in _NOISE_WORDS)
+            if key in self.places:
+                return self.places[key]
+
+        return None
+
+
+# Global gazetteer instance
+gazetteer = Gazetteer()
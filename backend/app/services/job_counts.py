@@ -0,0 +1,145 @@
+"""
+Count strategies for job search totals
+"""
+
+import asyncio
+import enum
+import json
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, List, Set, Tuple
+
+import structlog
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.job import Job
+from app.services.cache import cache_service
+
+logger = structlog.get_logger(__name__)
+
+
+class CountMode(str, enum.Enum):
+    """How search totals are computed"""
+    EXACT = "exact"          # COUNT(*) over the filtered set
+    ESTIMATED = "estimated"  # planner row estimate, no table scan
+    CACHED = "cached"        # last exact count for the same filters, refreshed in the background
+
+
+class Explain(Executable, ClauseElement):
+    """EXPLAIN (FORMAT JSON) wrapper that keeps the statement's bound parameters"""
+    inherit_cache = False
+
+    def __init__(self, statement: Any):
+        self.statement = statement
+
+
+@compiles(Explain, "postgresql")
+def _compile_explain(element: Explain, compiler: Any, **kw: Any) -> str:
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
+class JobCountService:
+    """
+    Computes job search totals using exact, estimated or cached strategies.
+
+    Cached totals are kept for at most SEARCH_COUNT_CACHE_MAX_SIGNATURES
+    filter sets, least recently used evicted first, and at most
+    SEARCH_COUNT_MAX_REFRESHES exact counts run in the background at once;
+    a miss beyond that is answered with the estimate and counted later.
+    """
+
+    def __init__(self):
+        # Cached count keys, least recently used first
+        self._keys: "OrderedDict[str, None]" = OrderedDict()
+        self._refreshing: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def count(
+        self,
+        db: AsyncSession,
+        conditions: List[Any],
+        signature: str,
+        mode: CountMode = CountMode.EXACT,
+    ) -> Tuple[int, bool]:
+        """Return (total, is_exact) for the filtered job set"""
+        if mode == CountMode.EXACT:
+            return await self.exact(db, conditions), True
+
+        if mode == CountMode.ESTIMATED:
+            return await self.estimate(db, conditions), False
+
+        return await self.cached(db, conditions, signature), False
+
+    async def exact(self, db: AsyncSession, conditions: List[Any]) -> int:
+        result = await db.execute(
+            select(func.count()).select_from(Job).where(*conditions)
+        )
+        return result.scalar()
+
+    async def estimate(self, db: AsyncSession, conditions: List[Any]) -> int:
+        """Planner estimate of the number of matching rows"""
+        result = await db.execute(Explain(select(Job.id).where(*conditions)))
+        plan = result.scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+    async def cached(self, db: AsyncSession, conditions: List[Any], signature: str) -> int:
+        """
+        Last exact count for these filters. On a miss, answer with the planner
+        estimate and count exactly in the background; stale entries are served
+        while being refreshed.
+        """
+        key = f"job_count:{signature}"
+        entry = await cache_service.get(key)
+
+        if entry is None:
+            self._keys.pop(key, None)
+            self._schedule_refresh(key, conditions)
+            return await self.estimate(db, conditions)
+
+        self._keys[key] = None
+        self._keys.move_to_end(key)
+
+        refresh_after = timedelta(seconds=settings.SEARCH_COUNT_REFRESH_INTERVAL)
+        if datetime.utcnow() - entry["computed_at"] > refresh_after:
+            self._schedule_refresh(key, conditions)
+
+        return entry["total"]
+
+    def _schedule_refresh(self, key: str, conditions: List[Any]) -> None:
+        if key in self._refreshing or len(self._refreshing) >= settings.SEARCH_COUNT_MAX_REFRESHES:
+            return
+
+        self._refreshing.add(key)
+        task = asyncio.create_task(self._refresh(key, conditions))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _refresh(self, key: str, conditions: List[Any]) -> None:
+        try:
+            async with AsyncSessionLocal() as db:
+                total = await self.exact(db, conditions)
+            await cache_service.set(
+                key,
+                {"total": total, "computed_at": datetime.utcnow()},
+                ttl=settings.SEARCH_COUNT_CACHE_TTL,
+            )
+            self._keys[key] = None
+            self._keys.move_to_end(key)
+            while len(self._keys) > settings.SEARCH_COUNT_CACHE_MAX_SIGNATURES:
+                oldest, _ = self._keys.popitem(last=False)
+                await cache_service.delete(oldest)
+        except Exception as e:
+            logger.error("Job count refresh failed", error=str(e), key=key)
+        finally:
+            self._refreshing.discard(key)
+
+
+# Global count service instance
+job_count_service = JobCountService()
@@ -0,0 +1,123 @@
+"""
+Facet counts for job search
+"""
+
+import enum
+from typing import Any, Dict, List
+
+from sqlalchemy import case, distinct, func, select, true, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.job import Company, Job
+from app.services.cache import search_cache
+
+# Upper bounds (exclusive) of the salary buckets, in the job's salary currency
+SALARY_BUCKETS = [50_000, 100_000, 150_000, 200_000]
+
+FACET_NAMES = ["work_type", "experience_level", "is_remote", "industry", "salary_range"]
+
+Facets = Dict[str, Dict[str, int]]
+
+
+def _salary_bucket() -> Any:
+    """Label for the bucket containing a job's top advertised salary"""
+    salary = func.coalesce(Job.salary_max, Job.salary_min)
+    whens = []
+    lower = 0
+    for upper in SALARY_BUCKETS:
+        whens.append((salary < upper, f"{lower}-{upper}"))
+        lower = upper
+    return case((salary.is_(None), "unspecified"), *whens, else_=f"{lower}+")
+
+
+def build_facets_query(conditions: List[Any]) -> Any:
+    """
+    Single aggregate pass computing every facet over the filtered jobs.
+
+    Uses GROUPING SETS so each facet is grouped independently; work_type is
+    unnested laterally and counted with DISTINCT job ids.
+    """
+    filtered = (
+        select(
+            Job.id,
+            Job.work_type,
+            Job.experience_level,
+            Job.is_remote,
+            Company.industry,
+            _salary_bucket().label("salary_range"),
+        )
+        .join(Company, Company.id == Job.company_id)
+        .where(*conditions)
+        .subquery("filtered")
+    )
+    work_types = func.unnest(filtered.c.work_type).table_valued("value").lateral("work_types")
+
+    columns = [
+        work_types.c.value,
+        filtered.c.experience_level,
+        filtered.c.is_remote,
+        filtered.c.industry,
+        filtered.c.salary_range,
+    ]
+
+    return (
+        select(
+            *columns,
+            func.grouping(*columns).label("grouping_id"),
+            func.count(distinct(filtered.c.id)).label("count"),
+        )
+        .select_from(filtered.outerjoin(work_types, true()))
+        .group_by(func.grouping_sets(*[tuple_(column) for column in columns]))
+    )
+
+
+def _facet_key(value: Any) -> str:
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+
+async def get_facets(
+    db: AsyncSession,
+    conditions: List[Any],
+    signature: str,
+    filters: Dict[str, Any],
+    generation: int,
+) -> Facets:
+    """
+    Facet counts for the filtered job set, cached per filter signature
+    alongside the search pages so the same writes invalidate them
+    """
+    cache_key = search_cache.facets_key(signature)
+    cached = await search_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    result = await db.execute(build_facets_query(conditions))
+
+    # GROUPING() sets one bit per column left out of the grouping set, most
+    # significant bit first, so each facet maps to exactly one grouping id
+    size = len(FACET_NAMES)
+    all_bits = (1 << size) - 1
+    facet_by_grouping = {
+        all_bits ^ (1 << (size - 1 - i)): (i, name) for i, name in enumerate(FACET_NAMES)
+    }
+
+    facets: Facets = {name: {} for name in FACET_NAMES}
+    for row in result.all():
+        index, name = facet_by_grouping[row.grouping_id]
+        value = row[index]
+        if value is None:
+            continue
+        facets[name][_facet_key(value)] = row.count
+
+    await search_cache.set(
+        signature, filters, cache_key, facets,
+        company_ids=set(),
+        generation=generation,
+        ttl=settings.SEARCH_FACETS_CACHE_TTL,
+    )
+    return facets
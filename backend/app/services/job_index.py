@@ -0,0 +1,286 @@
+"""
+Offline vector index of active jobs for profile similarity search
+"""
+
+import asyncio
+import math
+import os
+import re
+import tempfile
+import zlib
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+import structlog
+from sqlalchemy import or_, select
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.job import Job, JobStatus
+from app.services.job_ranking import CandidateProfile
+
+logger = structlog.get_logger(__name__)
+
+_TOKEN = re.compile(r"[a-z0-9][a-z0-9+#]*")
+_STOP_WORDS = frozenset(
+    "a an and are as at be by for from has have in is it of on or our the this to we will with you your".split()
+)
+
+# Relative weight of each job field in its vector
+JOB_FIELD_WEIGHTS = {
+    "title": 3.0,
+    "tags": 2.0,
+    "requirements": 1.5,
+    "description": 1.0,
+}
+
+# Relative weight of each profile field in the query vector
+PROFILE_FIELD_WEIGHTS = {
+    "skills": 3.0,
+    "current_role": 2.0,
+    "bio": 1.0,
+}
+
+# Rows allocated up front; the matrix doubles when full
+_INITIAL_CAPACITY = 1024
+
+
+def _tokens(text: str) -> List[str]:
+    """Words and adjacent word pairs, so "machine learning" also matches as a phrase"""
+    words = [w for w in _TOKEN.findall(text.lower()) if w not in _STOP_WORDS]
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+class HashingVectorizer:
+    """
+    Maps text to fixed-size vectors with the hashing trick.
+
+    No vocabulary is kept, so any job can be vectorized on its own and the
+    index never needs refitting. Each token lands in `crc32 % dimensions`
+    with a sign taken from the top hash bit, which keeps collisions from
+    systematically inflating similarity. Term counts are damped with
+    1 + log(tf) and vectors are L2-normalized, so a dot product is cosine.
+    """
+
+    def __init__(self, dimensions: int):
+        self.dimensions = dimensions
+
+    def transform(self, fields: Iterable[Tuple[str, float]]) -> np.ndarray:
+        """Vector for weighted (text, weight) fields"""
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        for text, weight in fields:
+            if not text:
+                continue
+            for token, count in Counter(_tokens(text)).items():
+                h = zlib.crc32(token.encode())
+                sign = -1.0 if h & 0x80000000 else 1.0
+                vector[h % self.dimensions] += sign * weight * (1.0 + math.log(count))
+
+        norm = float(np.linalg.norm(vector))
+        if norm > 0:
+            vector /= norm
+        return vector
+
+    def job_vector(self, job: Any) -> np.ndarray:
+        return self.transform([
+            (job.title, JOB_FIELD_WEIGHTS["title"]),
+            (" ".join(job.tags or []), JOB_FIELD_WEIGHTS["tags"]),
+            (" ".join(job.requirements or []), JOB_FIELD_WEIGHTS["requirements"]),
+            (job.description, JOB_FIELD_WEIGHTS["description"]),
+        ])
+
+    def profile_vector(self, profile: CandidateProfile) -> np.ndarray:
+        return self.transform([
+            # Skills are separate phrases; keep pairs from spanning two of them
+            *((skill, PROFILE_FIELD_WEIGHTS["skills"]) for skill in profile.skills),
+            (profile.current_role, PROFILE_FIELD_WEIGHTS["current_role"]),
+            (profile.bio, PROFILE_FIELD_WEIGHTS["bio"]),
+        ])
+
+
+class SimilarJob(NamedTuple):
+    job_id: Any
+    similarity: float
+
+
+class VectorIndex:
+    """
+    Job vectors in one float32 matrix, one row per job.
+
+    Removed rows are zeroed and reused by later inserts. The matrix moves to
+    an anonymous memory-mapped file once it outgrows JOB_INDEX_MEMMAP_MB, so
+    large catalogues are paged by the OS instead of held on the heap.
+    """
+
+    def __init__(self, dimensions: int, capacity: int = _INITIAL_CAPACITY):
+        self.dimensions = dimensions
+        self._matrix = self._allocate(max(capacity, 1))
+        self._live = np.zeros(len(self._matrix), dtype=bool)
+        self._ids: List[Any] = [None] * len(self._matrix)
+        self._rows: Dict[str, int] = {}
+        self._free: List[int] = []
+        self._used = 0
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, job_id: Any) -> bool:
+        return str(job_id) in self._rows
+
+    @property
+    def memory_mapped(self) -> bool:
+        return isinstance(self._matrix, np.memmap)
+
+    def upsert(self, job_id: Any, vector: np.ndarray) -> None:
+        row = self._rows.get(str(job_id))
+        if row is None:
+            row = self._free.pop() if self._free else self._next_row()
+            self._rows[str(job_id)] = row
+            self._ids[row] = job_id
+            self._live[row] = True
+        self._matrix[row] = vector
+
+    def remove(self, job_id: Any) -> bool:
+        row = self._rows.pop(str(job_id), None)
+        if row is None:
+            return False
+        self._matrix[row] = 0
+        self._live[row] = False
+        self._ids[row] = None
+        self._free.append(row)
+        return True
+
+    def search(self, query: np.ndarray, limit: int, exclude: Iterable[Any] = ()) -> List[SimilarJob]:
+        """Rows with the highest cosine similarity to `query`, best first"""
+        if not self._rows or limit <= 0:
+            return []
+
+        scores = self._matrix[:self._used] @ query
+        scores[~self._live[:self._used]] = -np.inf
+        for job_id in exclude:
+            row = self._rows.get(str(job_id))
+            if row is not None:
+                scores[row] = -np.inf
+
+        limit = min(limit, self._used)
+        top = np.argpartition(-scores, limit - 1)[:limit]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [
+            SimilarJob(job_id=self._ids[i], similarity=round(float(scores[i]), 4))
+            for i in top
+            if scores[i] > 0
+        ]
+
+    def _next_row(self) -> int:
+        if self._used == len(self._matrix):
+            self._grow()
+        self._used += 1
+        return self._used - 1
+
+    def _grow(self) -> None:
+        capacity = len(self._matrix) * 2
+        matrix = self._allocate(capacity)
+        matrix[:self._used] = self._matrix[:self._used]
+        self._matrix = matrix
+        self._live = np.concatenate([self._live, np.zeros(capacity - len(self._live), dtype=bool)])
+        self._ids.extend([None] * (capacity - len(self._ids)))
+
+    def _allocate(self, capacity: int) -> np.ndarray:
+        size = capacity * self.dimensions * np.dtype(np.float32).itemsize
+        if size <= settings.JOB_INDEX_MEMMAP_MB * 1024 * 1024:
+            return np.zeros((capacity, self.dimensions), dtype=np.float32)
+
+        fd, path = tempfile.mkstemp(prefix="job-index-", suffix=".f32", dir=settings.JOB_INDEX_DIR)
+        try:
+            matrix = np.memmap(path, dtype=np.float32, mode="w+", shape=(capacity, self.dimensions))
+        finally:
+            # The mapping outlives the name, and the file goes when it is unmapped
+            os.close(fd)
+            os.unlink(path)
+        logger.info("Job index memory-mapped", rows=capacity, megabytes=size // (1024 * 1024))
+        return matrix
+
+
+def _expired(deadline: Optional[datetime], now: datetime) -> bool:
+    if deadline is None:
+        return False
+    if deadline.tzinfo is None:
+        deadline = deadline.replace(tzinfo=timezone.utc)
+    return deadline <= now
+
+
+class JobVectorIndex:
+    """Keeps a VectorIndex of active, unexpired jobs in sync with the database"""
+
+    def __init__(self):
+        self.vectorizer = HashingVectorizer(settings.JOB_INDEX_DIMENSIONS)
+        self.index = VectorIndex(self.vectorizer.dimensions)
+        self._deadlines: Dict[str, datetime] = {}
+
+    def similar(self, profile: CandidateProfile, limit: int, exclude: Iterable[Any] = ()) -> List[SimilarJob]:
+        """Jobs closest to a candidate's skills, role and bio"""
+        query = self.vectorizer.profile_vector(profile)
+        if not query.any():
+            return []
+        return self.index.search(query, limit, exclude)
+
+    async def rebuild(self) -> None:
+        """Rebuild the index from the database and swap it in"""
+        async with AsyncSessionLocal() as db:
+            rows = (await db.execute(
+                select(
+                    Job.id, Job.title, Job.description, Job.requirements, Job.tags, Job.application_deadline,
+                ).where(
+                    Job.status == JobStatus.ACTIVE,
+                    or_(Job.application_deadline.is_(None), Job.application_deadline > datetime.utcnow()),
+                )
+            )).all()
+
+        # Vectorizing every job is CPU bound; keep it off the event loop
+        index = await asyncio.to_thread(self._build, rows)
+        self.index = index
+        self._deadlines = {
+            str(row.id): row.application_deadline for row in rows if row.application_deadline is not None
+        }
+        logger.info("Job vector index rebuilt", jobs=len(index), memory_mapped=index.memory_mapped)
+
+    def _build(self, rows: Sequence[Any]) -> VectorIndex:
+        index = VectorIndex(self.vectorizer.dimensions, capacity=max(len(rows), _INITIAL_CAPACITY))
+        for row in rows:
+            index.upsert(row.id, self.vectorizer.job_vector(row))
+        return index
+
+    async def expire(self) -> None:
+        """Drop jobs whose application deadline has passed"""
+        now = datetime.now(timezone.utc)
+        expired = [job_id for job_id, deadline in self._deadlines.items() if _expired(deadline, now)]
+        for job_id in expired:
+            self.job_removed(job_id)
+        if expired:
+            logger.info("Expired jobs removed from vector index", jobs=len(expired))
+
+    # Incremental updates from write paths
+
+    def job_saved(self, job: Any) -> None:
+        """A job was created or edited; index it if it is open for applications"""
+        deadline = job.application_deadline
+        if job.status != JobStatus.ACTIVE or _expired(deadline, datetime.now(timezone.utc)):
+            self.job_removed(job.id)
+            return
+
+        self.index.upsert(job.id, self.vectorizer.job_vector(job))
+        if deadline is not None:
+            self._deadlines[str(job.id)] = deadline
+        else:
+            self._deadlines.pop(str(job.id), None)
+
+    def job_removed(self, job_id: Any) -> None:
+        """A job was deleted or closed"""
+        self.index.remove(job_id)
+        self._deadlines.pop(str(job_id), None)
+
+
+# Global job vector index instance
+job_vector_index = JobVectorIndex()
@@ -0,0 +1,354 @@
+"""
+Deterministic pre-ranking of jobs against a candidate profile
+"""
+
+import asyncio
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+import numpy as np
+import structlog
+from sqlalchemy import func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.job import Job, JobStatus, job_requirements
+from app.models.user import Skill, UserProfile, user_skills
+from app.services.geo import gazetteer
+
+logger = structlog.get_logger(__name__)
+
+# Relative weight of each score component; they sum to 1
+WEIGHTS = {
+    "skills": 0.45,
+    "location": 0.20,
+    "salary": 0.15,
+    "experience": 0.20,
+}
+
+# Score used when a component cannot be judged (e.g. no salary advertised)
+NEUTRAL = 0.5
+
+# Typical years of experience for each Job.experience_level
+LEVEL_YEARS = {
+    "ENTRY_LEVEL": 0,
+    "JUNIOR": 1,
+    "MID_LEVEL": 3,
+    "SENIOR": 5,
+    "LEAD": 8,
+    "EXECUTIVE": 12,
+}
+
+# Distances (km) at which an on-site job is a full match and no match at all
+NEARBY_KM = 50
+FAR_KM = 500
+
+# Multiplier for jobs offering none of the candidate's preferred work types
+WORK_TYPE_MISMATCH = 0.8
+
+EARTH_RADIUS_KM = 6371.0
+
+
+def _normalize_skill(name: str) -> str:
+    return " ".join(name.lower().split())
+
+
+class CandidateProfile(NamedTuple):
+    """What pre-ranking knows about a job seeker"""
+    skills: List[str]
+    location: Optional[str]
+    preferred_locations: List[str]
+    remote_work: bool
+    experience_years: int
+    desired_salary_min: Optional[int]
+    desired_salary_max: Optional[int]
+    preferred_work_types: List[str]
+    current_role: Optional[str] = None
+    bio: Optional[str] = None
+
+
+class RankedJob(NamedTuple):
+    """A job with its pre-ranking score and the components behind it"""
+    job_id: Any
+    score: float
+    components: Dict[str, float]
+    reasons: List[str]
+    concerns: List[str]
+
+
+class JobFeatures:
+    """
+    Column-oriented snapshot of the rankable jobs.
+
+    Skill tokens of all jobs are stored flattened (`token_ids`, owned by
+    `token_jobs`) so skill overlap for any candidate is a single isin +
+    bincount instead of a Python loop over jobs.
+    """
+
+    def __init__(self, rows: Sequence[Any], skills_by_job: Dict[Any, List[str]]):
+        self.size = len(rows)
+        self.job_ids = [row.id for row in rows]
+        self.titles = [row.title for row in rows]
+        self.locations = [row.location for row in rows]
+
+        self.token_index: Dict[str, int] = {}
+        self.job_skills: List[List[str]] = []
+        token_ids: List[int] = []
+        token_jobs: List[int] = []
+        for i, row in enumerate(rows):
+            skills = sorted({
+                _normalize_skill(s)
+                for s in [*skills_by_job.get(row.id, []), *(row.tags or []), *(row.keywords or [])]
+                if s and s.strip()
+            })
+            self.job_skills.append(skills)
+            for skill in skills:
+                token_ids.append(self.token_index.setdefault(skill, len(self.token_index)))
+                token_jobs.append(i)
+        self.token_ids = np.asarray(token_ids, dtype=np.int32)
+        self.token_jobs = np.asarray(token_jobs, dtype=np.int32)
+        self.skill_counts = np.bincount(self.token_jobs, minlength=self.size).astype(np.float32)
+
+        def _floats(values: Iterable[Optional[float]]) -> np.ndarray:
+            return np.asarray([np.nan if v is None else v for v in values], dtype=np.float64)
+
+        self.latitude = _floats(row.latitude for row in rows)
+        self.longitude = _floats(row.longitude for row in rows)
+        self.is_remote = np.asarray([bool(row.is_remote) for row in rows], dtype=bool)
+        # Top of the advertised range, falling back to salary_min
+        self.salary_high = _floats(
+            max(s for s in (row.salary_min, row.salary_max) if s is not None)
+            if row.salary_min is not None or row.salary_max is not None else None
+            for row in rows
+        )
+        self.level_years = _floats(LEVEL_YEARS.get(row.experience_level) for row in rows)
+        self.work_types = [set(row.work_type or []) for row in rows]
+
+
+class JobRanker:
+    """Scores every active job for a candidate with vectorized NumPy arithmetic"""
+
+    def __init__(self):
+        self._features: Optional[JobFeatures] = None
+        self._loaded_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def features(self, db: AsyncSession) -> JobFeatures:
+        """Job features, reloaded at most every MATCH_FEATURES_TTL seconds"""
+        if self._features is not None and time.monotonic() - self._loaded_at < settings.MATCH_FEATURES_TTL:
+            return self._features
+
+        async with self._lock:
+            if self._features is None or time.monotonic() - self._loaded_at >= settings.MATCH_FEATURES_TTL:
+                self._features = await self._load(db)
+                self._loaded_at = time.monotonic()
+                logger.info("Job ranking features loaded", jobs=self._features.size)
+        return self._features
+
+    def invalidate(self) -> None:
+        """Reload features on next use instead of waiting out the TTL"""
+        self._features = None
+
+    async def _load(self, db: AsyncSession) -> JobFeatures:
+        rows = (await db.execute(
+            select(
+                Job.id, Job.title, Job.location, Job.latitude, Job.longitude, Job.is_remote,
+                Job.salary_min, Job.salary_max, Job.experience_level, Job.work_type,
+                Job.tags, Job.keywords,
+            ).where(
+                Job.status == JobStatus.ACTIVE,
+                or_(Job.application_deadline.is_(None), Job.application_deadline > datetime.utcnow()),
+            )
+        )).all()
+
+        skills_result = await db.execute(
+            select(job_requirements.c.job_id, func.array_agg(Skill.name))
+            .join(Skill, Skill.id == job_requirements.c.skill_id)
+            .join(Job, Job.id == job_requirements.c.job_id)
+            .where(Job.status == JobStatus.ACTIVE)
+            .group_by(job_requirements.c.job_id)
+        )
+        skills_by_job = {job_id: names for job_id, names in skills_result.all()}
+
+        return JobFeatures(rows, skills_by_job)
+
+    def rank(
+        self,
+        features: JobFeatures,
+        profile: CandidateProfile,
+        limit: int,
+        exclude: Iterable[Any] = (),
+    ) -> List[RankedJob]:
+        """Top `limit` jobs for the candidate, best first, skipping `exclude`d job ids"""
+        if features.size == 0 or limit <= 0:
+            return []
+
+        skills, candidate_skills = self._skill_scores(features, profile)
+        components = {
+            "skills": skills,
+            "location": self._location_scores(features, profile),
+            "salary": self._salary_scores(features, profile),
+            "experience": self._experience_scores(features, profile),
+        }
+        scores = sum(WEIGHTS[name] * values for name, values in components.items())
+
+        if profile.preferred_work_types:
+            preferred = set(profile.preferred_work_types)
+            mismatch = np.asarray([bool(types) and not (types & preferred) for types in features.work_types])
+            scores = np.where(mismatch, scores * WORK_TYPE_MISMATCH, scores)
+
+        excluded = {str(job_id) for job_id in exclude}
+        if excluded:
+            mask = np.asarray([str(job_id) in excluded for job_id in features.job_ids])
+            scores = np.where(mask, -1.0, scores)
+
+        limit = min(limit, features.size)
+        top = np.argpartition(-scores, limit - 1)[:limit]
+        top = top[np.argsort(-scores[top], kind="stable")]
+
+        ranked = []
+        for i in top:
+            if scores[i] < 0:
+                break
+            values = {name: round(float(component[i]), 3) for name, component in components.items()}
+            reasons, concerns = self._explain(features, profile, int(i), values, candidate_skills)
+            ranked.append(RankedJob(
+                job_id=features.job_ids[i],
+                score=round(float(np.clip(scores[i], 0.0, 1.0)), 3),
+                components=values,
+                reasons=reasons,
+                concerns=concerns,
+            ))
+        return ranked
+
+    # Components, each an array of scores in [0, 1] aligned with features.job_ids
+
+    def _skill_scores(self, features: JobFeatures, profile: CandidateProfile) -> Tuple[np.ndarray, Set[str]]:
+        """Cosine similarity of the candidate's and each job's skill sets, and the candidate's skills"""
+        user_skills = {_normalize_skill(s) for s in profile.skills if s}
+        user_tokens = [features.token_index[s] for s in user_skills if s in features.token_index]
+        if not user_skills or features.token_ids.size == 0:
+            return np.zeros(features.size), user_skills
+
+        matched = np.isin(features.token_ids, np.asarray(user_tokens, dtype=np.int32))
+        overlap = np.bincount(features.token_jobs[matched], minlength=features.size)
+        denominator = np.sqrt(features.skill_counts * len(user_skills))
+        scores = np.divide(overlap, denominator, out=np.zeros(features.size), where=denominator > 0)
+        return scores, user_skills
+
+    def _location_scores(self, features: JobFeatures, profile: CandidateProfile) -> np.ndarray:
+        """Remote fit, or distance to the nearest place the candidate wants to work"""
+        places = [
+            place for place in (
+                gazetteer.lookup(name) for name in [profile.location, *profile.preferred_locations]
+            ) if place is not None
+        ]
+
+        scores = np.full(features.size, NEUTRAL)
+        if places:
+            lat = np.radians(np.asarray([p.latitude for p in places]))[:, None]
+            lon = np.radians(np.asarray([p.longitude for p in places]))[:, None]
+            job_lat = np.radians(features.latitude)[None, :]
+            job_lon = np.radians(features.longitude)[None, :]
+            a = (
+                np.sin((job_lat - lat) / 2) ** 2
+                + np.cos(lat) * np.cos(job_lat) * np.sin((job_lon - lon) / 2) ** 2
+            )
+            distance = np.nanmin(
+                2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1))), axis=0, initial=np.inf
+            )
+            known = np.isfinite(distance)
+            scores[known] = np.clip(1 - (distance[known] - NEARBY_KM) / (FAR_KM - NEARBY_KM), 0, 1)
+
+        # Remote jobs suit anyone; best for candidates who asked for remote work
+        return np.where(features.is_remote, 1.0 if profile.remote_work else 0.8, scores)
+
+    def _salary_scores(self, features: JobFeatures, profile: CandidateProfile) -> np.ndarray:
+        """Full score when the advertised top reaches the candidate's minimum, decaying below it"""
+        desired = profile.desired_salary_min or profile.desired_salary_max
+        if not desired:
+            return np.full(features.size, NEUTRAL)
+
+        ratio = features.salary_high / desired
+        scores = np.clip(ratio, 0, 1) ** 2
+        return np.where(np.isnan(features.salary_high), NEUTRAL, scores)
+
+    def _experience_scores(self, features: JobFeatures, profile: CandidateProfile) -> np.ndarray:
+        """Penalize under-qualification steeply and over-qualification gently"""
+        gap = profile.experience_years - features.level_years
+        under = np.clip(1 + gap / 3, 0, 1)
+        over = np.clip(1 - (gap - 4) / 8, 0.3, 1)
+        scores = np.where(gap < 0, under, np.where(gap > 4, over, 1.0))
+        return np.where(np.isnan(features.level_years), NEUTRAL, scores)
+
+    def _explain(
+        self,
+        features: JobFeatures,
+        profile: CandidateProfile,
+        i: int,
+        values: Dict[str, float],
+        user_skills: Set[str],
+    ) -> Tuple[List[str], List[str]]:
+        """Human-readable reasons and concerns behind a job's components"""
+        reasons: List[str] = []
+        concerns: List[str] = []
+
+        job_skills = features.job_skills[i]
+        matched = [s for s in job_skills if s in user_skills]
+        if matched:
+            reasons.append(f"Matches {len(matched)} of {len(job_skills)} listed skills: {', '.join(matched[:5])}")
+        missing = [s for s in job_skills if s not in user_skills]
+        if missing:
+            concerns.append(f"Missing skills: {', '.join(missing[:5])}")
+
+        if features.is_remote[i]:
+            reasons.append("Remote role")
+        elif values["location"] >= 0.8:
+            reasons.append(f"Located in or near {features.locations[i]}")
+        elif values["location"] < 0.3:
+            concerns.append(f"Located in {features.locations[i]}, far from your preferred locations")
+
+        if values["salary"] >= 1.0:
+            reasons.append("Salary meets your target")
+        elif values["salary"] < NEUTRAL:
+            concerns.append("Advertised salary is below your target")
+
+        if values["experience"] >= 1.0:
+            reasons.append(f"Seniority fits your {profile.experience_years} years of experience")
+        elif not np.isnan(features.level_years[i]) and profile.experience_years < features.level_years[i]:
+            concerns.append("Role asks for more experience than your profile shows")
+
+        return reasons, concerns
+
+
+async def load_candidate_profile(db: AsyncSession, user_id: Any) -> CandidateProfile:
+    """Candidate profile and skill names for matching, in two queries"""
+    profile = (await db.execute(
+        select(UserProfile).where(UserProfile.user_id == user_id)
+    )).scalar_one_or_none()
+
+    skills = (await db.execute(
+        select(Skill.name)
+        .join(user_skills, user_skills.c.skill_id == Skill.id)
+        .where(user_skills.c.user_id == user_id)
+    )).scalars().all()
+
+    return CandidateProfile(
+        skills=list(skills),
+        location=profile.location if profile else None,
+        preferred_locations=list(profile.preferred_locations or []) if profile else [],
+        remote_work=bool(profile.remote_work) if profile else False,
+        experience_years=profile.experience_years if profile else 0,
+        desired_salary_min=profile.desired_salary_min if profile else None,
+        desired_salary_max=profile.desired_salary_max if profile else None,
+        preferred_work_types=[
+            getattr(t, "value", t) for t in (profile.preferred_work_types or [])
+        ] if profile else [],
+        current_role=profile.current_role if profile else None,
+        bio=profile.bio if profile else None,
+    )
+
+
+# Global job ranker instance
+job_ranker = JobRanker()
@@ -0,0 +1,311 @@
+"""
+Job search query building
+"""
+
+import hashlib
+import json
+import math
+import re
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import cast, func, literal_column, or_
+from sqlalchemy.dialects.postgresql import REGCONFIG
+
+from app.core.exceptions import ValidationError
+from app.core.pagination import decode_cursor, encode_cursor, keyset_after
+from app.models.job import Job, JobStatus, JOB_SALARY_RANGE, JOB_EARTH_POINT
+from app.services.geo import gazetteer
+
+# Must match the text search configuration used by the jobs_search_vector_update trigger
+SEARCH_CONFIG = "english"
+
+DEFAULT_RADIUS_KM = 50
+
+# ts_rank_cd normalization flag: scale rank into [0, 1) via rank / (rank + 1)
+RANK_NORMALIZATION = 32
+
+
+def text_query(query: str) -> Any:
+    """Parse user input into a tsquery (quotes, OR and -negation are supported)"""
+    return func.websearch_to_tsquery(cast(SEARCH_CONFIG, REGCONFIG), query)
+
+
+def search_rank(query: str) -> Any:
+    """Relevance of a job for the given search text"""
+    return func.ts_rank_cd(Job.search_vector, text_query(query), RANK_NORMALIZATION)
+
+
+def build_job_conditions(
+    query: Optional[str] = None,
+    location: Optional[str] = None,
+    company_id: Optional[str] = None,
+    is_remote: Optional[bool] = None,
+    is_featured: Optional[bool] = None,
+    work_type: Optional[List[str]] = None,
+    experience_level: Optional[str] = None,
+    salary_min: Optional[int] = None,
+    salary_max: Optional[int] = None,
+    tags: Optional[List[str]] = None,
+    near: Optional[str] = None,
+    radius_km: Optional[float] = None,
+) -> List[Any]:
+    """Build WHERE conditions for searching active jobs"""
+    if salary_min is not None and salary_max is not None and salary_min > salary_max:
+        raise ValidationError("salary_min must not exceed salary_max")
+
+    conditions = [Job.status == JobStatus.ACTIVE]
+
+    if query:
+        # Served by the GIN index on search_vector
+        conditions.append(Job.search_vector.op("@@")(text_query(query)))
+
+    if location:
+        conditions.append(Job.location.ilike(f"%{location}%"))
+
+    if is_remote is not None:
+        conditions.append(Job.is_remote == is_remote)
+
+    if is_featured is not None:
+        conditions.append(Job.is_featured == is_featured)
+
+    if company_id:
+        conditions.append(Job.company_id == company_id)
+
+    if work_type:
+        # Any of the requested work types (GIN on work_type)
+        conditions.append(Job.work_type.overlap(work_type))
+
+    if experience_level:
+        conditions.append(Job.experience_level == experience_level)
+
+    if tags:
+        # All of the requested tags (GIN on tags)
+        conditions.append(Job.tags.contains(tags))
+
+    if salary_min is not None or salary_max is not None:
+        # Advertised range overlaps the requested one (GiST on the salary range);
+        # jobs without any salary information are excluded
+        requested = func.int4range(salary_min, salary_max, literal_column("'[]'"))
+        conditions.append(or_(Job.salary_min.isnot(None), Job.salary_max.isnot(None)))
+        conditions.append(JOB_SALARY_RANGE.op("&&")(requested))
+
+    if near:
+        conditions.extend(radius_conditions(near, radius_km or DEFAULT_RADIUS_KM))
+
+    return conditions
+
+
+def radius_conditions(near: str, radius_km: float) -> List[Any]:
+    """Jobs within radius_km of a place name or "lat,lon" pair"""
+    place = gazetteer.lookup(near)
+    if place is None:
+        raise ValidationError(f"Unknown location: {near}")
+
+    center = func.ll_to_earth(place.latitude, place.longitude)
+    radius_m = radius_km * 1000
+    return [
+        # Bounding cube, served by the GiST index on ll_to_earth(latitude, longitude)
+        func.earth_box(center, radius_m).op("@>")(JOB_EARTH_POINT),
+        # Exact great-circle check for the corners of the cube
+        func.earth_distance(center, JOB_EARTH_POINT) <= radius_m,
+    ]
+
+
+def filter_signature(**filters: Any) -> str:
+    """
+    Stable hash of a set of search filters. Unset filters are dropped, text is
+    normalized and list values sorted so equivalent searches share a signature.
+    """
+    normalized = {}
+    for name, value in filters.items():
+        if value is None or value == []:
+            continue
+        if isinstance(value, str):
+            value = " ".join(value.lower().split())
+        elif isinstance(value, (list, tuple, set)):
+            value = sorted(str(v) for v in value)
+        normalized[name] = value
+
+    payload = json.dumps(normalized, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+# Fields of a job that search filters look at
+SNAPSHOT_FIELDS = [
+    "status", "title", "description", "tags", "keywords", "location", "is_remote",
+    "is_featured", "company_id", "work_type", "experience_level", "salary_min",
+    "salary_max", "latitude", "longitude",
+]
+
+# Matches earthdistance's earth() radius, in meters
+EARTH_RADIUS_M = 6378168
+
+
+def job_snapshot(job: Any) -> Dict[str, Any]:
+    """Copy of the fields search filters look at, taken before a job is changed"""
+    return {field: getattr(job, field) for field in SNAPSHOT_FIELDS}
+
+
+# Endings the english stemmer may remove or rewrite, longest first
+_STEM_SUFFIXES = sorted(
+    [
+        "ational", "tional", "ization", "fulness", "ousness", "iveness", "biliti", "ation", "ement",
+        "ments", "ment", "ness", "ingly", "edly", "ings", "ing", "ies", "ied", "eed", "able", "ible",
+        "ance", "ence", "ator", "ism", "ist", "iti", "ity", "ive", "ize", "ise", "ous", "ful", "ant",
+        "ent", "al", "ic", "er", "ed", "es", "ly", "s",
+    ],
+    key=len,
+    reverse=True,
+)
+
+
+def _stem_prefix(word: str) -> Optional[str]:
+    """
+    Up to four leading characters every word sharing `word`'s english stem
+    starts with, or None when the stem may be too short to tell.
+
+    Strips a known ending, then a final e/i/y and a doubled consonant, which
+    the stemmer may add, rewrite or undouble ("hoping" -> "hope",
+    "running" -> "run"). Cutting too much only weakens the check.
+    """
+    core = word.replace("'", "")
+    for suffix in _STEM_SUFFIXES:
+        if core.endswith(suffix) and len(core) > len(suffix):
+            core = core[:-len(suffix)]
+            break
+    core = core.rstrip("eiy")
+    if len(core) > 1 and core[-1] == core[-2] and core[-1] not in "aeiou":
+        core = core[:-1]
+    if len(core) < 2:
+        return None
+    return core[:4]
+
+
+def _text_terms(query: str) -> Optional[List[str]]:
+    """
+    Leading characters of the positive search terms' stems, or None when
+    every job could match (e.g. only negated terms, or a stem too short to
+    compare). A job whose text lacks all of these cannot match the tsquery.
+    """
+    terms = []
+    for word in re.findall(r"-?[\w']+", query.lower()):
+        if word.startswith("-") or word == "or":
+            continue
+        term = _stem_prefix(word)
+        if term is None:
+            return None
+        terms.append(term)
+    return terms or None
+
+
+def _distance_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+
+def job_could_match(job: Dict[str, Any], filters: Dict[str, Any]) -> bool:
+    """
+    Whether a job snapshot might satisfy the search filters, mirroring
+    build_job_conditions. Errs on the side of True: a false positive only
+    costs a cache entry, a false negative would serve a stale page.
+    """
+    if job["status"] != JobStatus.ACTIVE:
+        return False
+
+    query = filters.get("query")
+    if query:
+        terms = _text_terms(query)
+        if terms is not None:
+            text = " ".join(
+                [job["title"] or "", job["description"] or "", *(job["tags"] or []), *(job["keywords"] or [])]
+            ).lower()
+            if not any(term in text for term in terms):
+                return False
+
+    location = filters.get("location")
+    if location and "%" not in location and "_" not in location:
+        if location.lower() not in (job["location"] or "").lower():
+            return False
+
+    for field in ("is_remote", "is_featured"):
+        if filters.get(field) is not None and job[field] != filters[field]:
+            return False
+
+    if filters.get("company_id") and str(job["company_id"]) != str(filters["company_id"]):
+        return False
+
+    if filters.get("work_type") and not set(filters["work_type"]) & set(job["work_type"] or []):
+        return False
+
+    if filters.get("experience_level") and job["experience_level"] != filters["experience_level"]:
+        return False
+
+    if filters.get("tags") and not set(filters["tags"]) <= set(job["tags"] or []):
+        return False
+
+    salary_min, salary_max = filters.get("salary_min"), filters.get("salary_max")
+    if salary_min is not None or salary_max is not None:
+        advertised = [s for s in (job["salary_min"], job["salary_max"]) if s is not None]
+        if not advertised:
+            return False
+        if salary_min is not None and max(advertised) < salary_min:
+            return False
+        if salary_max is not None and min(advertised) > salary_max:
+            return False
+
+    near = filters.get("near")
+    if near:
+        place = gazetteer.lookup(near)
+        if job["latitude"] is None or job["longitude"] is None or place is None:
+            return False
+        radius_m = (filters.get("radius_km") or DEFAULT_RADIUS_KM) * 1000
+        # Small slack for floating point differences with earth_distance
+        distance = _distance_m(place.latitude, place.longitude, job["latitude"], job["longitude"])
+        if distance > radius_m * 1.001:
+            return False
+
+    return True
+
+
+def _sort_key(query: Optional[str] = None) -> Tuple[List[Any], List[bool]]:
+    """Columns of the stable sort key, and whether each may be NULL"""
+    columns = [Job.published_at, Job.id]
+    nullable = [True, False]
+    if query:
+        columns.insert(0, search_rank(query))
+        nullable.insert(0, False)
+    return columns, nullable
+
+
+def job_ordering(query: Optional[str] = None) -> List[Any]:
+    """ORDER BY clauses: most relevant first when searching, newest first otherwise"""
+    columns, _ = _sort_key(query)
+    return [column.desc().nulls_last() for column in columns]
+
+
+def cursor_condition(cursor: str, query: Optional[str] = None) -> Any:
+    """Condition selecting jobs that come after the given cursor"""
+    columns, nullable = _sort_key(query)
+    values = decode_cursor(cursor, len(columns))
+
+    try:
+        *rank, published_at, job_id = values
+        values = [float(r) for r in rank] + [
+            datetime.fromisoformat(published_at) if published_at else None,
+            UUID(job_id),
+        ]
+    except (TypeError, ValueError):
+        raise ValidationError("Invalid cursor")
+
+    return keyset_after(columns, values, nullable)
+
+
+def next_cursor(job: Job, rank: Optional[float] = None) -> str:
+    """Cursor pointing just past the given job"""
+    values = [job.published_at, job.id]
+    if rank is not None:
+        values.insert(0, rank)
+    return encode_cursor(values)
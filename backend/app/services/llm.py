@@ -0,0 +1,253 @@
+"""
+LLM completions, whole or streamed, with a persistent response cache
+"""
+
+import asyncio
+import hashlib
+import json
+from datetime import timedelta
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, NamedTuple, Optional
+
+import structlog
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.metrics import metrics
+from app.models.ai import LLMResponseCache
+from app.services.llm_gateway import Priority, ProviderResponse, llm_gateway
+from app.services.prompt_builder import count_message_tokens, count_tokens, record_usage
+
+logger = structlog.get_logger(__name__)
+
+DEFAULT_MODEL = "gpt-4"
+
+Messages = List[Dict[str, str]]
+
+_lookups = metrics.counter("llm_cache_lookups_total", "LLM response cache lookups by result")
+_evicted = metrics.counter("llm_cache_evicted_rows_total", "LLM response cache rows removed by eviction")
+_streams_abandoned = metrics.counter("llm_streams_abandoned_total", "Streamed completions closed before the end")
+_flights = metrics.counter("llm_flights_total", "Completions actually computed, from the cache or upstream")
+_coalesced = metrics.counter("llm_coalesced_total", "Completion requests that joined an identical one in flight")
+_in_flight = metrics.gauge("llm_in_flight", "Distinct completions currently being computed")
+
+
+class Completion(NamedTuple):
+    content: str
+    cached: bool
+
+
+def request_key(model: str, messages: Messages, params: Dict[str, Any]) -> str:
+    """
+    Stable hash of everything that determines a completion.
+
+    Whitespace in message content is collapsed first; prompts built from
+    templates and user input differ in it without changing the answer.
+    """
+    normalized = [
+        {**message, "content": " ".join((message.get("content") or "").split())} for message in messages
+    ]
+    payload = json.dumps(
+        {"model": model, "messages": normalized, "params": params},
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class LLMService:
+    """
+    Chat completions backed by a Postgres response cache.
+
+    Identical requests (same model, messages and sampling parameters) are
+    answered from `llm_response_cache` until LLM_CACHE_TTL passes. A bypass
+    skips the lookup but still stores the fresh answer. Cache errors never
+    fail a completion; they only cost the upstream call.
+
+    Concurrent identical requests are coalesced: the first starts the work
+    as its own task and the rest await the same task, so one upstream call
+    serves all of them. The task is shielded from its callers, so a client
+    that goes away neither cancels it for the others nor wastes the answer,
+    which still lands in the cache.
+    """
+
+    def __init__(self):
+        self._flights: Dict[str, "asyncio.Task[Completion]"] = {}
+        _in_flight.set_function(lambda: len(self._flights))
+
+    @property
+    def configured(self) -> bool:
+        return llm_gateway.configured
+
+    async def complete(
+        self,
+        messages: Messages,
+        *,
+        model: str = DEFAULT_MODEL,
+        temperature: float = 0.7,
+        max_tokens: int = 1000,
+        use_cache: bool = True,
+        endpoint: str = "unknown",
+        priority: Priority = Priority.INTERACTIVE,
+    ) -> Completion:
+        """Completion text for `messages`, from the cache when possible; token usage is recorded per `endpoint`"""
+        params = {"temperature": temperature, "max_tokens": max_tokens}
+        key = request_key(model, messages, params)
+
+        async def compute() -> Completion:
+            cached = await self._lookup(key, use_cache)
+            if cached is not None:
+                record_usage(endpoint, count_message_tokens(messages), count_tokens(cached), cached=True)
+                return Completion(content=cached, cached=True)
+
+            response = await llm_gateway.complete(model, messages, priority=priority, **params)
+            record_usage(
+                endpoint,
+                response.prompt_tokens if response.prompt_tokens is not None else count_message_tokens(messages),
+                response.completion_tokens if response.completion_tokens is not None else count_tokens(response.content),
+            )
+            await self._cache_set(key, model, response)
+            return Completion(content=response.content, cached=False)
+
+        # A bypass must not be answered by a flight that may read the cache
+        return await self._single_flight(f"{key}:{'cache' if use_cache else 'fresh'}", compute)
+
+    async def _single_flight(self, key: str, compute: Callable[[], Awaitable[Completion]]) -> Completion:
+        task = self._flights.get(key)
+        if task is None:
+            task = asyncio.ensure_future(compute())
+            self._flights[key] = task
+            task.add_done_callback(lambda done: self._land(key, done))
+            _flights.inc()
+        else:
+            _coalesced.inc()
+        return await asyncio.shield(task)
+
+    def _land(self, key: str, task: "asyncio.Task[Completion]") -> None:
+        if self._flights.get(key) is task:
+            del self._flights[key]
+        # Every caller may have gone away; don't leave the error unretrieved
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("LLM completion failed", error=str(task.exception()))
+
+    async def stream(
+        self,
+        messages: Messages,
+        *,
+        model: str = DEFAULT_MODEL,
+        temperature: float = 0.7,
+        max_tokens: int = 1000,
+        use_cache: bool = True,
+        endpoint: str = "unknown",
+        priority: Priority = Priority.INTERACTIVE,
+    ) -> AsyncIterator[str]:
+        """
+        Completion text for `messages` as it is generated.
+
+        A cached response arrives as a single chunk. Closing the iterator
+        before the end (e.g. the client went away) closes the upstream
+        connection so OpenAI stops generating, and nothing is cached.
+        """
+        params = {"temperature": temperature, "max_tokens": max_tokens}
+        key = request_key(model, messages, params)
+
+        cached = await self._lookup(key, use_cache)
+        if cached is not None:
+            record_usage(endpoint, count_message_tokens(messages), count_tokens(cached), cached=True)
+            yield cached
+            return
+
+        chunks = llm_gateway.stream(model, messages, priority=priority, **params)
+        parts: List[str] = []
+        finished = False
+        try:
+            async for chunk in chunks:
+                parts.append(chunk)
+                yield chunk
+            finished = True
+        finally:
+            # Streams carry no usage; estimate what was generated, even if abandoned
+            record_usage(endpoint, count_message_tokens(messages), count_tokens("".join(parts)))
+            if not finished:
+                # Closing the gateway stream closes the upstream connection
+                await chunks.aclose()
+                _streams_abandoned.inc()
+                logger.info("LLM stream abandoned", model=model, chunks=len(parts))
+
+        content = "".join(parts)
+        await self._cache_set(key, model, ProviderResponse(content=content, prompt_tokens=None, completion_tokens=None))
+
+    async def _lookup(self, key: str, use_cache: bool) -> Optional[str]:
+        if not use_cache:
+            _lookups.inc(result="bypass")
+            return None
+
+        cached = await self._cache_get(key)
+        _lookups.inc(result="miss" if cached is None else "hit")
+        return cached
+
+    async def _cache_get(self, key: str) -> Optional[str]:
+        try:
+            async with AsyncSessionLocal() as db:
+                # Record the hit and read the response in one round trip
+                result = await db.execute(
+                    update(LLMResponseCache)
+                    .where(LLMResponseCache.key == key, LLMResponseCache.expires_at > func.now())
+                    .values(hit_count=LLMResponseCache.hit_count + 1, last_accessed_at=func.now())
+                    .returning(LLMResponseCache.response)
+                )
+                response = result.scalar_one_or_none()
+                await db.commit()
+                return response
+        except Exception as e:
+            logger.warning("LLM cache read failed", error=str(e))
+            return None
+
+    async def _cache_set(self, key: str, model: str, response: ProviderResponse) -> None:
+        values = {
+            "model": model,
+            "response": response.content,
+            "prompt_tokens": response.prompt_tokens,
+            "completion_tokens": response.completion_tokens,
+            "hit_count": 0,
+            "created_at": func.now(),
+            "last_accessed_at": func.now(),
+            "expires_at": func.now() + timedelta(seconds=settings.LLM_CACHE_TTL),
+        }
+        try:
+            async with AsyncSessionLocal() as db:
+                await db.execute(
+                    pg_insert(LLMResponseCache)
+                    .values(key=key, **values)
+                    .on_conflict_do_update(index_elements=[LLMResponseCache.key], set_=values)
+                )
+                await db.commit()
+        except Exception as e:
+            logger.warning("LLM cache write failed", error=str(e))
+
+    async def evict(self) -> None:
+        """Delete expired responses, then the least recently used beyond LLM_CACHE_MAX_ENTRIES"""
+        async with AsyncSessionLocal() as db:
+            expired = await db.execute(
+                delete(LLMResponseCache).where(LLMResponseCache.expires_at <= func.now())
+            )
+            overflow = (
+                select(LLMResponseCache.key)
+                .order_by(LLMResponseCache.last_accessed_at.desc())
+                .offset(settings.LLM_CACHE_MAX_ENTRIES)
+            )
+            evicted = await db.execute(
+                delete(LLMResponseCache).where(LLMResponseCache.key.in_(overflow))
+            )
+            await db.commit()
+
+        removed = expired.rowcount + evicted.rowcount
+        if removed:
+            _evicted.inc(removed)
+            logger.info("LLM cache evicted", expired=expired.rowcount, overflow=evicted.rowcount)
+
+
+# Global LLM service instance
+llm_service = LLMService()
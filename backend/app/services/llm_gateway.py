@@ -0,0 +1,374 @@
+"""
+Bounded-concurrency gateway between the application and LLM providers
+"""
+
+import asyncio
+import enum
+import hashlib
+import heapq
+import itertools
+import random
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+import openai
+import structlog
+from openai import AsyncOpenAI
+
+from app.core.config import settings
+from app.core.exceptions import AIError
+from app.core.metrics import metrics
+
+logger = structlog.get_logger(__name__)
+
+Messages = List[Dict[str, str]]
+
+_queued = metrics.gauge("llm_gateway_queued", "Requests waiting for a concurrency slot, by model")
+_active = metrics.gauge("llm_gateway_active", "Requests holding a concurrency slot, by model")
+_retries = metrics.counter("llm_gateway_retries_total", "Upstream calls retried after a transient failure, by model")
+_rejected = metrics.counter("llm_gateway_rejected_total", "Requests failed fast by the gateway, by model and reason")
+_circuit = metrics.gauge("llm_gateway_circuit_open", "1 while a model's circuit breaker is open")
+
+
+class Priority(enum.IntEnum):
+    """Queue order for a concurrency slot; lower goes first"""
+    INTERACTIVE = 0  # a user is waiting on the response
+    BATCH = 1  # background work
+
+
+class ProviderResponse(NamedTuple):
+    content: str
+    prompt_tokens: Optional[int]
+    completion_tokens: Optional[int]
+
+
+class TransientError(Exception):
+    """Upstream failure worth retrying: rate limits, timeouts, 5xx"""
+
+
+# Providers
+
+_TRANSIENT_OPENAI_ERRORS = (
+    openai.RateLimitError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+)
+
+
+@contextmanager
+def _openai_errors() -> Iterator[None]:
+    try:
+        yield
+    except _TRANSIENT_OPENAI_ERRORS as e:
+        raise TransientError(str(e)) from e
+
+
+class OpenAIProvider:
+    """Chat completions from the OpenAI API"""
+
+    def __init__(self):
+        self._client: Optional[AsyncOpenAI] = None
+
+    @property
+    def configured(self) -> bool:
+        return bool(settings.OPENAI_API_KEY)
+
+    @property
+    def client(self) -> AsyncOpenAI:
+        if not self.configured:
+            raise AIError("AI service is not configured")
+        if self._client is None:
+            # Retries and timeouts are the gateway's job
+            self._client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY, max_retries=0)
+        return self._client
+
+    async def complete(self, model: str, messages: Messages, temperature: float, max_tokens: int) -> ProviderResponse:
+        with _openai_errors():
+            response = await self.client.chat.completions.create(
+                model=model, messages=messages, temperature=temperature, max_tokens=max_tokens
+            )
+        usage = response.usage
+        return ProviderResponse(
+            content=response.choices[0].message.content or "",
+            prompt_tokens=usage.prompt_tokens if usage else None,
+            completion_tokens=usage.completion_tokens if usage else None,
+        )
+
+    async def stream(
+        self, model: str, messages: Messages, temperature: float, max_tokens: int
+    ) -> AsyncIterator[str]:
+        with _openai_errors():
+            upstream = await self.client.chat.completions.create(
+                model=model, messages=messages, temperature=temperature, max_tokens=max_tokens, stream=True
+            )
+        try:
+            async for chunk in upstream:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    yield delta
+        finally:
+            # Stops generation upstream when the caller goes away mid-stream.
+            # AsyncStream has no close() in the pinned openai; close its response
+            await upstream.response.aclose()
+
+
+class FakeProvider:
+    """
+    Offline provider for load tests and local development.
+
+    Answers are derived from a hash of the request, so identical requests get
+    identical answers. Latency and the share of transient failures come from
+    LLM_FAKE_LATENCY and LLM_FAKE_ERROR_RATE.
+    """
+
+    configured = True
+
+    def _answer(self, model: str, messages: Messages, max_tokens: int) -> str:
+        digest = hashlib.sha256(repr((model, messages)).encode()).hexdigest()
+        words = [digest[i:i + 4] for i in range(0, len(digest), 4)]
+        return " ".join(words[:max(1, min(len(words), max_tokens))])
+
+    async def _delay(self) -> None:
+        await asyncio.sleep(settings.LLM_FAKE_LATENCY * random.uniform(0.5, 1.5))
+        if random.random() < settings.LLM_FAKE_ERROR_RATE:
+            raise TransientError("Fake provider failure")
+
+    async def complete(self, model: str, messages: Messages, temperature: float, max_tokens: int) -> ProviderResponse:
+        await self._delay()
+        content = self._answer(model, messages, max_tokens)
+        prompt_tokens = sum(len(message.get("content", "").split()) for message in messages)
+        return ProviderResponse(content=content, prompt_tokens=prompt_tokens, completion_tokens=len(content.split()))
+
+    async def stream(
+        self, model: str, messages: Messages, temperature: float, max_tokens: int
+    ) -> AsyncIterator[str]:
+        await self._delay()
+        for word in self._answer(model, messages, max_tokens).split():
+            await asyncio.sleep(settings.LLM_FAKE_LATENCY / 20)
+            yield word + " "
+
+
+PROVIDERS = {
+    "openai": OpenAIProvider,
+    "fake": FakeProvider,
+}
+
+
+# Gateway
+
+class CircuitBreaker:
+    """
+    Fails fast after LLM_CIRCUIT_FAILURE_THRESHOLD consecutive transient
+    failures. After LLM_CIRCUIT_RESET_TIMEOUT one probe request is let
+    through; its success closes the circuit, its failure reopens it.
+    """
+
+    def __init__(self, model: str):
+        self.model = model
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+
+    def allow(self) -> bool:
+        if self._opened_at is None:
+            return True
+        if self._probing or time.monotonic() - self._opened_at < settings.LLM_CIRCUIT_RESET_TIMEOUT:
+            return False
+        self._probing = True
+        return True
+
+    def record_success(self) -> None:
+        if self._opened_at is not None:
+            logger.info("LLM circuit closed", model=self.model)
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+        _circuit.set(0, model=self.model)
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self._probing or self._failures >= settings.LLM_CIRCUIT_FAILURE_THRESHOLD:
+            if self._opened_at is None:
+                logger.warning("LLM circuit opened", model=self.model, failures=self._failures)
+            self._opened_at = time.monotonic()
+            self._probing = False
+            _circuit.set(1, model=self.model)
+
+    def release_probe(self) -> None:
+        """The probe ended without a verdict (e.g. a non-transient error)"""
+        self._probing = False
+
+
+class _Lane:
+    """Concurrency slots of one model, granted in priority order, FIFO within a priority"""
+
+    def __init__(self, model: str, limit: int):
+        self.model = model
+        self.limit = limit
+        self.breaker = CircuitBreaker(model)
+        self._active = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        _queued.set_function(lambda: sum(not f.done() for _, _, f in self._waiters), model=model)
+        _active.set_function(lambda: self._active, model=model)
+
+    @asynccontextmanager
+    async def slot(self, priority: Priority, deadline: float) -> AsyncIterator[None]:
+        await self._acquire(priority, deadline)
+        try:
+            yield
+        finally:
+            self._release()
+
+    async def _acquire(self, priority: Priority, deadline: float) -> None:
+        if self._active < self.limit and not self._waiters:
+            self._active += 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (int(priority), next(self._sequence), future))
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout=max(0.0, deadline - time.monotonic()))
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if future.done() and not future.cancelled():
+                # The slot was handed over as we gave up; pass it on
+                self._release()
+            else:
+                future.cancel()
+            if isinstance(e, asyncio.TimeoutError):
+                _rejected.inc(model=self.model, reason="queue_timeout")
+                raise AIError("AI service is busy, please retry") from None
+            raise
+
+    def _release(self) -> None:
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                # The slot moves to the waiter without ever becoming free
+                future.set_result(None)
+                return
+        self._active -= 1
+
+
+class LLMGateway:
+    """
+    Every upstream LLM call goes through here.
+
+    Per model, at most LLM_MAX_CONCURRENCY calls (or the model's entry in
+    LLM_MODEL_CONCURRENCY) run at once; the rest queue by priority. Each
+    request has a deadline covering queueing, retries and the calls
+    themselves. Transient failures are retried with exponential backoff and
+    full jitter, and feed a per-model circuit breaker that rejects requests
+    outright while the upstream is failing.
+    """
+
+    def __init__(self, provider: Optional[Any] = None):
+        self.provider = provider or PROVIDERS[settings.LLM_PROVIDER]()
+        self._lanes: Dict[str, _Lane] = {}
+
+    @property
+    def configured(self) -> bool:
+        return self.provider.configured
+
+    def _lane(self, model: str) -> _Lane:
+        lane = self._lanes.get(model)
+        if lane is None:
+            limit = settings.LLM_MODEL_CONCURRENCY.get(model, settings.LLM_MAX_CONCURRENCY)
+            lane = self._lanes[model] = _Lane(model, limit)
+        return lane
+
+    async def complete(
+        self,
+        model: str,
+        messages: Messages,
+        *,
+        temperature: float,
+        max_tokens: int,
+        priority: Priority = Priority.INTERACTIVE,
+        timeout: Optional[float] = None,
+    ) -> ProviderResponse:
+        deadline = time.monotonic() + (timeout or settings.LLM_REQUEST_TIMEOUT)
+        return await self._call(
+            model, priority, deadline,
+            lambda: self.provider.complete(model, messages, temperature, max_tokens),
+        )
+
+    async def stream(
+        self,
+        model: str,
+        messages: Messages,
+        *,
+        temperature: float,
+        max_tokens: int,
+        priority: Priority = Priority.INTERACTIVE,
+        timeout: Optional[float] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Stream a completion while holding a slot. Retries apply until the
+        first chunk arrives; the deadline bounds the wait for it, not the
+        length of the stream.
+        """
+        deadline = time.monotonic() + (timeout or settings.LLM_REQUEST_TIMEOUT)
+        lane = self._lane(model)
+
+        async def first_chunk() -> Tuple[Any, Optional[str]]:
+            chunks = self.provider.stream(model, messages, temperature, max_tokens)
+            try:
+                return chunks, await chunks.__anext__()
+            except StopAsyncIteration:
+                return chunks, None
+            except BaseException:
+                await chunks.aclose()
+                raise
+
+        async with lane.slot(priority, deadline):
+            chunks, first = await self._attempts(lane, deadline, first_chunk)
+            try:
+                if first is None:
+                    return
+                yield first
+                async for chunk in chunks:
+                    yield chunk
+            finally:
+                await chunks.aclose()
+
+    async def _call(self, model: str, priority: Priority, deadline: float, call: Any) -> Any:
+        lane = self._lane(model)
+        async with lane.slot(priority, deadline):
+            return await self._attempts(lane, deadline, call)
+
+    async def _attempts(self, lane: _Lane, deadline: float, call: Any) -> Any:
+        for attempt in range(settings.LLM_MAX_RETRIES + 1):
+            if not lane.breaker.allow():
+                _rejected.inc(model=lane.model, reason="circuit_open")
+                raise AIError("AI service is temporarily unavailable")
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                lane.breaker.release_probe()
+                _rejected.inc(model=lane.model, reason="deadline")
+                raise AIError("AI request timed out")
+
+            try:
+                result = await asyncio.wait_for(call(), timeout=remaining)
+            except (TransientError, asyncio.TimeoutError) as e:
+                lane.breaker.record_failure()
+                delay = random.uniform(0, min(settings.LLM_RETRY_MAX_DELAY, settings.LLM_RETRY_BASE_DELAY * 2 ** attempt))
+                if attempt == settings.LLM_MAX_RETRIES or time.monotonic() + delay >= deadline:
+                    logger.error("LLM call failed", model=lane.model, attempts=attempt + 1, error=str(e) or type(e).__name__)
+                    raise AIError("AI service error") from e
+                _retries.inc(model=lane.model)
+                logger.warning("LLM call failed, retrying", model=lane.model, attempt=attempt + 1, delay=round(delay, 2))
+                await asyncio.sleep(delay)
+            except BaseException:
+                lane.breaker.release_probe()
+                raise
+            else:
+                lane.breaker.record_success()
+                return result
+
+
+# Global LLM gateway instance
+llm_gateway = LLMGateway()
@@ -0,0 +1,90 @@
+"""
+Request-scoped batch loaders for related rows
+"""
+
+import asyncio
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from fastapi import Depends
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import get_async_db
+from app.models.job import Company, Job
+
+
+class BatchLoader:
+    """
+    DataLoader-style batching by primary key.
+
+    Keys requested during the same event loop tick are collected and resolved
+    with a single `WHERE id IN (...)` query. Results are memoized for the
+    lifetime of the loader, which should be one request.
+    """
+
+    def __init__(self, db: AsyncSession, model: Any):
+        self._db = db
+        self._model = model
+        self._futures: Dict[str, asyncio.Future] = {}
+        self._pending: List[str] = []
+        # The event loop only keeps weak references to running tasks
+        self._dispatches: Set["asyncio.Task[None]"] = set()
+        # AsyncSession does not allow concurrent statements
+        self._lock = asyncio.Lock()
+
+    def load(self, key: Any) -> "asyncio.Future[Optional[Any]]":
+        """Schedule a key for the next batch; resolves to the row or None"""
+        key = str(key)
+        if key in self._futures:
+            return self._futures[key]
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._futures[key] = future
+        self._pending.append(key)
+
+        if len(self._pending) == 1:
+            loop.call_soon(self._start_dispatch)
+
+        return future
+
+    def _start_dispatch(self) -> None:
+        task = asyncio.ensure_future(self._dispatch())
+        self._dispatches.add(task)
+        task.add_done_callback(self._dispatches.discard)
+
+    async def load_many(self, keys: Iterable[Any]) -> List[Optional[Any]]:
+        """Load several keys in one batch, preserving order"""
+        return list(await asyncio.gather(*(self.load(key) for key in keys)))
+
+    async def _dispatch(self) -> None:
+        keys, self._pending = self._pending, []
+        if not keys:
+            return
+
+        try:
+            async with self._lock:
+                result = await self._db.execute(
+                    select(self._model).where(self._model.id.in_(keys))
+                )
+                rows = {str(row.id): row for row in result.scalars().all()}
+        except Exception as e:
+            for key in keys:
+                self._futures[key].set_exception(e)
+            return
+
+        for key in keys:
+            self._futures[key].set_result(rows.get(key))
+
+
+class Loaders:
+    """Batch loaders available to a single request"""
+
+    def __init__(self, db: AsyncSession):
+        self.company = BatchLoader(db, Company)
+        self.job = BatchLoader(db, Job)
+
+
+def get_loaders(db: AsyncSession = Depends(get_async_db)) -> Loaders:
+    """Dependency providing request-scoped batch loaders"""
+    return Loaders(db)
@@ -0,0 +1,118 @@
+"""
+Precomputed job match scores maintained in the background
+"""
+
+from itertools import islice
+from typing import Any, Dict
+
+import structlog
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.metrics import metrics
+from app.models.ai import JobMatchRefresh, JobMatchScore
+from app.models.job import Application
+from app.services.job_ranking import job_ranker, load_candidate_profile
+
+logger = structlog.get_logger(__name__)
+
+_refreshed = metrics.counter("match_scores_refreshed_total", "Users whose stored job matches were recomputed")
+_failures = metrics.counter("match_scores_refresh_failures_total", "Failed job match recomputations")
+_backlog = metrics.gauge("match_scores_backlog", "Users waiting for their job matches to be recomputed")
+
+
+class MatchScoreWorker:
+    """
+    Keeps each user's top MATCH_SCORES_TOP_N jobs in `job_match_scores`.
+
+    Write paths mark users whose profile or skills changed and note when a
+    job is published; each tick recomputes up to MATCH_SCORES_BATCH_SIZE
+    marked users with the local ranker, oldest mark first. A publish marks
+    every user whose matches were computed, since the new job may belong in
+    any of their lists, including lists that came out empty.
+    """
+
+    def __init__(self):
+        # Insertion-ordered set of user ids
+        self._pending: Dict[str, None] = {}
+        self._job_published = False
+        _backlog.set_function(lambda: len(self._pending))
+
+    def user_changed(self, user_id: Any) -> None:
+        """A user's profile or skills changed"""
+        self._pending.setdefault(str(user_id), None)
+
+    def job_published(self) -> None:
+        """A job became visible to job seekers"""
+        self._job_published = True
+
+    async def run_once(self) -> None:
+        """Recompute the next batch of marked users"""
+        if self._job_published:
+            self._job_published = False
+            job_ranker.invalidate()
+            async with AsyncSessionLocal() as db:
+                users = (await db.execute(select(JobMatchRefresh.user_id))).scalars().all()
+            for user_id in users:
+                self.user_changed(user_id)
+
+        batch = list(islice(self._pending, settings.MATCH_SCORES_BATCH_SIZE))
+        if not batch:
+            return
+
+        async with AsyncSessionLocal() as db:
+            for user_id in batch:
+                # Unmark first so a change made during the refresh marks the user again
+                del self._pending[user_id]
+                try:
+                    await self.refresh_user(db, user_id)
+                except Exception as e:
+                    await db.rollback()
+                    _failures.inc()
+                    logger.error("Job match refresh failed", error=str(e), user_id=user_id)
+
+        logger.info("Job matches refreshed", users=len(batch), backlog=len(self._pending))
+
+    async def refresh_user(self, db: AsyncSession, user_id: Any) -> int:
+        """
+        Replace a user's stored matches with a fresh ranking and record when
+        it was computed, even if nothing matched; returns how many were stored
+        """
+        profile = await load_candidate_profile(db, user_id)
+        applied_job_ids = (await db.execute(
+            select(Application.job_id).where(Application.user_id == user_id)
+        )).scalars().all()
+
+        features = await job_ranker.features(db)
+        ranked = job_ranker.rank(features, profile, settings.MATCH_SCORES_TOP_N, exclude=applied_job_ids)
+
+        await db.execute(delete(JobMatchScore).where(JobMatchScore.user_id == user_id))
+        if ranked:
+            await db.execute(insert(JobMatchScore).values([
+                {
+                    "user_id": user_id,
+                    "job_id": match.job_id,
+                    "rank": rank,
+                    "score": match.score,
+                    "components": match.components,
+                    "reasons": match.reasons,
+                    "concerns": match.concerns,
+                }
+                for rank, match in enumerate(ranked, start=1)
+            ]))
+        await db.execute(
+            pg_insert(JobMatchRefresh)
+            .values(user_id=user_id, computed_at=func.now())
+            .on_conflict_do_update(index_elements=[JobMatchRefresh.user_id], set_={"computed_at": func.now()})
+        )
+        await db.commit()
+
+        _refreshed.inc()
+        return len(ranked)
+
+
+# Global match score worker instance
+match_score_worker = MatchScoreWorker()
@@ -0,0 +1,112 @@
+"""
+Token-aware prompt construction for LLM requests
+"""
+
+import json
+import re
+from typing import Any, Dict, List, Sequence, Tuple
+
+import structlog
+
+from app.core.metrics import metrics
+
+logger = structlog.get_logger(__name__)
+
+# Tokens the chat format adds around every message, and to prime the reply
+MESSAGE_OVERHEAD = 4
+REPLY_OVERHEAD = 3
+
+ELLIPSIS = " …"
+
+# Words, single punctuation marks, and line breaks with the indentation after them
+_PIECES = re.compile(r"\w+|[^\w\s]|\n\s*")
+
+_prompt_tokens = metrics.counter("llm_prompt_tokens_total", "Prompt tokens sent upstream, by endpoint")
+_completion_tokens = metrics.counter("llm_completion_tokens_total", "Completion tokens received, by endpoint")
+_cached_tokens = metrics.counter("llm_cached_tokens_total", "Prompt and completion tokens served from the response cache, by endpoint")
+
+
+def count_tokens(text: str) -> int:
+    """
+    Local estimate of the BPE token count of `text`.
+
+    Words cost one token per four characters, rounded up; punctuation and
+    line breaks cost one each. On English prose and JSON this errs slightly
+    high against cl100k, which is the safe side for budgeting, and needs no
+    tokenizer download.
+    """
+    if not text:
+        return 0
+    return sum((len(piece.strip(" \t")) + 3) // 4 or 1 for piece in _PIECES.findall(text))
+
+
+def count_message_tokens(messages: Sequence[Dict[str, str]]) -> int:
+    """Estimated prompt tokens of a chat request"""
+    return REPLY_OVERHEAD + sum(
+        MESSAGE_OVERHEAD + count_tokens(message.get("role", "")) + count_tokens(message.get("content", ""))
+        for message in messages
+    )
+
+
+def _prune(value: Any) -> Any:
+    if isinstance(value, dict):
+        pruned = {key: _prune(item) for key, item in value.items()}
+        return {key: item for key, item in pruned.items() if item not in (None, "", [], {})}
+    if isinstance(value, (list, tuple)):
+        return [_prune(item) for item in value]
+    return value
+
+
+def compact_json(value: Any) -> str:
+    """JSON without whitespace or empty fields"""
+    return json.dumps(_prune(value), separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def truncate(text: str, max_tokens: int) -> str:
+    """`text` cut at a word boundary to at most `max_tokens`, marked with an ellipsis"""
+    if not text or count_tokens(text) <= max_tokens:
+        return text or ""
+
+    budget = max_tokens - count_tokens(ELLIPSIS)
+    end = 0
+    for match in _PIECES.finditer(text):
+        budget -= (len(match.group().strip(" \t")) + 3) // 4 or 1
+        if budget < 0:
+            break
+        end = match.end()
+    return text[:end].rstrip() + ELLIPSIS
+
+
+def fit_json_array(items: Sequence[Any], max_tokens: int) -> Tuple[str, int]:
+    """
+    Compact JSON array of the longest prefix of `items` that fits `max_tokens`.
+
+    Returns the JSON and how many items it holds, so callers can pass the
+    best-ranked candidates first and let the budget decide how many go in.
+    """
+    parts: List[str] = []
+    used = count_tokens("[]")
+    for item in items:
+        rendered = compact_json(item)
+        cost = count_tokens(rendered) + (1 if parts else 0)
+        if used + cost > max_tokens:
+            break
+        parts.append(rendered)
+        used += cost
+    return "[" + ",".join(parts) + "]", len(parts)
+
+
+def record_usage(endpoint: str, prompt_tokens: int, completion_tokens: int, cached: bool = False) -> None:
+    """Count one request's tokens, spent upstream or served from the cache"""
+    if cached:
+        _cached_tokens.inc(prompt_tokens + completion_tokens, endpoint=endpoint)
+    else:
+        _prompt_tokens.inc(prompt_tokens, endpoint=endpoint)
+        _completion_tokens.inc(completion_tokens, endpoint=endpoint)
+    logger.info(
+        "LLM token usage",
+        endpoint=endpoint,
+        prompt_tokens=prompt_tokens,
+        completion_tokens=completion_tokens,
+        cached=cached
+    )
@@ -6,8 +6,9 @@ A comprehensive job platform backend with AI-powered features
 from fastapi import FastAPI, HTTPException, Depends, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from contextlib import asynccontextmanager
+import asyncio
 import uvicorn
 import structlog
 
@@ -15,6 +16,13 @@ from app.core.config import settings
 from app.core.database import engine, Base
 from app.api.v1.api import api_router
 from app.core.exceptions import JobFlixException
+from app.core.metrics import metrics
+from app.core.tasks import PeriodicTask
+from app.services.counters import job_view_counter, job_application_counter, reconcile_application_counts
+from app.services.autocomplete import autocomplete_service
+from app.services.job_index import job_vector_index
+from app.services.llm import llm_service
+from app.services.match_scores import match_score_worker
 
 # Configure structured logging
 structlog.configure(
@@ -49,10 +57,62 @@ async def lifespan(app: FastAPI):
         await conn.run_sync(Base.metadata.create_all)
     
     logger.info("Database tables created successfully")
+    
+    # Build the autocomplete index in the background and refresh it periodically
+    initial_autocomplete_build = asyncio.create_task(autocomplete_service.rebuild())
+    autocomplete_refresh = PeriodicTask(
+        "autocomplete-rebuild", settings.AUTOCOMPLETE_REBUILD_INTERVAL, autocomplete_service.rebuild
+    )
+    autocomplete_refresh.start()
+    
+    # Write buffered job views in batches
+    view_count_flush = PeriodicTask("job-view-flush", job_view_counter.interval, job_view_counter.flush)
+    view_count_flush.start()
+    
+    # Keep job application counts current, and repair any drift
+    application_count_flush = PeriodicTask(
+        "job-application-flush", job_application_counter.interval, job_application_counter.flush
+    )
+    application_count_flush.start()
+    application_count_reconcile = PeriodicTask(
+        "job-application-reconcile", settings.APPLICATION_COUNT_RECONCILE_INTERVAL, reconcile_application_counts
+    )
+    application_count_reconcile.start()
+    
+    # Build the job vector index in the background; keep it fresh and drop expired jobs
+    initial_job_index_build = asyncio.create_task(job_vector_index.rebuild())
+    job_index_refresh = PeriodicTask(
+        "job-index-rebuild", settings.JOB_INDEX_REBUILD_INTERVAL, job_vector_index.rebuild
+    )
+    job_index_refresh.start()
+    job_index_expire = PeriodicTask("job-index-expire", settings.JOB_INDEX_EXPIRE_INTERVAL, job_vector_index.expire)
+    job_index_expire.start()
+    
+    # Keep the LLM response cache within its TTL and size bound
+    llm_cache_evict = PeriodicTask("llm-cache-evict", settings.LLM_CACHE_EVICT_INTERVAL, llm_service.evict)
+    llm_cache_evict.start()
+    
+    # Recompute stored job matches of users whose profile changed or who may fit new jobs
+    match_scores_refresh = PeriodicTask(
+        "job-match-scores", settings.MATCH_SCORES_INTERVAL, match_score_worker.run_once
+    )
+    match_scores_refresh.start()
     yield
     
     # Shutdown
     logger.info("Shutting down JobFlix FastAPI application")
+    await autocomplete_refresh.stop()
+    await view_count_flush.stop()
+    await application_count_flush.stop()
+    await application_count_reconcile.stop()
+    await job_index_refresh.stop()
+    await job_index_expire.stop()
+    await llm_cache_evict.stop()
+    await match_scores_refresh.stop()
+    await job_view_counter.flush()
+    await job_application_counter.flush()
+    initial_autocomplete_build.cancel()
+    initial_job_index_build.cancel()
 
 
 # Create FastAPI application
@@ -153,6 +213,12 @@ async def health_check():
     }
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint():
+    """Application metrics in the Prometheus text format"""
+    return metrics.render()
+
+
 if __name__ == "__main__":
     uvicorn.run(
         "main:app",
@@ -0,0 +1,88 @@
+"""
+Stand-ins for external services used across tests
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+from app.core.config import settings
+from app.services.llm_gateway import OpenAIProvider, ProviderResponse
+
+
+class FakeResponse:
+    def __init__(self):
+        self.closed = False
+
+    async def aclose(self):
+        self.closed = True
+
+
+class FakeAsyncStream:
+    """
+    Only what openai 1.3.7's AsyncStream offers: iteration and `response`,
+    no close(). An exception among `contents` is raised when reached.
+    """
+
+    def __init__(self, contents):
+        self.response = FakeResponse()
+        self._chunks = (self._chunk(content) for content in contents)
+
+    @staticmethod
+    def _chunk(content):
+        if isinstance(content, BaseException):
+            raise content
+        return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content))])
+
+    async def __anext__(self):
+        try:
+            return next(self._chunks)
+        except StopIteration:
+            raise StopAsyncIteration
+
+    async def __aiter__(self):
+        for chunk in self._chunks:
+            yield chunk
+
+
+def openai_provider(monkeypatch, upstream):
+    async def create(**kwargs):
+        assert kwargs["stream"] is True
+        return upstream
+
+    monkeypatch.setattr(settings, "OPENAI_API_KEY", "test-key")
+    provider = OpenAIProvider()
+    provider._client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    return provider
+
+
+class ScriptedProvider:
+    """
+    Answers calls in turn from `outcomes`: a string is the completion, an
+    exception is raised. The last outcome repeats once the script runs out.
+    While `gate` is set to an unset Event, calls wait on it before answering.
+    """
+
+    configured = True
+
+    def __init__(self, *outcomes, gate=None):
+        self.outcomes = list(outcomes)
+        self.gate = gate
+        self.calls = 0
+        self.active = 0
+        self.most_active = 0
+
+    async def complete(self, model, messages, temperature, max_tokens):
+        self.calls += 1
+        self.active += 1
+        self.most_active = max(self.most_active, self.active)
+        try:
+            if self.gate is not None:
+                await self.gate.wait()
+            else:
+                await asyncio.sleep(0)
+            outcome = self.outcomes[min(self.calls, len(self.outcomes)) - 1]
+            if isinstance(outcome, BaseException):
+                raise outcome
+            return ProviderResponse(content=outcome, prompt_tokens=3, completion_tokens=len(outcome.split()))
+        finally:
+            self.active -= 1
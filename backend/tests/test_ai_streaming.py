@@ -0,0 +1,79 @@
+"""
+Tests for streamed AI responses sent as server-sent events
+"""
+
+import pytest
+
+from app.api.v1.endpoints.ai import _event_stream_response
+from app.services import llm
+from app.services.llm import LLMService, _streams_abandoned
+from app.services.llm_gateway import LLMGateway
+from tests.fakes import FakeAsyncStream, openai_provider
+
+
+class _Request:
+    """Reports the client gone after `connected_for` checks"""
+
+    def __init__(self, connected_for):
+        self._checks = 0
+        self._connected_for = connected_for
+
+    async def is_disconnected(self):
+        self._checks += 1
+        return self._checks > self._connected_for
+
+
+@pytest.mark.asyncio
+async def test_client_disconnect_closes_the_upstream_response(monkeypatch):
+    upstream = FakeAsyncStream(["Dear", " hiring", " manager"])
+    monkeypatch.setattr(llm, "llm_gateway", LLMGateway(provider=openai_provider(monkeypatch, upstream)))
+    abandoned = _streams_abandoned.get()
+
+    chunks = LLMService().stream([{"role": "user", "content": "Write"}], use_cache=False, endpoint="test")
+    response = _event_stream_response(_Request(connected_for=1), chunks, "Streaming failed")
+    events = [event async for event in response.body_iterator]
+
+    assert len(events) == 1 and events[0].startswith("event: token")
+    assert upstream.response.closed
+    assert _streams_abandoned.get() == abandoned + 1
+
+
+@pytest.mark.asyncio
+async def test_finished_stream_ends_with_done(monkeypatch):
+    upstream = FakeAsyncStream(["Dear", " hiring", " manager"])
+    monkeypatch.setattr(llm, "llm_gateway", LLMGateway(provider=openai_provider(monkeypatch, upstream)))
+
+    async def cache_set(*args):
+        pass
+
+    service = LLMService()
+    monkeypatch.setattr(service, "_cache_set", cache_set)
+    chunks = service.stream([{"role": "user", "content": "Write"}], use_cache=False, endpoint="test")
+    response = _event_stream_response(_Request(connected_for=10), chunks, "Streaming failed")
+    events = [event async for event in response.body_iterator]
+
+    assert [event.split("\n")[0] for event in events] == ["event: token"] * 3 + ["event: done"]
+    assert upstream.response.closed
+
+
+@pytest.mark.asyncio
+async def test_upstream_failure_mid_stream_ends_with_error(monkeypatch):
+    upstream = FakeAsyncStream(["Dear", ConnectionResetError("upstream reset")])
+    monkeypatch.setattr(llm, "llm_gateway", LLMGateway(provider=openai_provider(monkeypatch, upstream)))
+    abandoned = _streams_abandoned.get()
+    stored = []
+
+    async def cache_set(*args):
+        stored.append(args)
+
+    service = LLMService()
+    monkeypatch.setattr(service, "_cache_set", cache_set)
+    chunks = service.stream([{"role": "user", "content": "Write"}], use_cache=False, endpoint="test")
+    response = _event_stream_response(_Request(connected_for=10), chunks, "Streaming failed")
+    events = [event async for event in response.body_iterator]
+
+    assert [event.split("\n")[0] for event in events] == ["event: token", "event: error"]
+    assert upstream.response.closed
+    assert _streams_abandoned.get() == abandoned + 1
+    # A partial answer is never cached
+    assert stored == []
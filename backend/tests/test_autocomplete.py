@@ -0,0 +1,195 @@
+"""
+Tests for the autocomplete prefix index and its incremental updates
+"""
+
+import random
+
+import pytest
+
+from app.services import autocomplete
+from app.services.autocomplete import (
+    AutocompleteService,
+    PrefixIndex,
+    SuggestionKind,
+    _TOP_RESULTS,
+    _title_stats,
+)
+
+TITLE = SuggestionKind.TITLE
+SKILL = SuggestionKind.SKILL
+
+
+def _brute_force(weights, prefix, limit):
+    """Reference ranking: every entry with a run of words starting with `prefix`, heaviest first"""
+    matches = []
+    for text, weight in weights.items():
+        words = text.lower().split()
+        if any(" ".join(words[i:]).startswith(prefix) for i in range(len(words))):
+            matches.append((text, weight))
+    return sorted(matches, key=lambda match: -match[1])[:limit]
+
+
+def _titles(index, prefix, limit=10):
+    return [(s.text, s.weight) for s in index.search(prefix, limit, kinds=[TITLE])]
+
+
+def _service(rows):
+    """A service in the state a rebuild over `rows` leaves it in"""
+    service = AutocompleteService()
+    service._titles = _title_stats(rows)
+    service.index = PrefixIndex.from_entries(
+        (TITLE, stats.text, stats.weight) for stats in service._titles.values()
+    )
+    return service
+
+
+def test_search_matches_any_word():
+    index = PrefixIndex.from_entries([
+        (TITLE, "Senior Python Developer", 3),
+        (TITLE, "Data Engineer", 2),
+        (SKILL, "Python", 5),
+    ])
+
+    assert [s.text for s in index.search("dev")] == ["Senior Python Developer"]
+    assert [s.text for s in index.search("PYTHON")] == ["Python", "Senior Python Developer"]
+    assert [s.text for s in index.search("python d")] == ["Senior Python Developer"]
+    assert [s.text for s in index.search("py", kinds=[SKILL])] == ["Python"]
+    assert index.search("rust") == []
+    assert index.search("  ") == []
+
+
+def test_upsert_and_remove_update_cached_rankings():
+    index = PrefixIndex.from_entries([(TITLE, "Backend Engineer", 2)])
+    assert [s.text for s in index.search("eng")] == ["Backend Engineer"]
+
+    index.upsert(TITLE, "Engineering Manager", 3)
+    assert [s.text for s in index.search("eng")] == ["Engineering Manager", "Backend Engineer"]
+
+    index.remove(TITLE, "Engineering Manager")
+    assert [s.text for s in index.search("eng")] == ["Backend Engineer"]
+
+    index.adjust(TITLE, "Backend Engineer", -2)
+    assert index.search("eng") == []
+    assert len(index) == 0
+
+
+def test_demoted_entry_of_truncated_ranking_is_not_lost():
+    entries = [(TITLE, f"Engineer {i:03d}", 100 + i) for i in range(_TOP_RESULTS * 2)]
+    index = PrefixIndex.from_entries(entries)
+    heaviest = entries[-1][1]
+
+    # Still heavier than everything left out of the cached ranking
+    index.upsert(TITLE, heaviest, 100 + _TOP_RESULTS + 1)
+    assert heaviest in [s.text for s in index.search("eng", _TOP_RESULTS)]
+
+    # Now lighter than entries that were left out
+    index.upsert(TITLE, heaviest, 100.5)
+    assert heaviest not in [s.text for s in index.search("eng", _TOP_RESULTS)]
+    assert index.search("eng", _TOP_RESULTS * 2)[-2].text == heaviest
+
+
+def test_random_writes_match_brute_force():
+    rng = random.Random(7)
+    words = ["python", "pyspark", "data", "dev", "developer", "engineer", "senior", "lead"]
+    weights = {}
+    index = PrefixIndex.from_entries([])
+    prefixes = ["p", "py", "d", "de", "dev", "e", "s", "l", "python d"]
+
+    for _ in range(2000):
+        text = " ".join(rng.sample(words, rng.randint(1, 3)))
+        if rng.random() < 0.2:
+            weights.pop(text, None)
+            index.remove(TITLE, text)
+        else:
+            weights[text] = rng.randint(1, 60)
+            index.upsert(TITLE, text, weights[text])
+
+        prefix = rng.choice(prefixes)
+        limit = rng.choice([5, 10, _TOP_RESULTS])
+        assert [w for _, w in _titles(index, prefix, limit)] == [w for _, w in _brute_force(weights, prefix, limit)]
+
+
+def test_listing_and_unlisting_reverse_each_other():
+    rows = [("Python Developer", 2, 40), ("Data Engineer", 1, 0)]
+    service = _service(rows)
+    before = _titles(service.index, "d")
+
+    service.job_listed("Python Developer", 9)
+    service.job_listed("python developer", 3)
+    service.job_unlisted("python developer", 3)
+    service.job_unlisted("Python Developer", 9)
+
+    assert _titles(service.index, "d") == before
+
+
+def test_incremental_updates_match_a_rebuild():
+    service = _service([("Python Developer", 2, 40), ("Data Engineer", 1, 5)])
+
+    service.job_listed("python developer", 10)
+    service.job_unlisted("Data Engineer", 5)
+    service.job_listed("QA Engineer", 0)
+
+    rebuilt = _service([
+        ("Python Developer", 2, 40),
+        ("python developer", 1, 10),
+        ("QA Engineer", 1, 0),
+    ])
+    for prefix in ("p", "d", "e", "q"):
+        assert _titles(service.index, prefix) == _titles(rebuilt.index, prefix)
+    assert service.index.weight(TITLE, "Data Engineer") == 0
+
+
+def test_spelling_follows_the_remaining_postings():
+    service = _service([("Python Developer", 1, 0), ("python developer", 1, 0)])
+    assert [text for text, _ in _titles(service.index, "py")] == ["Python Developer"]
+
+    service.job_unlisted("Python Developer", 0)
+    assert [text for text, _ in _titles(service.index, "py")] == ["python developer"]
+
+
+class _Result:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def all(self):
+        return self._rows
+
+
+class _Session:
+    """Answers the rebuild's queries in order, running `during` once the titles are read"""
+
+    def __init__(self, results, during):
+        self._results = iter(results)
+        self._during = during
+        self._queries = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, statement):
+        self._queries += 1
+        if self._queries == 2:
+            self._during()
+        return _Result(next(self._results))
+
+
+@pytest.mark.asyncio
+async def test_writes_during_rebuild_are_replayed(monkeypatch):
+    service = AutocompleteService()
+
+    def write():
+        service.job_listed("Rust Developer", 0)
+        service.company_saved("Acme")
+
+    # The titles query ran before the write committed
+    results = [[("Python Developer", 1, 0)], [], []]
+    monkeypatch.setattr(autocomplete, "AsyncSessionLocal", lambda: _Session(results, write))
+
+    await service.rebuild()
+
+    assert sorted(s.text for s in service.suggest("dev")) == ["Python Developer", "Rust Developer"]
+    assert [s.text for s in service.suggest("ac")] == ["Acme"]
+    assert service._replay is None
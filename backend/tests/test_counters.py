@@ -0,0 +1,232 @@
+"""
+Tests for write-behind counters
+"""
+
+import asyncio
+from uuid import uuid4
+
+import pytest
+from pydantic import BaseModel
+from sqlalchemy.dialects import postgresql
+
+from app.services import counters
+from app.services.cache import cache_service, job_detail_key
+from app.models.job import Job
+from app.services.counters import (
+    CounterBuffer,
+    _patch_job_details,
+    job_application_counter,
+    reconcile_application_counts,
+)
+
+
+class _Result:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def all(self):
+        return self._rows
+
+
+class _Session:
+    """
+    Shared by every AsyncSessionLocal() call. The n-th statement runs the
+    n-th step's action, yields to other tasks, then answers with its rows.
+    """
+
+    def __init__(self, steps):
+        self.steps = list(steps)
+        self.statements = []
+        self.commits = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, statement):
+        action, rows = self.steps[len(self.statements)]
+        self.statements.append(statement)
+        if action is not None:
+            action()
+        await asyncio.sleep(0)
+        return _Result(rows)
+
+    async def commit(self):
+        self.commits += 1
+
+
+def _params(statement):
+    return set(statement.compile(dialect=postgresql.dialect()).params.values())
+
+
+def _use_session(monkeypatch, session):
+    monkeypatch.setattr(counters, "AsyncSessionLocal", lambda: session)
+
+
+def _sql(statement):
+    return str(statement.compile(dialect=postgresql.dialect()))
+
+
+def _buffer(name, on_flush=None):
+    # A fresh buffer per test, since its lock binds to the test's event loop
+    return CounterBuffer(name, Job, "view_count", interval=60, on_flush=on_flush)
+
+
+def _fail():
+    raise RuntimeError("connection reset")
+
+
+def _cancel():
+    asyncio.current_task().cancel()
+
+
+@pytest.mark.asyncio
+async def test_flush_writes_buffered_increments_in_batches(monkeypatch):
+    monkeypatch.setattr(counters, "FLUSH_BATCH_SIZE", 2)
+    written = []
+
+    async def on_flush(view_counts):
+        written.append(view_counts)
+
+    buffer = _buffer("test_batches", on_flush)
+    jobs = [uuid4() for _ in range(5)]
+    for job_id in jobs:
+        buffer.increment(job_id)
+    buffer.increment(jobs[0], 2)
+    buffer.increment(jobs[4], -1)
+
+    session = _Session([
+        (None, [(jobs[0], 13), (jobs[1], 1)]),
+        (None, [(jobs[2], 7), (jobs[3], 2)]),
+    ])
+    _use_session(monkeypatch, session)
+
+    # The increment and decrement of jobs[4] cancel out and are not written
+    assert await buffer.flush() == 4
+    assert len(session.statements) == 2
+    assert session.commits == 1
+    assert jobs[4] not in _params(session.statements[0]) | _params(session.statements[1])
+    assert {jobs[0], 3, jobs[1]} <= _params(session.statements[0])
+    assert written == [{jobs[0]: 13, jobs[1]: 1, jobs[2]: 7, jobs[3]: 2}]
+    assert buffer.pending_deltas() == {}
+    assert buffer.lag() == 0.0
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_puts_increments_back(monkeypatch):
+    buffer = _buffer("test_failure")
+    job_id, late_job = uuid4(), uuid4()
+    buffer.increment(job_id, 2)
+
+    def fail_after_a_view():
+        buffer.increment(job_id)
+        buffer.increment(late_job)
+        _fail()
+
+    session = _Session([(fail_after_a_view, [])])
+    _use_session(monkeypatch, session)
+
+    assert await buffer.flush() == 0
+    assert session.commits == 0
+    assert buffer.pending_deltas() == {job_id: 3, late_job: 1}
+    assert buffer.lag() > 0
+
+    # The next flush retries them
+    session = _Session([(None, [(job_id, 3), (late_job, 1)])])
+    _use_session(monkeypatch, session)
+    assert await buffer.flush() == 2
+    assert buffer.pending_deltas() == {}
+
+
+@pytest.mark.asyncio
+async def test_cancelled_flush_puts_increments_back(monkeypatch):
+    buffer = _buffer("test_cancel")
+    job_id = uuid4()
+    buffer.increment(job_id, 4)
+    _use_session(monkeypatch, _Session([(_cancel, [])]))
+
+    with pytest.raises(asyncio.CancelledError):
+        await asyncio.create_task(buffer.flush())
+
+    assert buffer.pending_deltas() == {job_id: 4}
+
+
+def test_flush_leaves_updated_at_alone():
+    sql = _sql(_buffer("test_updated_at")._statement([(uuid4(), 1)]))
+
+    assert "view_count=(jobs.view_count + deltas.value)" in sql
+    assert "updated_at=jobs.updated_at" in sql
+
+
+class _Body(BaseModel):
+    view_count: int
+
+
+@pytest.mark.asyncio
+async def test_flushed_views_are_patched_into_cached_job_details():
+    job_id, stale_id = uuid4(), uuid4()
+    await cache_service.set(job_detail_key(job_id), {"etag": "v1", "body": _Body(view_count=10)}, ttl=60)
+    await cache_service.set(job_detail_key(stale_id), {"etag": "v1", "body": _Body(view_count=50)}, ttl=60)
+    expires_at = cache_service._cache[job_detail_key(job_id)]["expires_at"]
+
+    await _patch_job_details({job_id: 14, stale_id: 40, uuid4(): 3})
+
+    cached = await cache_service.get(job_detail_key(job_id))
+    assert cached == {"etag": "v1", "body": _Body(view_count=14)}
+    assert cache_service._cache[job_detail_key(job_id)]["expires_at"] == expires_at
+    # A count read after the flush is never moved back
+    assert (await cache_service.get(job_detail_key(stale_id)))["body"].view_count == 50
+
+
+@pytest.mark.asyncio
+async def test_reconcile_leaves_out_increments_buffered_after_its_flush(monkeypatch):
+    monkeypatch.setattr(job_application_counter, "_pending", {})
+    flushed_job, late_job = uuid4(), uuid4()
+    job_application_counter.increment(flushed_job)
+
+    # An application commits while the flush is writing
+    session = _Session([
+        (lambda: job_application_counter.increment(late_job, 3), [(flushed_job, 5)]),
+        (None, []),
+    ])
+    _use_session(monkeypatch, session)
+
+    assert await reconcile_application_counts() == 0
+
+    flush, repair = session.statements
+    assert flushed_job in _params(flush)
+    # The recount subtracts what is still buffered, since it is flushed later
+    assert {late_job, 3} <= _params(repair)
+    assert job_application_counter.pending(late_job) == 3
+
+
+@pytest.mark.asyncio
+async def test_reconcile_undoes_repairs_of_jobs_that_moved_meanwhile(monkeypatch):
+    monkeypatch.setattr(job_application_counter, "_pending", {})
+    # Locks bind to the first event loop that waits on them
+    monkeypatch.setattr(job_application_counter, "_flush_lock", asyncio.Lock())
+    moved_job, steady_job = uuid4(), uuid4()
+    flushes = []
+
+    def application_during_update():
+        job_application_counter.increment(moved_job)
+        flushes.append(asyncio.ensure_future(job_application_counter.flush()))
+
+    session = _Session([
+        (application_during_update, [(moved_job, 4), (steady_job, 9)]),
+        (None, []),
+        (None, [(moved_job, 5)]),
+    ])
+    _use_session(monkeypatch, session)
+
+    assert await reconcile_application_counts() == 1
+    await asyncio.gather(*flushes)
+
+    repair, restore, flush = session.statements
+    assert {moved_job, 4} <= _params(restore)
+    assert steady_job not in _params(restore)
+    # The periodic flush waited for the repair to commit
+    assert session.commits == 2
+    assert moved_job in _params(flush)
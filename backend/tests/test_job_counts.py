@@ -0,0 +1,67 @@
+"""
+Tests for cached job search totals
+"""
+
+import asyncio
+
+import pytest
+
+from app.core.config import settings
+from app.services import job_counts
+from app.services.cache import cache_service
+from app.services.job_counts import JobCountService
+
+
+class _Session:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+def _service(monkeypatch, counted=None):
+    service = JobCountService()
+
+    async def estimate(db, conditions):
+        return -1
+
+    async def exact(db, conditions):
+        if counted is not None:
+            await counted.wait()
+        return len(conditions)
+
+    monkeypatch.setattr(service, "estimate", estimate)
+    monkeypatch.setattr(service, "exact", exact)
+    monkeypatch.setattr(job_counts, "AsyncSessionLocal", _Session)
+    return service
+
+
+@pytest.mark.asyncio
+async def test_cached_totals_are_bounded(monkeypatch):
+    monkeypatch.setattr(settings, "SEARCH_COUNT_CACHE_MAX_SIGNATURES", 2)
+    service = _service(monkeypatch)
+
+    for signature in ("a", "b", "c"):
+        assert await service.cached(None, [signature], f"bounded-{signature}") == -1
+        await asyncio.gather(*service._tasks)
+
+    assert await cache_service.get("job_count:bounded-a") is None
+    assert await service.cached(None, ["b"], "bounded-b") == 1
+    assert await service.cached(None, ["c"], "bounded-c") == 1
+    assert list(service._keys) == ["job_count:bounded-b", "job_count:bounded-c"]
+
+
+@pytest.mark.asyncio
+async def test_background_counts_are_capped(monkeypatch):
+    monkeypatch.setattr(settings, "SEARCH_COUNT_MAX_REFRESHES", 2)
+    counted = asyncio.Event()
+    service = _service(monkeypatch, counted)
+
+    for i in range(5):
+        assert await service.cached(None, [], f"capped-{i}") == -1
+    assert len(service._tasks) == 2
+
+    counted.set()
+    await asyncio.gather(*service._tasks)
+    assert not service._refreshing
@@ -0,0 +1,63 @@
+"""
+Tests for reading precomputed job matches
+"""
+
+from datetime import datetime, timezone
+
+import pytest
+
+from app.api.v1.endpoints import ai
+
+
+class _Result:
+    def all(self):
+        return []
+
+
+class _Session:
+    """No stored match rows; `computed_at` is the user's refresh marker, if any"""
+
+    def __init__(self, computed_at):
+        self.computed_at = computed_at
+
+    async def execute(self, statement):
+        return _Result()
+
+    async def scalar(self, statement):
+        return self.computed_at
+
+
+def _count_refreshes(monkeypatch, marker_at=None):
+    refreshed = []
+
+    async def refresh_user(db, user_id):
+        refreshed.append(user_id)
+        db.computed_at = marker_at
+        return 0
+
+    monkeypatch.setattr(ai.match_score_worker, "refresh_user", refresh_user)
+    return refreshed
+
+
+@pytest.mark.asyncio
+async def test_empty_matches_are_computed_once(monkeypatch):
+    computed_at = datetime(2024, 2, 22, tzinfo=timezone.utc)
+    refreshed = _count_refreshes(monkeypatch, marker_at=computed_at)
+    db = _Session(computed_at=None)
+
+    first = await ai.get_job_matches(limit=20, refresh=False, current_user_id="user-1", db=db)
+    second = await ai.get_job_matches(limit=20, refresh=False, current_user_id="user-1", db=db)
+
+    assert refreshed == ["user-1"]
+    assert first.matches == second.matches == []
+    assert second.computed_at == computed_at
+
+
+@pytest.mark.asyncio
+async def test_explicit_refresh_recomputes(monkeypatch):
+    computed_at = datetime(2024, 2, 22, tzinfo=timezone.utc)
+    refreshed = _count_refreshes(monkeypatch, marker_at=computed_at)
+
+    await ai.get_job_matches(limit=20, refresh=True, current_user_id="user-1", db=_Session(computed_at))
+
+    assert refreshed == ["user-1"]
@@ -0,0 +1,35 @@
+"""
+Tests for matching job snapshots against cached search filters
+"""
+
+import pytest
+
+from app.models.job import JobStatus
+from app.services.job_search import SNAPSHOT_FIELDS, job_could_match
+
+
+def _job(**fields):
+    job = dict.fromkeys(SNAPSHOT_FIELDS)
+    job.update({"status": JobStatus.ACTIVE, **fields})
+    return job
+
+
+@pytest.mark.parametrize(
+    "query, title",
+    [
+        ("running", "Run the data platform"),
+        ("hoping", "We hope you like Python"),
+        ("using", "Use Go daily"),
+        ("happy", "Happiness engineer"),
+        ("relational databases", "Relate data across services"),
+        ("developers", "Senior Developer"),
+    ],
+)
+def test_text_query_matches_other_forms_of_the_stem(query, title):
+    assert job_could_match(_job(title=title), {"query": query})
+
+
+def test_text_query_rules_out_unrelated_jobs():
+    assert not job_could_match(_job(title="Backend Engineer"), {"query": "designer"})
+    assert job_could_match(_job(title="Backend Engineer"), {"query": "-designer"})
+    assert not job_could_match(_job(title="Designer", status=JobStatus.DRAFT), {"query": "designer"})
@@ -0,0 +1,98 @@
+"""
+Tests for LLM completions: coalescing of identical requests and the response cache
+"""
+
+import asyncio
+
+import pytest
+
+from app.services import llm
+from app.services.llm import LLMService, _coalesced, _lookups
+from app.services.llm_gateway import LLMGateway
+from tests.fakes import ScriptedProvider
+
+MESSAGES = [{"role": "user", "content": "Write a cover letter"}]
+
+
+def _service(monkeypatch, provider, cached=None):
+    """Service over `provider` whose cache holds `cached` for every key"""
+    service = LLMService()
+    service.stored = []
+
+    async def cache_get(key):
+        return cached
+
+    async def cache_set(key, model, response):
+        service.stored.append(response.content)
+
+    monkeypatch.setattr(llm, "llm_gateway", LLMGateway(provider=provider))
+    monkeypatch.setattr(service, "_cache_get", cache_get)
+    monkeypatch.setattr(service, "_cache_set", cache_set)
+    return service
+
+
+@pytest.mark.asyncio
+async def test_identical_concurrent_requests_share_one_upstream_call(monkeypatch):
+    gate = asyncio.Event()
+    provider = ScriptedProvider("Dear hiring manager", gate=gate)
+    service = _service(monkeypatch, provider)
+    coalesced = _coalesced.get()
+
+    calls = [asyncio.create_task(service.complete(MESSAGES, endpoint="test")) for _ in range(3)]
+    await asyncio.sleep(0)
+    gate.set()
+    completions = await asyncio.gather(*calls)
+
+    assert {completion.content for completion in completions} == {"Dear hiring manager"}
+    assert provider.calls == 1
+    assert _coalesced.get() == coalesced + 2
+    assert service.stored == ["Dear hiring manager"]
+    assert not service._flights
+
+
+@pytest.mark.asyncio
+async def test_caller_going_away_leaves_the_shared_call_running(monkeypatch):
+    gate = asyncio.Event()
+    provider = ScriptedProvider("Dear hiring manager", gate=gate)
+    service = _service(monkeypatch, provider)
+
+    gone = asyncio.create_task(service.complete(MESSAGES, endpoint="test"))
+    waiting = asyncio.create_task(service.complete(MESSAGES, endpoint="test"))
+    await asyncio.sleep(0)
+    gone.cancel()
+    gate.set()
+
+    assert (await waiting).content == "Dear hiring manager"
+    assert gone.cancelled()
+    assert service.stored == ["Dear hiring manager"]
+
+
+@pytest.mark.asyncio
+async def test_cached_response_skips_the_upstream_call(monkeypatch):
+    provider = ScriptedProvider("fresh")
+    service = _service(monkeypatch, provider, cached="from cache")
+    hits = _lookups.get(result="hit")
+
+    completion = await service.complete(MESSAGES, endpoint="test")
+
+    assert completion == llm.Completion(content="from cache", cached=True)
+    assert provider.calls == 0
+    assert _lookups.get(result="hit") == hits + 1
+
+
+@pytest.mark.asyncio
+async def test_bypass_skips_the_lookup_but_stores_the_answer(monkeypatch):
+    gate = asyncio.Event()
+    provider = ScriptedProvider("fresh", gate=gate)
+    service = _service(monkeypatch, provider, cached="from cache")
+
+    # A cached request in flight must not answer the bypass
+    cached = asyncio.create_task(service.complete(MESSAGES, endpoint="test"))
+    fresh = asyncio.create_task(service.complete(MESSAGES, use_cache=False, endpoint="test"))
+    await asyncio.sleep(0)
+    gate.set()
+
+    assert (await cached).content == "from cache"
+    assert await fresh == llm.Completion(content="fresh", cached=False)
+    assert provider.calls == 1
+    assert service.stored == ["fresh"]
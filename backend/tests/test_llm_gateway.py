@@ -0,0 +1,233 @@
+"""
+Tests for the LLM gateway: concurrency lanes, retries and the circuit breaker
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from app.core.config import settings
+from app.core.exceptions import AIError
+from app.services.llm_gateway import FakeProvider, LLMGateway, Priority, TransientError, _Lane, _retries
+from tests.fakes import FakeAsyncStream, ScriptedProvider, openai_provider
+
+MESSAGES = [{"role": "user", "content": "Summarize this job"}]
+
+
+def _deadline(seconds=5.0):
+    return time.monotonic() + seconds
+
+
+@pytest.fixture(autouse=True)
+def _fast_retries(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_RETRY_BASE_DELAY", 0.0)
+    monkeypatch.setattr(settings, "LLM_RETRY_MAX_DELAY", 0.0)
+
+
+async def _complete(gateway, model, **kwargs):
+    return await gateway.complete(model, MESSAGES, temperature=0.5, max_tokens=50, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_lane_runs_at_most_its_limit_at_once(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_MODEL_CONCURRENCY", {"test-limit": 2})
+    gate = asyncio.Event()
+    provider = ScriptedProvider("ok", gate=gate)
+    gateway = LLMGateway(provider=provider)
+
+    calls = [asyncio.create_task(_complete(gateway, "test-limit")) for _ in range(5)]
+    await asyncio.sleep(0.01)
+    assert provider.active == 2
+
+    gate.set()
+    responses = await asyncio.gather(*calls)
+    assert [response.content for response in responses] == ["ok"] * 5
+    assert provider.most_active == 2
+    assert gateway._lane("test-limit")._active == 0
+
+
+@pytest.mark.asyncio
+async def test_request_queued_past_its_deadline_is_rejected():
+    lane = _Lane("test-queue-timeout", limit=1)
+    release = asyncio.Event()
+
+    async def hold():
+        async with lane.slot(Priority.INTERACTIVE, _deadline()):
+            await release.wait()
+
+    holder = asyncio.create_task(hold())
+    await asyncio.sleep(0)
+    with pytest.raises(AIError, match="busy"):
+        async with lane.slot(Priority.INTERACTIVE, _deadline(0.01)):
+            pass
+
+    release.set()
+    await holder
+    assert lane._active == 0
+    assert all(future.done() for _, _, future in lane._waiters)
+
+
+@pytest.mark.asyncio
+async def test_interactive_waiter_goes_before_earlier_batch_waiter():
+    lane = _Lane("test-priority", limit=1)
+    release = asyncio.Event()
+    granted = []
+
+    async def hold():
+        async with lane.slot(Priority.INTERACTIVE, _deadline()):
+            await release.wait()
+
+    async def use(name, priority):
+        async with lane.slot(priority, _deadline()):
+            granted.append(name)
+
+    holder = asyncio.create_task(hold())
+    await asyncio.sleep(0)
+    batch = asyncio.create_task(use("batch", Priority.BATCH))
+    await asyncio.sleep(0)
+    interactive = asyncio.create_task(use("interactive", Priority.INTERACTIVE))
+    await asyncio.sleep(0)
+
+    release.set()
+    await asyncio.gather(holder, batch, interactive)
+    assert granted == ["interactive", "batch"]
+
+
+@pytest.mark.asyncio
+async def test_openai_stream_closes_the_response_when_finished(monkeypatch):
+    upstream = FakeAsyncStream(["Hello", None, " world"])
+    provider = openai_provider(monkeypatch, upstream)
+
+    chunks = [chunk async for chunk in provider.stream("gpt-4", [], 0.5, 100)]
+
+    assert chunks == ["Hello", " world"]
+    assert upstream.response.closed
+
+
+@pytest.mark.asyncio
+async def test_openai_stream_closes_the_response_when_abandoned(monkeypatch):
+    upstream = FakeAsyncStream(["Hello", " world"])
+    provider = openai_provider(monkeypatch, upstream)
+
+    chunks = provider.stream("gpt-4", [], 0.5, 100)
+    assert await chunks.__anext__() == "Hello"
+    await chunks.aclose()
+
+    assert upstream.response.closed
+
+
+@pytest.mark.asyncio
+async def test_transient_failures_are_retried():
+    provider = ScriptedProvider(TransientError("429"), TransientError("503"), "hired")
+    gateway = LLMGateway(provider=provider)
+    retries = _retries.get(model="test-retry")
+
+    response = await _complete(gateway, "test-retry")
+
+    assert response.content == "hired"
+    assert provider.calls == 3
+    assert _retries.get(model="test-retry") == retries + 2
+
+
+@pytest.mark.asyncio
+async def test_retries_give_up_after_the_limit(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_MAX_RETRIES", 1)
+    provider = ScriptedProvider(TransientError("503"))
+    gateway = LLMGateway(provider=provider)
+
+    with pytest.raises(AIError):
+        await _complete(gateway, "test-give-up")
+    assert provider.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_other_errors_are_not_retried():
+    provider = ScriptedProvider(ValueError("bad request"))
+    gateway = LLMGateway(provider=provider)
+
+    with pytest.raises(ValueError):
+        await _complete(gateway, "test-no-retry")
+    assert provider.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_deadline_bounds_a_slow_upstream_call():
+    provider = ScriptedProvider("too late", gate=asyncio.Event())
+    gateway = LLMGateway(provider=provider)
+
+    started = time.monotonic()
+    with pytest.raises(AIError):
+        await _complete(gateway, "test-deadline", timeout=0.05)
+
+    assert time.monotonic() - started < 1
+    # The upstream call was cancelled, not left running
+    assert provider.active == 0
+
+
+@pytest.mark.asyncio
+async def test_circuit_opens_then_lets_one_probe_through(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_MAX_RETRIES", 0)
+    monkeypatch.setattr(settings, "LLM_CIRCUIT_FAILURE_THRESHOLD", 2)
+    monkeypatch.setattr(settings, "LLM_CIRCUIT_RESET_TIMEOUT", 0.05)
+    gate = asyncio.Event()
+    gate.set()
+    provider = ScriptedProvider(TransientError("503"), TransientError("503"), "recovered", gate=gate)
+    gateway = LLMGateway(provider=provider)
+
+    for _ in range(2):
+        with pytest.raises(AIError, match="AI service error"):
+            await _complete(gateway, "test-breaker")
+    with pytest.raises(AIError, match="temporarily unavailable"):
+        await _complete(gateway, "test-breaker")
+    assert provider.calls == 2
+
+    await asyncio.sleep(0.06)
+    gate.clear()
+    probe = asyncio.create_task(_complete(gateway, "test-breaker"))
+    await asyncio.sleep(0)
+    # Only the probe reaches the upstream while the circuit is half-open
+    with pytest.raises(AIError, match="temporarily unavailable"):
+        await _complete(gateway, "test-breaker")
+
+    gate.set()
+    assert (await probe).content == "recovered"
+    assert (await _complete(gateway, "test-breaker")).content == "recovered"
+    assert provider.calls == 4
+
+
+@pytest.mark.asyncio
+async def test_failed_probe_reopens_the_circuit(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_MAX_RETRIES", 0)
+    monkeypatch.setattr(settings, "LLM_CIRCUIT_FAILURE_THRESHOLD", 1)
+    monkeypatch.setattr(settings, "LLM_CIRCUIT_RESET_TIMEOUT", 0.05)
+    provider = ScriptedProvider(TransientError("503"))
+    gateway = LLMGateway(provider=provider)
+
+    with pytest.raises(AIError, match="AI service error"):
+        await _complete(gateway, "test-reopen")
+    await asyncio.sleep(0.06)
+    with pytest.raises(AIError, match="AI service error"):
+        await _complete(gateway, "test-reopen")
+    with pytest.raises(AIError, match="temporarily unavailable"):
+        await _complete(gateway, "test-reopen")
+    assert provider.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_fake_provider_answers_identical_requests_identically(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_FAKE_LATENCY", 0.0)
+    monkeypatch.setattr(settings, "LLM_FAKE_ERROR_RATE", 0.0)
+    gateway = LLMGateway(provider=FakeProvider())
+
+    first = await _complete(gateway, "test-fake")
+    second = await _complete(gateway, "test-fake")
+    other = await gateway.complete(
+        "test-fake", [{"role": "user", "content": "Something else"}], temperature=0.5, max_tokens=50
+    )
+    streamed = [
+        chunk async for chunk in gateway.stream("test-fake", MESSAGES, temperature=0.5, max_tokens=50)
+    ]
+
+    assert first.content == second.content != other.content
+    assert "".join(streamed).split() == first.content.split()